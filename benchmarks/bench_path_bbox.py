@@ -0,0 +1,229 @@
+"""
+Benchmark exact path bounding boxes against the previous _path_bbox.
+
+Times, over every path in sitelen_seli_kiwen_svgs/, uniform_syllables/ and
+the cartouche SVG:
+
+  legacy   the regex tokenizer + control-point approximation that
+           generate_sitelen_kalama_pona._path_bbox used before
+           path_geometry (copied below as the baseline)
+  scalar   path_geometry.path_bbox, one path at a time
+  parse    path_geometry.parse_path alone
+  batch    path_geometry.batch_bboxes over the parsed paths (NumPy)
+
+and reports how many bboxes the approximation got wrong.
+
+Usage:
+    python benchmarks/bench_path_bbox.py
+    python benchmarks/bench_path_bbox.py --repeat 5
+"""
+
+import argparse
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR / 'scripts'))
+
+import path_geometry  # noqa: E402
+from generate_sitelen_kalama_pona import (  # noqa: E402
+    CARTOUCHE_SVG, SYLLABLES_DIR, WORD_SVGS_DIR,
+)
+
+
+def legacy_path_bbox(d):
+    """Approximate bbox for an SVG path (handles common commands safely)."""
+    if not d:
+        return None
+    tokens = re.findall(r'[a-zA-Z]|[-+]?(?:\d*\.\d+|\d+)(?:[eE][-+]?\d+)?', d)
+    if not tokens:
+        return None
+
+    idx = 0
+    cmd = None
+    x = y = 0.0
+    start_x = start_y = 0.0
+    last_cx = last_cy = None
+    min_x = min_y = float('inf')
+    max_x = max_y = float('-inf')
+
+    def update(px, py):
+        nonlocal min_x, min_y, max_x, max_y
+        min_x = min(min_x, px)
+        min_y = min(min_y, py)
+        max_x = max(max_x, px)
+        max_y = max(max_y, py)
+
+    def read_numbers(n):
+        nonlocal idx
+        if idx + n > len(tokens):
+            return None
+        vals = tokens[idx:idx + n]
+        if any(re.match(r'[a-zA-Z]', v) for v in vals):
+            return None
+        idx += n
+        return [float(v) for v in vals]
+
+    while idx < len(tokens):
+        if re.match(r'[a-zA-Z]', tokens[idx]):
+            cmd = tokens[idx]
+            idx += 1
+        if cmd is None:
+            break
+
+        c = cmd
+        if c in ('Z', 'z'):
+            x, y = start_x, start_y
+            update(x, y)
+            cmd = None
+            continue
+
+        if c in ('M', 'm', 'L', 'l', 'T', 't'):
+            vals = read_numbers(2)
+            if not vals:
+                break
+            dx, dy = vals
+            if c.islower():
+                x += dx
+                y += dy
+            else:
+                x = dx
+                y = dy
+            if c in ('M', 'm'):
+                start_x, start_y = x, y
+                cmd = 'l' if c == 'm' else 'L'
+            update(x, y)
+        elif c in ('H', 'h'):
+            vals = read_numbers(1)
+            if not vals:
+                break
+            dx = vals[0]
+            x = x + dx if c == 'h' else dx
+            update(x, y)
+        elif c in ('V', 'v'):
+            vals = read_numbers(1)
+            if not vals:
+                break
+            dy = vals[0]
+            y = y + dy if c == 'v' else dy
+            update(x, y)
+        elif c in ('C', 'c'):
+            vals = read_numbers(6)
+            if not vals:
+                break
+            x1, y1, x2, y2, x3, y3 = vals
+            if c.islower():
+                x1 += x; y1 += y; x2 += x; y2 += y; x3 += x; y3 += y
+            update(x1, y1)
+            update(x2, y2)
+            x, y = x3, y3
+            update(x, y)
+            last_cx, last_cy = x2, y2
+        elif c in ('S', 's'):
+            vals = read_numbers(4)
+            if not vals:
+                break
+            x2, y2, x3, y3 = vals
+            if last_cx is None:
+                x1, y1 = x, y
+            else:
+                x1, y1 = 2 * x - last_cx, 2 * y - last_cy
+            if c.islower():
+                x2 += x; y2 += y; x3 += x; y3 += y
+            update(x1, y1)
+            update(x2, y2)
+            x, y = x3, y3
+            update(x, y)
+            last_cx, last_cy = x2, y2
+        elif c in ('Q', 'q'):
+            vals = read_numbers(4)
+            if not vals:
+                break
+            x1, y1, x2, y2 = vals
+            if c.islower():
+                x1 += x; y1 += y; x2 += x; y2 += y
+            update(x1, y1)
+            x, y = x2, y2
+            update(x, y)
+            last_cx, last_cy = x1, y1
+        elif c in ('A', 'a'):
+            vals = read_numbers(7)
+            if not vals:
+                break
+            x2, y2 = vals[5], vals[6]
+            if c.islower():
+                x2 += x; y2 += y
+            x, y = x2, y2
+            update(x, y)
+        else:
+            cmd = None
+
+    if min_x == float('inf'):
+        return None
+    return min_x, min_y, max_x, max_y
+
+
+def load_paths():
+    files = sorted(WORD_SVGS_DIR.glob('*.svg')) + sorted(SYLLABLES_DIR.glob('*.svg'))
+    if CARTOUCHE_SVG.exists():
+        files.append(CARTOUCHE_SVG)
+    ds = []
+    for f in files:
+        for el in ET.parse(str(f)).getroot().iter():
+            if el.tag.rsplit('}', 1)[-1] == 'path' and el.get('d'):
+                ds.append(el.get('d'))
+    return ds
+
+
+def best_of(repeat, func):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark path bounding boxes.')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    ds = load_paths()
+    print(f'{len(ds)} paths, {sum(len(d) for d in ds) / 1024:.0f} KiB of path data')
+    if path_geometry._load_numpy() is None:
+        print('numpy not installed: batch_bboxes uses the pure Python fallback')
+
+    t_legacy, legacy = best_of(args.repeat, lambda: [legacy_path_bbox(d) for d in ds])
+    t_scalar, exact = best_of(args.repeat, lambda: [path_geometry.path_bbox(d) for d in ds])
+    t_parse, geoms = best_of(args.repeat, lambda: [path_geometry.parse_path(d) for d in ds])
+    t_batch, batch = best_of(args.repeat, lambda: path_geometry.batch_bboxes(geoms))
+
+    print(f'  legacy        {t_legacy * 1000:8.1f} ms')
+    print(f'  scalar        {t_scalar * 1000:8.1f} ms  ({t_legacy / t_scalar:.1f}x)')
+    print(f'  parse         {t_parse * 1000:8.1f} ms')
+    print(f'  batch         {t_batch * 1000:8.1f} ms')
+    print(f'  parse + batch {(t_parse + t_batch) * 1000:8.1f} ms  '
+          f'({t_legacy / (t_parse + t_batch):.1f}x)')
+
+    mismatched = sum(
+        1 for a, b in zip(exact, batch)
+        if (a is None) != (b is None) or (a and max(abs(x - y) for x, y in zip(a, b)) > 1e-6)
+    )
+    loose = sum(
+        1 for a, b in zip(legacy, exact)
+        if a and b and max(abs(x - y) for x, y in zip(a, b)) > 1e-6
+    )
+    print(f'\n{loose} of {len(ds)} legacy bboxes were looser than the exact bounds')
+    if mismatched:
+        print(f'WARNING: {mismatched} batch bboxes differ from scalar ones')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,326 @@
+"""
+Time every stage of the pipeline on fixed fixtures and compare runs.
+
+Stages (each timed --repeat times; the best run is what gets compared):
+
+  parse_syllables   parse_syllables() on every proper name in the fixture
+  match_compounds   match_compounds() on the word tokens of every fixture label
+  path_bbox         _path_bbox() on every path of every word and syllable glyph
+  generate_short    generate() for SHORT_LABELS, glyph caches cleared first
+  generate_long     generate() for LONG_LABELS, glyph caches cleared first
+  batch             batch_generate_svgs --force over benchmarks/fixtures/labels.csv
+  build_font        build_font.main()
+  compound_scan     CompoundIndex.scan() of sitelen_seli_kiwen_svgs/
+  extract           extract_sitelen_seli_kiwen.main() (skipped without uharfbuzz
+                    or fonts/sitelen-seli-kiwen.woff2)
+  gallery           generate_gallery.main() over the batch output
+
+Everything runs in a scratch copy of the repository (scripts, glyphs, data,
+..sfdir, fonts) with the fixture CSV as data/wikidata_tok_labels.csv and
+benchmarks/fixtures/cartouche.svg as the cartouche, so the checkout is never
+written to and every stage runs on a clean clone. The fixture is a fixed sample (every 35th
+row) of wikidata_tok_labels.csv; keep it as is so results stay comparable.
+
+Results are written as JSON:
+
+    {"date": ..., "python": ..., "platform": ..., "repeat": N,
+     "stages": {"batch": {"best": s, "median": s, "runs": [s, ...],
+                          "items": n}, ...}}
+
+With --compare, each stage's best time is checked against a baseline
+results file; a stage regresses when it is more than --threshold slower
+(relative) and more than --min-delta-ms slower (absolute, so that noise on
+the sub-millisecond stages is not reported). Any regression exits 1.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --stages parse_syllables,generate_short
+    python benchmarks/bench_pipeline.py --save-baseline
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+LABELS_FIXTURE = FIXTURES_DIR / 'labels.csv'
+CARTOUCHE_FIXTURE = FIXTURES_DIR / 'cartouche.svg'
+RESULTS_DIR = Path(__file__).parent / 'results'
+BASELINE_FILE = RESULTS_DIR / 'baseline.json'
+
+# Copied into the scratch tree
+TREE = ['scripts', 'uniform_syllables', 'sitelen_seli_kiwen_svgs', '..sfdir', 'fonts', 'data']
+CARTOUCHE_NAME = 'Jan_Sinpo_We_(Jimbo_Wales_in_Sitelen_Pona).svg'
+
+SHORT_LABELS = ['jan', 'toki Inli', 'ma Nijon', 'jan pona', 'kulupu', 'tomo sewi']
+LONG_LABELS = [
+    'jan sewi Amatelasu',
+    'tomo sewi Isukusima',
+    'kalama musi Petotakonikapokalisotanopatananatananajaletonopanetasantapekininkomasiletanesin',
+    'kulupu Isilan li utala e tomo tawa linja Masi lon tenpo suno nanpa 11 '
+    'pi tenpo mun nanpa 3 pi tenpo sike nanpa 2004',
+    'pilin ante tan ma tomo Losansele lon tenpo mun nanpa luka wan pi tenpo sike '
+    'nanpa mute ale mute luka',
+]
+
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_MIN_DELTA_MS = 5.0
+
+
+class Skip(Exception):
+    """Raised by a stage that cannot run in this environment."""
+
+
+def make_tree(scratch):
+    """Copy the parts of the repository the stages read and write."""
+    for name in TREE:
+        if (ROOT_DIR / name).exists():
+            shutil.copytree(ROOT_DIR / name, scratch / name,
+                            ignore=shutil.ignore_patterns('__pycache__'))
+    # The fixture, not the checkout's cartouche, so results stay comparable
+    shutil.copy2(CARTOUCHE_FIXTURE, scratch / CARTOUCHE_NAME)
+    (scratch / 'data').mkdir(exist_ok=True)
+    shutil.copy2(LABELS_FIXTURE, scratch / 'data' / 'wikidata_tok_labels.csv')
+    (scratch / 'output').mkdir(exist_ok=True)
+
+
+@contextlib.contextmanager
+def quiet(argv=None):
+    """Discard stdout (a real file, since some scripts rewrap its buffer) and
+    optionally set sys.argv for a script's main()."""
+    saved_argv = sys.argv
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        if argv is not None:
+            sys.argv = argv
+        try:
+            yield
+        finally:
+            sys.argv = saved_argv
+
+
+def fixture_labels(scratch):
+    import csv
+
+    with open(scratch / 'data' / 'wikidata_tok_labels.csv', encoding='utf-8', newline='') as f:
+        return [row['label'] for row in csv.DictReader(f)]
+
+
+def glyph_paths(gen):
+    files = sorted(gen.WORD_SVGS_DIR.glob('Sitelen seli kiwen - *.svg'))
+    files += sorted(gen.SYLLABLES_DIR.glob('sitelen kalama pona - *.svg'))
+    ds = []
+    for svg_file in files:
+        paths, _ = gen.read_svg_paths(svg_file)
+        ds += [p['d'] for p in paths or []]
+    return ds
+
+
+def clear_render_caches(gen):
+    gen.clear_glyph_cache()
+    gen.FRAGMENT_CACHE.clear()
+    gen._minified.cache_clear()
+
+
+def make_stages(scratch):
+    """{name: (setup, run)}; run() returns the number of items processed."""
+    gen = importlib.import_module('generate_sitelen_kalama_pona')
+    labels = fixture_labels(scratch)
+    parsed = [gen.parse_input(label) for label in labels]
+    names = [name for _, name in parsed if name]
+    tokens = [words for words, _ in parsed]
+    index = gen.get_compound_index()
+    ds = glyph_paths(gen)
+    out_dir = scratch / 'generate_output'
+
+    def nothing():
+        pass
+
+    def parse_syllables():
+        for name in names:
+            gen.parse_syllables(name)
+        return len(names)
+
+    def match_compounds():
+        for words in tokens:
+            gen.match_compounds(words, index)
+        return len(tokens)
+
+    def path_bbox():
+        for d in ds:
+            gen._path_bbox(d)
+        return len(ds)
+
+    def generate(phrases):
+        def run():
+            with quiet():
+                for text in phrases:
+                    gen.generate(text, output_dir=out_dir)
+            return len(phrases)
+        return run
+
+    def batch():
+        mod = importlib.import_module('batch_generate_svgs')
+        mod._digests.clear()
+        with quiet(['batch_generate_svgs.py', '--force']):
+            mod.main()
+        return len(labels)
+
+    def build_font():
+        mod = importlib.import_module('build_font')
+        with quiet(['build_font.py', '--no-cache']):
+            mod.main()
+        return len(mod.SYLLABLES)
+
+    def compound_scan():
+        from compound_index import CompoundIndex
+
+        return len(CompoundIndex.scan(gen.WORD_SVGS_DIR))
+
+    def extract():
+        try:
+            importlib.import_module('uharfbuzz')
+        except ImportError:
+            raise Skip('uharfbuzz is not installed')
+        mod = importlib.import_module('extract_sitelen_seli_kiwen')
+        if not mod.FONT_PATH.exists():
+            raise Skip(f'{mod.FONT_PATH.name} is missing')
+        with quiet():
+            mod.main()
+        return len(mod.WORDS)
+
+    def gallery_setup():
+        if not any((scratch / 'output').glob('*.svg')):
+            with quiet(['batch_generate_svgs.py']):
+                importlib.import_module('batch_generate_svgs').main()
+
+    def gallery():
+        mod = importlib.import_module('generate_gallery')
+        with quiet():
+            mod.main()
+        return sum(1 for _ in mod.OUTPUT_DIR.glob('*.svg'))
+
+    return {
+        'parse_syllables': (nothing, parse_syllables),
+        'match_compounds': (nothing, match_compounds),
+        'path_bbox': (nothing, path_bbox),
+        'generate_short': (lambda: clear_render_caches(gen), generate(SHORT_LABELS)),
+        'generate_long': (lambda: clear_render_caches(gen), generate(LONG_LABELS)),
+        'batch': (lambda: clear_render_caches(gen), batch),
+        'build_font': (nothing, build_font),
+        'compound_scan': (nothing, compound_scan),
+        'extract': (nothing, extract),
+        'gallery': (gallery_setup, gallery),
+    }
+
+
+def time_stage(setup, run, repeat):
+    runs = []
+    items = 0
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        items = run()
+        runs.append(time.perf_counter() - start)
+    return {'best': min(runs), 'median': statistics.median(runs), 'runs': runs, 'items': items}
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Print a comparison table; return the names of regressed stages."""
+    regressed = []
+    print(f'\n  {"stage":<16} {"baseline":>10} {"current":>10} {"change":>8}')
+    for name, current in results['stages'].items():
+        base = baseline.get('stages', {}).get(name)
+        if base is None or 'best' not in current or 'best' not in base:
+            continue
+        before, after = base['best'], current['best']
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > threshold and (after - before) * 1000 > min_delta:
+            flag = '  REGRESSION'
+            regressed.append(name)
+        print(f'  {name:<16} {before * 1000:8.1f}ms {after * 1000:8.1f}ms {change:+7.1%}{flag}')
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every pipeline stage.')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', help='comma-separated subset of stages to run')
+    parser.add_argument('--output', type=Path, default=RESULTS_DIR / 'latest.json',
+                        help='where to write the results JSON')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help=f'also write the results to {BASELINE_FILE.relative_to(ROOT_DIR)}')
+    parser.add_argument('--compare', type=Path, metavar='BASELINE',
+                        help='compare against a results JSON and fail on regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'relative slowdown that counts as a regression '
+                             f'(default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help=f'ignore slowdowns smaller than this (default: {DEFAULT_MIN_DELTA_MS})')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='sitelen-bench-') as tmp:
+        scratch = Path(tmp)
+        make_tree(scratch)
+        sys.path.insert(0, str(scratch / 'scripts'))
+        stages = make_stages(scratch)
+
+        selected = list(stages)
+        if args.stages:
+            selected = [name.strip() for name in args.stages.split(',')]
+            unknown = [name for name in selected if name not in stages]
+            if unknown:
+                parser.error(f'unknown stages: {", ".join(unknown)} '
+                             f'(choose from {", ".join(stages)})')
+
+        results = {
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'stages': {},
+        }
+        for name in selected:
+            setup, run = stages[name]
+            try:
+                stage = time_stage(setup, run, args.repeat)
+            except Skip as exc:
+                results['stages'][name] = {'skipped': str(exc)}
+                print(f'  {name:<16} skipped: {exc}')
+                continue
+            results['stages'][name] = stage
+            print(f'  {name:<16} {stage["best"] * 1000:9.2f} ms best, '
+                  f'{stage["median"] * 1000:9.2f} ms median  ({stage["items"]} items)')
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    outputs = [args.output] + ([BASELINE_FILE] if args.save_baseline else [])
+    for path in outputs:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'Wrote {path}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressed = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressed:
+            print(f'\n{len(regressed)} stage(s) regressed: {", ".join(regressed)}')
+            sys.exit(1)
+        print('\nNo regressions.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Check the start-up cost of the render path against a budget.
+
+Runs `python -X importtime` in a fresh interpreter for each target, takes
+the best of --repeat runs, and fails if the cumulative import time is over
+budget or if a module that only other subcommands need (fontTools,
+uharfbuzz, numpy) gets imported along the way.
+
+  render   import generate_sitelen_kalama_pona   (what `sitelen render` loads)
+  cli      import sitelen_cli                    (dispatch only)
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 --budget-ms 80
+    python benchmarks/import_time.py --top 15
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+SCRIPTS_DIR = ROOT_DIR / 'scripts'
+
+# target -> (module, budget in ms)
+TARGETS = {
+    'render': ('generate_sitelen_kalama_pona', 60),
+    'cli': ('sitelen_cli', 15),
+}
+FORBIDDEN = ('fontTools', 'uharfbuzz', 'numpy')
+
+
+def import_times(module):
+    """{module name: (self us, cumulative us)} for one fresh import."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check import time of the render path.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float,
+                        help='override the budget of every target')
+    parser.add_argument('--top', type=int, default=0,
+                        help='also list the N slowest modules (cumulative)')
+    args = parser.parse_args()
+
+    failed = False
+    for target, (module, budget) in TARGETS.items():
+        if args.budget_ms is not None:
+            budget = args.budget_ms
+        runs = [import_times(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda times: times[module][1])
+        total = best[module][1] / 1000
+        status = 'ok' if total <= budget else 'OVER BUDGET'
+        print(f'  {target:<7} {module:<30} {total:6.1f} ms  (budget {budget:.0f} ms)  {status}')
+        failed |= total > budget
+
+        heavy = sorted({name.split('.')[0] for name in best} & set(FORBIDDEN))
+        if heavy:
+            print(f'          imports {", ".join(heavy)}')
+            failed = True
+
+        if args.top:
+            others = [item for item in best.items() if item[0] != module]
+            slowest = sorted(others, key=lambda item: -item[1][1])[:args.top]
+            for name, (_, cumulative) in slowest:
+                print(f'          {cumulative / 1000:6.1f} ms  {name}')
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
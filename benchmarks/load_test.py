@@ -0,0 +1,144 @@
+"""
+Load test for scripts/render_server.py.
+
+Opens --concurrency keep-alive connections to a running server and sends
+GET /render requests for phrases taken from data/wikidata_tok_labels.csv
+(or a few built-in ones), cycling through them, for --duration seconds.
+Reports requests/sec, latency percentiles, status codes, and how many
+bytes came back.
+
+Phrases are requested in order, so the first pass exercises rendering and
+later passes the server's response cache; use --unique to stop after one
+pass over the phrases instead.
+
+Usage:
+    python scripts/render_server.py &
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --concurrency 32 --duration 20
+    python benchmarks/load_test.py --unique --query 'minify=2'
+"""
+
+import argparse
+import asyncio
+import csv
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import quote_plus
+
+ROOT_DIR = Path(__file__).parent.parent
+LABELS_CSV = ROOT_DIR / 'data' / 'wikidata_tok_labels.csv'
+
+FALLBACK_PHRASES = [
+    'jan sewi Amatelasu', 'tomo sewi Isukusima', 'ma Nijon', 'jan Sinpo We',
+    'toki Inli', 'kulupu', 'ma tomo Tokijo', 'jan pona',
+]
+
+
+def load_phrases(limit=None):
+    phrases = []
+    if LABELS_CSV.exists():
+        with open(LABELS_CSV, encoding='utf-8', newline='') as f:
+            phrases = [row['label'] for row in csv.DictReader(f) if row['label'].strip()]
+    phrases = phrases or FALLBACK_PHRASES
+    return phrases[:limit] if limit else phrases
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+async def read_response(reader):
+    """(status, body length) of one HTTP/1.1 response."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('server closed the connection')
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status, length
+
+
+async def client(host, port, targets, deadline, stats):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                target = next(targets)
+            except StopIteration:
+                break
+            request = f'GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode('latin-1')
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, length = await read_response(reader)
+            stats['latencies'].append(time.perf_counter() - start)
+            stats['status'][status] += 1
+            stats['bytes'] += length
+    finally:
+        writer.close()
+
+
+async def run(args):
+    phrases = load_phrases(args.limit)
+    extra = f'&{args.query}' if args.query else ''
+    urls = [f'/render?text={quote_plus(p)}{extra}' for p in phrases]
+
+    def cycle():
+        while True:
+            yield from urls
+            if args.unique:
+                return
+
+    targets = cycle()
+    stats = {'latencies': [], 'status': Counter(), 'bytes': 0}
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(
+        client(args.host, args.port, targets, deadline, stats)
+        for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(stats['latencies'])
+    count = len(latencies)
+    print(f'{count} requests in {elapsed:.2f} s over {args.concurrency} connections '
+          f'({len(phrases)} distinct phrases)')
+    print(f'  throughput  {count / elapsed:8.1f} req/s, '
+          f'{stats["bytes"] / elapsed / 1024 / 1024:.1f} MiB/s')
+    for pct in (50, 90, 99):
+        print(f'  p{pct:<10} {percentile(latencies, pct) * 1000:8.2f} ms')
+    if latencies:
+        print(f'  max         {latencies[-1] * 1000:8.2f} ms')
+    print('  status      ' + ', '.join(f'{s}: {n}' for s, n in sorted(stats['status'].items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the render server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--concurrency', '-c', type=int, default=8)
+    parser.add_argument('--duration', '-d', type=float, default=10.0,
+                        help='seconds to run (default: 10)')
+    parser.add_argument('--limit', type=int, help='use only the first N phrases')
+    parser.add_argument('--unique', action='store_true',
+                        help='request each phrase once, then stop')
+    parser.add_argument('--query', default='',
+                        help='extra query parameters, e.g. "flatten=1&minify=1"')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
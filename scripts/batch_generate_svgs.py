@@ -4,26 +4,337 @@ Batch generate sitelen ilo pona SVGs for all toki pona Wikipedia titles.
 Reads wikidata_tok_labels.csv (qid, label, tok_title) and runs
 generate_sitelen_kalama_pona.generate() for each one.
 
+With --jobs N the rows are rendered by a pool of N worker processes. Rows
+are sent out in chunks; each worker keeps its glyph cache warm for its whole
+lifetime, and results come back to this process, which prints them and
+builds output_index.json in CSV order so runs stay reproducible. Files are
+written by a background I/O thread (one per process) while rendering goes on.
+
+Rebuilds are incremental: data/batch_manifest.json records, for every label,
+a hash of the input (label, output options and generator source) and the
+glyph files generate() drew it from (word and syllable SVGs and the
+cartouche), plus a content hash of every glyph file and a reverse index from
+each glyph file to the outputs that use it. On the next run only the outputs depending on a changed glyph file, or
+whose label, options or glyph list changed, are re-rendered; outputs of
+labels that left the CSV are removed.
+
 Usage:
     python batch_generate_svgs.py
+    python batch_generate_svgs.py --defs    # reuse glyphs via <defs>/<use>
+    python batch_generate_svgs.py --flatten # bake transforms into the paths
+    python batch_generate_svgs.py --minify  # shortest path data, 2 decimals
+    python batch_generate_svgs.py --jobs 8
+    python batch_generate_svgs.py --force   # ignore the manifest
+    python batch_generate_svgs.py --profile # also dump cProfile stats
+    python batch_generate_svgs.py --verbose # log every phrase's details
+
+By default only a progress line (rows done, labels/s, ETA) every few
+seconds and the summary are printed; --verbose adds each row and what
+generate() matched and loaded for it, and --quiet leaves only warnings.
+
+Every run writes a JSON report (data/batch_report.json, or --report PATH)
+with the wall time of the whole run and of planning, rendering and
+finishing, the time spent in each rendering stage (parsing, compound
+matching, syllable parsing, glyph loading, layout, serialization and file
+writes; summed over workers with --jobs), glyph and fragment cache hit
+rates, and the number of files and bytes written. --profile runs the batch
+under cProfile, writes the stats to data/batch_profile.pstats (or the given
+path; open it with pstats or snakeviz) and prints the top functions. With
+--jobs only this process is profiled, not the workers.
 """
 
+import argparse
+import cProfile
 import csv
+import hashlib
+import io
 import json
+import logging
+import os
+import pstats
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import repeat
 from pathlib import Path
+from time import perf_counter
 
-from generate_sitelen_kalama_pona import generate
+from generate_sitelen_kalama_pona import (
+    STAGES, add_stats, configure_logging, fragment_cache_info, generate, get_compound_index,
+    glyph_cache_info, glyph_dependencies, output_filename, use_utf8_stdout,
+)
+from output_writer import BackgroundWriter
+
+logger = logging.getLogger('sitelen.batch')
 
 SCRIPT_DIR = Path(__file__).parent
 ROOT_DIR = SCRIPT_DIR.parent
+OUTPUT_DIR = ROOT_DIR / 'output'
+MANIFEST_FILE = ROOT_DIR / 'data' / 'batch_manifest.json'
+REPORT_FILE = ROOT_DIR / 'data' / 'batch_report.json'
+PROFILE_FILE = ROOT_DIR / 'data' / 'batch_profile.pstats'
+MANIFEST_VERSION = 2
+
+# Source files whose contents change what generate() writes: the renderer
+# and every module of this repository it imports
+RENDER_SOURCES = [
+    SCRIPT_DIR / 'generate_sitelen_kalama_pona.py',
+    SCRIPT_DIR / 'compound_index.py',
+    SCRIPT_DIR / 'glyph_bundle.py',
+    SCRIPT_DIR / 'output_writer.py',
+    SCRIPT_DIR / 'path_geometry.py',
+]
+
+CHUNK_SIZE = 64
+PROGRESS_INTERVAL = 2.0  # seconds between progress lines
+
+_digests = {}
+
+
+def file_digest(path):
+    """sha256 of a file's contents ('missing' if absent), memoized per run."""
+    key = str(path)
+    if key not in _digests:
+        try:
+            _digests[key] = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+        except OSError:
+            _digests[key] = 'missing'
+    return _digests[key]
+
+
+def _relative(path):
+    try:
+        return Path(path).relative_to(ROOT_DIR).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def input_hash(label, options):
+    """Hash of everything except glyph assets that determines a label's output."""
+    renderer = [file_digest(f) for f in RENDER_SOURCES]
+    data = json.dumps([label, options, renderer], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def load_manifest():
+    empty = {'labels': {}, 'assets': {}, 'dependents': {}}
+    try:
+        with open(MANIFEST_FILE, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    if data.get('version') != MANIFEST_VERSION:
+        return empty
+    return data
+
+
+def save_manifest(labels):
+    """Write label entries plus glyph hashes and the glyph -> outputs index."""
+    dependents = {}
+    for entry in labels.values():
+        for dep in entry['deps']:
+            dependents.setdefault(dep, set()).add(entry['output'])
+    data = {
+        'version': MANIFEST_VERSION,
+        'labels': labels,
+        'assets': {dep: file_digest(ROOT_DIR / dep) for dep in dependents},
+        'dependents': {dep: sorted(outputs) for dep, outputs in dependents.items()},
+    }
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=None, sort_keys=True)
+
+
+def output_files(name):
+    """The SVG and its .wiki.txt sidecar."""
+    return [OUTPUT_DIR / name, OUTPUT_DIR / f'{name}.wiki.txt']
+
+
+def render_label(label, options, writer=None, stats=None):
+    """Render one label with the output options ({'defs', 'flatten',
+    'minify'}), handing its files to writer if one is given. Stage timings
+    and minification byte counts are added to stats.
+
+    Returns (output filename or None, error or None, glyph files used).
+    """
+    deps = []
+    try:
+        output_path = generate(label, use_defs=options['defs'], flatten=options['flatten'],
+                               minify=options['minify'], dependencies=deps,
+                               output_dir=OUTPUT_DIR, writer=writer, stats=stats)
+    except Exception as exc:
+        return None, str(exc), []
+    name = output_path.name if output_path else None
+    return name, None, [_relative(dep) for dep in deps]
+
+
+def make_chunks(rows, chunk_size=CHUNK_SIZE):
+    """Split rows into chunks of (row number, label) pairs.
+
+    Rows that write the same output file always share a chunk, and keep their
+    CSV order within it, so workers never race on a file and the last row
+    wins exactly as in a serial run.
+    """
+    groups = {}
+    for i, row in enumerate(rows, 1):
+        name = output_filename(row['label'])
+        groups.setdefault(name, []).append((i, row['label']))
+
+    chunks = []
+    current = []
+    for group in groups.values():
+        current.extend(group)
+        if len(current) >= chunk_size:
+            chunks.append(current)
+            current = []
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# Log lines of the row being rendered in a worker process
+_worker_log = None
+
+
+def _init_worker(level):
+    """Buffer this worker's log lines so they can be replayed in CSV order."""
+    global _worker_log
+    _worker_log = io.StringIO()
+    configure_logging(level, _worker_log)
+    get_compound_index()
+
+
+def add_writer_stats(stats, writer):
+    add_stats(stats, write_seconds=writer.write_seconds, files_written=writer.files_written,
+              bytes_written=writer.bytes_written)
+
+
+def _render_chunk(chunk, options):
+    """Worker entry point. Returns per-row results, the chunk's stage timings
+    and byte counts, and the worker's (glyph, fragment) cache stats."""
+    results = []
+    stats = {}
+    with BackgroundWriter() as writer:
+        for i, label in chunk:
+            name, error, deps = render_label(label, options, writer, stats)
+            results.append((i, name, error, deps, _worker_log.getvalue()))
+            _worker_log.seek(0)
+            _worker_log.truncate()
+    add_writer_stats(stats, writer)
+    return results, stats, os.getpid(), (glyph_cache_info(), fragment_cache_info())
+
+
+def log_row(i, total, label, error, log=''):
+    """Log a rendered row (and the lines its worker logged) at debug level."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    lines = [f'[{i}/{total}] {label}']
+    if log:
+        lines.append(log.rstrip('\n'))
+    if error:
+        lines.append(f'  ERROR: {error}')
+    logger.debug('\n'.join(lines) + '\n')
+
+
+def log_progress(done, total, failed, elapsed):
+    rate = done / elapsed if elapsed > 0 else 0.0
+    eta = (total - done) / rate if rate else 0.0
+    logger.info('  %d/%d (%.0f%%)  %.0f labels/s  %d failed  ETA %.0fs',
+                done, total, 100 * done / total, rate, failed, eta)
+
+
+def render_serial(rows, options, stats):
+    """Yield (row number, output filename, error, deps) rendering in this process."""
+    debug = logger.isEnabledFor(logging.DEBUG)
+    with BackgroundWriter() as writer:
+        for i, row in enumerate(rows, 1):
+            if debug:
+                logger.debug('[%d/%d] %s', i, len(rows), row['label'])
+            name, error, deps = render_label(row['label'], options, writer, stats)
+            if error:
+                logger.debug('  ERROR: %s', error)
+            yield i, name, error, deps
+    add_writer_stats(stats, writer)
+
+
+def render_parallel(rows, options, stats, jobs, chunk_stats):
+    """Yield (row number, output filename, error, deps) from a pool of workers.
+
+    Results are yielded as chunks complete, in chunk order. Stage timings and
+    byte counts are summed into stats, and each worker's latest (glyph,
+    fragment) cache counters are stored in chunk_stats by pid.
+    """
+    chunks = make_chunks(rows)
+    level = logging.getLogger('sitelen').getEffectiveLevel()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(level,)) as pool:
+        for results, counts, pid, cache in pool.map(_render_chunk, chunks, repeat(options)):
+            chunk_stats[pid] = cache
+            add_stats(stats, **counts)
+            for i, name, error, deps, log in results:
+                log_row(i, len(rows), rows[i - 1]['label'], error, log)
+                yield i, name, error, deps
 
 
 def main():
+    use_utf8_stdout()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    layout = parser.add_mutually_exclusive_group()
+    layout.add_argument('--defs', action='store_true',
+                        help='emit each distinct glyph once in <defs> and place it with <use>')
+    layout.add_argument('--flatten', action='store_true',
+                        help='bake transforms into absolute path coordinates')
+    parser.add_argument('--minify', type=int, nargs='?', const=2, metavar='PRECISION',
+                        help='minify path data, keeping PRECISION decimal places (default: 2)')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='number of worker processes (default: 1, render serially)')
+    parser.add_argument('--force', action='store_true',
+                        help='re-render every label even if its inputs are unchanged')
+    parser.add_argument('--report', type=Path, default=REPORT_FILE,
+                        help=f'where to write the JSON run report (default: {_relative(REPORT_FILE)})')
+    parser.add_argument('--profile', type=Path, nargs='?', const=PROFILE_FILE, metavar='FILE',
+                        help=f'run under cProfile and dump the stats to FILE '
+                             f'(default: {_relative(PROFILE_FILE)})')
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('--verbose', '-v', action='store_true',
+                           help="log every row and what was matched and loaded for it")
+    verbosity.add_argument('--quiet', '-q', action='store_true',
+                           help='only log warnings (no progress lines or summary)')
+    args = parser.parse_args()
+    configure_logging(logging.DEBUG if args.verbose
+                      else logging.WARNING if args.quiet else logging.INFO)
+
+    if args.profile is None:
+        run(args)
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(run, args)
+    finally:
+        profiler.dump_stats(args.profile)
+        logger.info('Wrote %s; top functions by cumulative time:', args.profile)
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(25)
+
+
+def cache_report(infos):
+    """Summed counters and hit rate of a list of CacheInfo tuples."""
+    hits = sum(c.hits for c in infos)
+    misses = sum(c.misses for c in infos)
+    report = {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+    }
+    if any(c.bundle_hits for c in infos):
+        report['bundle_hits'] = sum(c.bundle_hits for c in infos)
+    return report
+
+
+def run(args):
+    started = perf_counter()
+    _digests.clear()
     csv_file = ROOT_DIR / 'data' / 'wikidata_tok_labels.csv'
     if not csv_file.exists():
-        print(f'Missing {csv_file} - run fetch_wikidata_sparql.py first',
-              file=sys.stderr)
+        logger.error('Missing %s - run fetch_wikidata_sparql.py first', csv_file)
         sys.exit(1)
 
     rows = []
@@ -35,35 +346,161 @@ def main():
                 'tok_title': row.get('tok_title', ''),
             })
 
-    print(f'Generating SVGs for {len(rows)} titles...\n')
+    options = {'defs': args.defs, 'flatten': args.flatten, 'minify': args.minify}
+    manifest = load_manifest()
+    old_manifest = manifest['labels']
+
+    # Glyph files whose contents changed since the last run invalidate
+    # exactly the outputs listed for them in the reverse index.
+    stale = set()
+    changed = [dep for dep, digest in manifest['assets'].items()
+               if file_digest(ROOT_DIR / dep) != digest]
+    for dep in changed:
+        stale.update(manifest['dependents'].get(dep, []))
+    if changed:
+        logger.info('%d glyph files changed, affecting %d outputs', len(changed), len(stale))
+
+    # Then anything whose label, options or glyph list changed. Rows sharing
+    # an output file are re-rendered together so the last one still wins.
+    entries = {}  # label -> manifest entry for this run
+    for row in rows:
+        label = row['label']
+        if label in entries:
+            continue
+        entry = {
+            'input': input_hash(label, options),
+            'deps': [_relative(dep) for dep in glyph_dependencies(label)],
+            'output': output_filename(label),
+        }
+        entries[label] = entry
+        if (args.force or old_manifest.get(label) != entry
+                or not all(p.exists() for p in output_files(entry['output']))):
+            stale.add(entry['output'])
+
+    todo = [(n, row) for n, row in enumerate(rows, 1)
+            if entries[row['label']]['output'] in stale]
+    todo_rows = [row for _, row in todo]
+
+    logger.info('Generating SVGs for %d of %d titles (%d up to date)...',
+                len(todo_rows), len(rows), len(rows) - len(todo_rows))
+    planned = perf_counter()
+
+    worker_stats = {}
+    stats = {}
+    if args.jobs > 1:
+        rendered = render_parallel(todo_rows, options, stats, args.jobs, worker_stats)
+    else:
+        rendered = render_serial(todo_rows, options, stats)
+
+    results = {}
+    errors = 0
+    last_progress = planned
+    for i, name, error, deps in rendered:
+        n, row = todo[i - 1]
+        results[n] = (name, error)
+        if error:
+            errors += 1
+        else:
+            entries[row['label']]['deps'] = deps
+        now = perf_counter()
+        if now - last_progress >= PROGRESS_INTERVAL:
+            log_progress(len(results), len(todo_rows), errors, now - planned)
+            last_progress = now
+    rendering_done = perf_counter()
+    if todo_rows:
+        log_progress(len(results), len(todo_rows), errors, rendering_done - planned)
 
     success = 0
     failed = []
     index = {}  # filename -> {qid, tok_title}
+    failed_labels = set()
 
-    for i, row in enumerate(rows, 1):
-        label, qid, tok_title = row['label'], row['qid'], row['tok_title']
-        print(f'[{i}/{len(rows)}] {label}')
-        try:
-            output_path = generate(label)
-            if output_path:
-                index[output_path.name] = {'qid': qid, 'tok_title': tok_title}
-            success += 1
-        except Exception as exc:
-            print(f'  ERROR: {exc}')
-            failed.append((label, str(exc)))
-        print()
+    for n, row in enumerate(rows, 1):
+        if n in results:
+            name, error = results[n]
+        else:
+            name, error = entries[row['label']]['output'], None
+        if error:
+            failed.append((row['label'], error))
+            failed_labels.add(row['label'])
+            continue
+        if name:
+            index[name] = {'qid': row['qid'], 'tok_title': row['tok_title']}
+        success += 1
+
+    # Remove outputs of labels that are no longer in the CSV
+    current_outputs = {e['output'] for e in entries.values()}
+    removed = 0
+    for label, entry in old_manifest.items():
+        if label in entries or entry.get('output') in current_outputs:
+            continue
+        for path in output_files(entry['output']):
+            if path.exists():
+                path.unlink()
+        removed += 1
+
+    save_manifest({
+        label: entry for label, entry in entries.items()
+        if label not in failed_labels
+    })
+    logger.info('Wrote %s', MANIFEST_FILE)
 
     index_path = ROOT_DIR / 'data' / 'output_index.json'
     with open(index_path, 'w', encoding='utf-8') as f:
         json.dump(index, f, ensure_ascii=False, indent=None)
-    print(f'Wrote {index_path} ({len(index)} entries)')
+    logger.info('Wrote %s (%d entries)', index_path, len(index))
+
+    caches = list(worker_stats.values()) or [(glyph_cache_info(), fragment_cache_info())]
+    glyphs = [glyph for glyph, _ in caches]
+    hits = sum(c.hits for c in glyphs)
+    misses = sum(c.misses for c in glyphs)
+    bundle_hits = sum(c.bundle_hits for c in glyphs)
+    logger.info('Glyph cache: %d hits, %d misses (%d from bundle, %d parsed from SVG)',
+                hits, misses, bundle_hits, misses - bundle_hits)
+    fragments = [fragment for _, fragment in caches]
+    logger.info('Fragment cache: %d hits, %d misses',
+                sum(c.hits for c in fragments), sum(c.misses for c in fragments))
+    if 'path_bytes' in stats:
+        before, after = stats['path_bytes'], stats['minified_bytes']
+        logger.info('Path data: %.0f KiB -> %.0f KiB (%.0f KiB saved, %.0f%%)',
+                    before / 1024, after / 1024, (before - after) / 1024,
+                    100 * (1 - after / before))
+
+    finished = perf_counter()
+    report = {
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'options': options,
+        'jobs': args.jobs,
+        'rows': len(rows),
+        'rendered': len(results),
+        'skipped': len(rows) - len(results),
+        'succeeded': success,
+        'failed': len(failed),
+        'removed': removed,
+        'wall_seconds': {
+            'total': finished - started,
+            'plan': planned - started,
+            'render': rendering_done - planned,
+            'finish': finished - rendering_done,
+        },
+        'stage_seconds': {stage: stats.get(f'{stage}_seconds', 0.0) for stage in STAGES},
+        'caches': {'glyph': cache_report(glyphs), 'fragment': cache_report(fragments)},
+        'files_written': stats.get('files_written', 0),
+        'bytes_written': stats.get('bytes_written', 0),
+    }
+    if 'path_bytes' in stats:
+        report['path_data'] = {'bytes': stats['path_bytes'],
+                               'minified_bytes': stats['minified_bytes']}
+    args.report.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info('Wrote %s', args.report)
 
-    print(f'\nDone! {success} succeeded, {len(failed)} failed.')
+    logger.info('Done! %d succeeded, %d failed (%d rebuilt, %d skipped, %d removed).',
+                success, len(failed), len(results), len(rows) - len(results), removed)
     if failed:
-        print('\nFailed titles:')
-        for title, err in failed:
-            print(f'  {title}: {err}')
+        logger.warning('Failed titles:\n%s',
+                       '\n'.join(f'  {title}: {err}' for title, err in failed))
 
 
 if __name__ == '__main__':
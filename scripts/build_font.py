@@ -1,30 +1,84 @@
 """
 Build a downloadable .otf font from the sitelen kalama pona glyph files.
 
-Reads FontForge .glyph files from ..sfdir/ and produces
+Reads FontForge .glyph files from ..sfdir/ (see sfdir.py) and produces
 sitelen-kalama-pona.otf using fontTools.
 
 Each syllable is mapped to a Unicode PUA codepoint starting at U+E100.
 
+A second font, sitelen-kalama-pona-latin.otf ("Sitelen Kalama Pona Latin"),
+also lets syllables be typed in Latin letters: its liga feature turns each
+toki pona syllable into its glyph, splitting words the way
+parse_syllables() in generate_sitelen_kalama_pona.py does ("suna" is su-na,
+"Sinpo" is sin-po). A name in square brackets, e.g. "[Amatelasu]", is drawn
+in a cartouche. The letters themselves are blank, so a web page can show
+names from plain text with one font download:
+
+    <span style="font-family: 'Sitelen Kalama Pona Latin'">[Amatelasu]</span>
+
+The letters, space and brackets are only in the cmap of the Latin font, so
+ordinary Latin text set in the main font falls back to another font instead
+of turning blank.
+
+Builds are incremental: data/font_build_cache.json keeps, for every glyph
+file, a hash of its contents, the parsed width and contours and the compiled
+charstring. Only glyph files whose hash changed are parsed and compiled
+again; the font tables are always assembled from the full set. The cache is
+discarded when this script changes.
+
+With --skip-unchanged, a font is not rebuilt or written when its content
+hash (the compiled glyphs, widths and codepoints, this script and the
+fontTools version) matches the one recorded for it when it was last written
+and the file on disk is still the one written then. WOFF2 compression is
+by far the slowest step, so this makes no-op rebuilds close to free.
+
+The CFF outlines are optimized in two steps: each charstring is specialized
+(fontTools.cffLib.specializer picks the shortest operators, e.g. hlineto,
+vlineto and hvcurveto, and stacks the operands of consecutive segments into
+one operator), and runs of commands shared between glyphs are moved into
+global subroutines (see cff_subroutinize.py). --size-report builds the font
+with and without each step and prints the OTF and WOFF2 sizes.
+
 Usage:
     python build_font.py
+    python build_font.py --skip-unchanged
+    python build_font.py --no-cache     # parse and compile every glyph
+    python build_font.py --size-report
 """
 
-import re
+import argparse
+import hashlib
+import io
+import json
 import sys
 from pathlib import Path
 
+import fontTools
+from fontTools.cffLib.specializer import specializeProgram
 from fontTools.fontBuilder import FontBuilder
 from fontTools.misc.psCharStrings import T2CharString
 
+from cff_subroutinize import subroutinize
+from sfdir import parse_glyph
+
 SCRIPT_DIR = Path(__file__).parent
 ROOT_DIR = SCRIPT_DIR.parent
 SFDIR = ROOT_DIR / '..sfdir'
+FONTS_DIR = ROOT_DIR / 'fonts'
+OTF_PATH = FONTS_DIR / 'sitelen-kalama-pona.otf'
+WOFF2_PATH = FONTS_DIR / 'sitelen-kalama-pona.woff2'
+LATIN_OTF_PATH = FONTS_DIR / 'sitelen-kalama-pona-latin.otf'
+LATIN_WOFF2_PATH = FONTS_DIR / 'sitelen-kalama-pona-latin.woff2'
+CACHE_FILE = ROOT_DIR / 'data' / 'font_build_cache.json'
+CACHE_VERSION = 2
 
 ASCENT = 800
 DESCENT = 200
 UPM = ASCENT + DESCENT  # 1000
 
+FAMILY = 'Sitelen Kalama Pona'
+LATIN_FAMILY = 'Sitelen Kalama Pona Latin'
+
 # All toki pona syllables in order
 CONSONANTS = ['', 'm', 'n', 'p', 't', 'k', 'w', 'j', 'l', 's']
 VOWELS = ['a', 'an', 'e', 'en', 'i', 'in', 'o', 'on', 'u', 'un']
@@ -36,36 +90,18 @@ for c in CONSONANTS:
 
 PUA_BASE = 0xE100
 
-
-def parse_splineset(lines):
-    """Parse FontForge SplineSet into a list of contours.
-
-    Each contour is a list of (op, *coords) in absolute coordinates.
-    """
-    contours = []
-    current = []
-    for line in lines:
-        line = line.strip()
-        if not line or line == 'EndSplineSet':
-            break
-        tokens = line.split()
-
-        if len(tokens) >= 3 and tokens[-2] == 'm':
-            if current:
-                contours.append(current)
-                current = []
-            current.append(('m', float(tokens[0]), float(tokens[1])))
-        elif len(tokens) >= 3 and tokens[-2] == 'l':
-            current.append(('l', float(tokens[0]), float(tokens[1])))
-        elif len(tokens) >= 7 and tokens[-2] == 'c':
-            current.append(('c',
-                            float(tokens[0]), float(tokens[1]),
-                            float(tokens[2]), float(tokens[3]),
-                            float(tokens[4]), float(tokens[5])))
-
-    if current:
-        contours.append(current)
-    return contours
+# Latin input for the liga feature of the Latin font. Letters (either case)
+# and spaces are blank; "[" and "]" are the cartouche caps, and inside a
+# cartouche a zero-width bar as wide as the syllable before it
+# (cartouche.bar.<width>) is added after every syllable to draw its top and
+# bottom.
+LETTERS = 'aeiou' + 'mnptkwjls'
+LETTER_WIDTH = 500
+CARTOUCHE_CAP_WIDTH = 150
+CARTOUCHE_INSET = 50
+CARTOUCHE_STROKE = 40
+CARTOUCHE_TOP = 900
+CARTOUCHE_BOTTOM = -260
 
 
 def contours_to_charstring(contours, width):
@@ -104,26 +140,196 @@ def contours_to_charstring(contours, width):
     return cs
 
 
-def load_glyph(syllable):
-    """Load a glyph file and return (width, contours) or None."""
-    glyph_name = syllable if syllable and syllable[0] in 'mnptkwjls' else syllable
-    glyph_file = SFDIR / f'{glyph_name}.sitelen_kalama_pona.glyph'
+def glyph_file(syllable):
+    return SFDIR / f'{syllable}.sitelen_kalama_pona.glyph'
 
-    if not glyph_file.exists():
-        return None
 
-    content = glyph_file.read_text(encoding='utf-8')
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def builder_digest():
+    """Hash of this script, the glyph reader and the subroutinizer; cached
+    charstrings and fonts are only valid for them."""
+    return _digest(b''.join((SCRIPT_DIR / name).read_bytes()
+                            for name in ('build_font.py', 'sfdir.py', 'cff_subroutinize.py')))
+
+
+def load_cache():
+    empty = {'glyphs': {}, 'fonts': {}}
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    if data.get('version') != CACHE_VERSION or data.get('builder') != builder_digest():
+        return empty
+    return data
+
 
-    width_match = re.search(r'Width:\s+(\d+)', content)
-    width = int(width_match.group(1)) if width_match else 1000
+def save_cache(glyphs, fonts):
+    CACHE_FILE.parent.mkdir(exist_ok=True)
+    data = {'version': CACHE_VERSION, 'builder': builder_digest(),
+            'glyphs': glyphs, 'fonts': fonts}
+    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
 
-    spline_match = re.search(r'SplineSet\n(.*?)EndSplineSet', content, re.DOTALL)
-    if not spline_match:
+
+def compile_glyph(syllable, cached=None):
+    """Cache entry for a syllable's glyph file: its hash, width, contours and
+    compiled charstring (hex). Reuses cached when the file's hash matches.
+
+    Returns (entry, reused), or (None, False) if the file is missing or has
+    no outlines.
+    """
+    try:
+        data = glyph_file(syllable).read_bytes()
+    except OSError:
+        return None, False
+    digest = _digest(data)
+    if cached is not None and cached['hash'] == digest:
+        return cached, True
+
+    glyph = parse_glyph(data.decode('utf-8').splitlines())
+    if glyph.contours is None:
+        return None, False
+    width, contours = glyph.width, glyph.contours
+    return {
+        'hash': digest,
+        'width': width,
+        'contours': [[list(seg) for seg in contour] for contour in contours],
+        'charstring': compile_charstring(contours, width).hex(),
+    }, False
+
+
+def compile_charstring(contours, width, specialize=True):
+    """Bytecode of a glyph's charstring."""
+    charstring = contours_to_charstring(contours, width)
+    if specialize:
+        charstring.program = specializeProgram(charstring.program)
+    charstring.compile()
+    return charstring.bytecode
+
+
+def font_content_hash(glyphs, cmap, subrs=True, family=FAMILY):
+    """Hash of everything that goes into the font tables."""
+    h = hashlib.sha256()
+    h.update(builder_digest().encode())
+    h.update(fontTools.version.encode())
+    h.update(family.encode())
+    h.update(b'subrs' if subrs else b'no-subrs')
+    for glyph_name in sorted(glyphs):
+        entry = glyphs[glyph_name]
+        h.update(f'{glyph_name}:{entry["width"]}:{entry["charstring"]};'.encode())
+    h.update(json.dumps(sorted(cmap.items())).encode())
+    return h.hexdigest()
+
+
+def _rect(x0, y0, x1, y1):
+    return [('m', x0, y0), ('l', x1, y0), ('l', x1, y1), ('l', x0, y1)]
+
+
+def cartouche_bar(width):
+    """Name of the cartouche bar glyph drawn under a syllable of width."""
+    return f'cartouche.bar.{width}'
+
+
+def text_glyphs(syllable_widths=(UPM,)):
+    """Glyph entries and cmap for typing syllables in Latin letters: blank
+    letters and space, n.onset, the cartouche caps and a cartouche bar for
+    each of syllable_widths."""
+    entries = {}
+    cmap = {}
+
+    def add(glyph_name, width, contours, *codepoints):
+        entries[glyph_name] = {
+            'width': width,
+            'contours': contours,
+            'charstring': compile_charstring(contours, width).hex(),
+        }
+        for codepoint in codepoints:
+            cmap[codepoint] = glyph_name
+
+    for letter in LETTERS:
+        add(letter, LETTER_WIDTH, [], ord(letter), ord(letter.upper()))
+    add('n.onset', LETTER_WIDTH, [])
+    add('space', LETTER_WIDTH, [], ord(' '))
+
+    top, bottom = CARTOUCHE_TOP, CARTOUCHE_BOTTOM
+    stroke, cap, inset = CARTOUCHE_STROKE, CARTOUCHE_CAP_WIDTH, CARTOUCHE_INSET
+    add('cartouche.left', cap, [
+        _rect(inset, bottom, inset + stroke, top),
+        _rect(inset, top - stroke, cap, top),
+        _rect(inset, bottom, cap, bottom + stroke),
+    ], ord('['))
+    add('cartouche.right', cap, [
+        _rect(cap - inset - stroke, bottom, cap - inset, top),
+        _rect(0, top - stroke, cap - inset, top),
+        _rect(0, bottom, cap - inset, bottom + stroke),
+    ], ord(']'))
+    for width in sorted(set(syllable_widths)):
+        add(cartouche_bar(width), 0, [
+            _rect(-width, top - stroke, 0, top),
+            _rect(-width, bottom, 0, bottom + stroke),
+        ])
+    return entries, cmap
+
+
+def feature_text(glyphs):
+    """OpenType feature file source for the liga feature over the syllable
+    glyphs (skp.*) in glyphs, a dict of entries by glyph name; None if glyphs
+    lacks the Latin input glyphs (see text_glyphs())."""
+    syllables = sorted(name[len('skp.'):] for name in glyphs if name.startswith('skp.'))
+    bars = {s: cartouche_bar(glyphs[f'skp.{s}']['width']) for s in syllables}
+    needed = {*LETTERS, 'n.onset', 'cartouche.left', 'cartouche.right', *bars.values()}
+    if not syllables or not needed <= glyphs.keys():
         return None
 
-    spline_lines = spline_match.group(1).strip().split('\n')
-    contours = parse_splineset(spline_lines)
-    return width, contours
+    def letters(syllable):
+        names = list(syllable)
+        if len(names) > 1 and names[0] == 'n':
+            names[0] = 'n.onset'
+        return ' '.join(names)
+
+    lines = [
+        'languagesystem DFLT dflt;',
+        'languagesystem latn dflt;',
+        '',
+        f'@vowel = [{" ".join(sorted(set("aeiou") & glyphs.keys()))}];',
+        f'@syllable = [{" ".join(f"skp.{s}" for s in syllables)}];',
+        f'@bar = [{" ".join(sorted(set(bars.values())))}];',
+        '',
+        '# n before a vowel starts the next syllable (su-na), otherwise it',
+        '# ends the current one (sin-po)',
+        'lookup onset {',
+        "    sub n' @vowel by n.onset;",
+        '} onset;',
+        '',
+        'lookup syllables {',
+        *(f'    sub {letters(s)} by skp.{s};' for s in syllables if len(s) > 1),
+        '} syllables;',
+        '',
+        'lookup vowels {',
+        *(f'    sub {s} by skp.{s};' for s in syllables if len(s) == 1),
+        '} vowels;',
+        '',
+        'lookup cartouche_bar {',
+        *(f'    sub skp.{s} by skp.{s} {bars[s]};' for s in syllables),
+        '} cartouche_bar;',
+        '',
+        '# A syllable right after the left cap or a bar is inside the cartouche',
+        'lookup cartouche {',
+        "    sub [cartouche.left @bar] @syllable' lookup cartouche_bar;",
+        '} cartouche;',
+        '',
+        'feature liga {',
+        '    lookup onset;',
+        '    lookup syllables;',
+        '    lookup vowels;',
+        '    lookup cartouche;',
+        '} liga;',
+    ]
+    return '\n'.join(lines) + '\n'
 
 
 def make_notdef_charstring():
@@ -140,47 +346,44 @@ def make_notdef_charstring():
     return cs
 
 
-def main():
-    print('Building sitelen kalama pona font...')
-
-    glyph_data = {}
-    cmap = {}
-
-    for i, syllable in enumerate(SYLLABLES):
-        glyph_name = f'skp.{syllable}'
-        result = load_glyph(syllable)
-        if result is None:
-            print(f'  Skipping {syllable} (no glyph file)')
-            continue
-        glyph_data[glyph_name] = result
-        cmap[PUA_BASE + i] = glyph_name
-        print(f'  Loaded {syllable} -> U+{PUA_BASE + i:04X}')
-
-    if not glyph_data:
-        print('No glyphs loaded!', file=sys.stderr)
-        sys.exit(1)
-
-    glyph_order = ['.notdef'] + sorted(glyph_data.keys())
+def build_font(glyphs, cmap, subrs=True, family=FAMILY):
+    """Assemble the font (a TTFont) from compiled glyph entries by glyph
+    name, moving shared outline parts into subroutines if subrs is set. The
+    liga feature is only added if glyphs has the text_glyphs() entries."""
+    glyph_order = ['.notdef'] + sorted(glyphs.keys())
 
     fb = FontBuilder(UPM, isTTF=False)
     fb.setupGlyphOrder(glyph_order)
     fb.setupCharacterMap(cmap)
 
-    # Build charstrings
     charstrings = {'.notdef': make_notdef_charstring()}
-    for glyph_name, (width, contours) in glyph_data.items():
-        charstrings[glyph_name] = contours_to_charstring(contours, width)
+    subr_programs = []
+    if subrs:
+        programs = {}
+        for glyph_name, entry in glyphs.items():
+            charstring = T2CharString(bytecode=bytes.fromhex(entry['charstring']))
+            charstring.decompile()
+            programs[glyph_name] = charstring.program
+        programs, subr_programs = subroutinize(programs)
+        for glyph_name, program in programs.items():
+            charstrings[glyph_name] = T2CharString(program=program)
+    else:
+        for glyph_name, entry in glyphs.items():
+            charstrings[glyph_name] = T2CharString(bytecode=bytes.fromhex(entry['charstring']))
 
     fb.setupCFF(
-        'SitelenKalamaPona-Regular',
-        {'FullName': 'Sitelen Kalama Pona', 'FamilyName': 'Sitelen Kalama Pona'},
+        f'{family.replace(" ", "")}-Regular',
+        {'FullName': family, 'FamilyName': family},
         charstrings,
         {},
     )
+    global_subrs = fb.font['CFF '].cff.GlobalSubrs
+    for program in subr_programs:
+        global_subrs.append(T2CharString(program=program, globalSubrs=global_subrs))
 
     metrics = {'.notdef': (500, 0)}
-    for glyph_name, (width, _) in glyph_data.items():
-        metrics[glyph_name] = (width, 0)
+    for glyph_name, entry in glyphs.items():
+        metrics[glyph_name] = (entry['width'], 0)
 
     fb.setupHorizontalMetrics(metrics)
     fb.setupHorizontalHeader(ascent=ASCENT, descent=-DESCENT)
@@ -195,28 +398,134 @@ def main():
         fsType=0,
     )
     fb.setupNameTable({
-        'familyName': 'Sitelen Kalama Pona',
+        'familyName': family,
         'styleName': 'Regular',
     })
     fb.setupPost()
+    features = feature_text(glyphs)
+    if features is not None:
+        fb.addOpenTypeFeatures(features)
+    return fb.font
+
+
+def font_bytes(font, flavor=None):
+    font.flavor = flavor
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue()
+
+
+def size_report(glyphs, cmap):
+    """Print the OTF and WOFF2 sizes of the font built without and with
+    charstring specialization and subroutinization."""
+    plain = {}
+    for glyph_name, entry in glyphs.items():
+        contours = [[tuple(seg) for seg in contour] for contour in entry['contours']]
+        plain[glyph_name] = dict(entry, charstring=compile_charstring(
+            contours, entry['width'], specialize=False).hex())
+    variants = [
+        ('unoptimized', plain, False),
+        ('specialized', glyphs, False),
+        ('specialized + subroutines', glyphs, True),
+    ]
 
-    otf_path = ROOT_DIR / 'fonts' / 'sitelen-kalama-pona.otf'
-    fb.font.save(str(otf_path))
-    print(f'\nWrote {otf_path}')
+    print('\nSize report:')
+    print(f'  {"":<27}{"CFF":>9}{"OTF":>9}{"WOFF2":>9}')
+    rows = []
+    woff2 = True
+    for label, variant, subrs in variants:
+        font = build_font(variant, cmap, subrs)
+        sizes = [len(font.getTableData('CFF ')), len(font_bytes(font)), None]
+        if woff2:
+            try:
+                sizes[2] = len(font_bytes(font, 'woff2'))
+            except Exception:
+                woff2 = False
+        rows.append(sizes)
+        cells = ''.join(f'{size:>9}' if size is not None else f'{"n/a":>9}' for size in sizes)
+        print(f'  {label:<27}{cells}')
+    for name, before, after in zip(('CFF', 'OTF', 'WOFF2'), rows[0], rows[-1]):
+        if before and after is not None:
+            print(f'  {name}: {before} -> {after} bytes ({(after - before) / before:+.1%})')
 
-    # Also save as woff2
-    try:
-        fb.font.flavor = 'woff2'
-        woff2_path = ROOT_DIR / 'fonts' / 'sitelen-kalama-pona.woff2'
-        fb.font.save(str(woff2_path))
-        print(f'Wrote {woff2_path}')
-    except Exception as exc:
-        print(f'WOFF2 export skipped: {exc}')
-
-    print(f'\nCodepoint mapping ({len(glyph_data)} syllables):')
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the sitelen kalama pona OTF and WOFF2.')
+    parser.add_argument('--skip-unchanged', action='store_true',
+                        help='do not rebuild fonts whose content hash is unchanged')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='ignore data/font_build_cache.json and compile every glyph')
+    parser.add_argument('--no-subroutinize', dest='subrs', action='store_false',
+                        help='do not move shared outline parts into subroutines')
+    parser.add_argument('--size-report', action='store_true',
+                        help='print font sizes with and without the CFF optimizations')
+    args = parser.parse_args()
+
+    print('Building sitelen kalama pona font...')
+    cache = {'glyphs': {}, 'fonts': {}} if args.no_cache else load_cache()
+
+    glyphs = {}
+    cmap = {}
+    reused = 0
+    for i, syllable in enumerate(SYLLABLES):
+        glyph_name = f'skp.{syllable}'
+        entry, from_cache = compile_glyph(syllable, cache['glyphs'].get(syllable))
+        if entry is None:
+            print(f'  Skipping {syllable} (no glyph file)')
+            continue
+        glyphs[glyph_name] = entry
+        cmap[PUA_BASE + i] = glyph_name
+        reused += from_cache
+        print(f'  {"Cached" if from_cache else "Loaded"} {syllable} -> U+{PUA_BASE + i:04X}')
+
+    if not glyphs:
+        print('No glyphs loaded!', file=sys.stderr)
+        sys.exit(1)
+    print(f'\n{len(glyphs) - reused} glyphs compiled, {reused} reused from cache')
+    syllable_count = len(glyphs)
+    text, text_cmap = text_glyphs(entry['width'] for entry in glyphs.values())
+    latin_glyphs = {**glyphs, **text}
+    latin_cmap = {**cmap, **text_cmap}
+
+    fonts = dict(cache['fonts'])
+    variants = [
+        (FAMILY, glyphs, cmap, ((OTF_PATH, None), (WOFF2_PATH, 'woff2'))),
+        (LATIN_FAMILY, latin_glyphs, latin_cmap,
+         ((LATIN_OTF_PATH, None), (LATIN_WOFF2_PATH, 'woff2'))),
+    ]
+    for family, variant_glyphs, variant_cmap, paths in variants:
+        content = font_content_hash(variant_glyphs, variant_cmap, args.subrs, family)
+        font = None
+        for path, flavor in paths:
+            key = path.relative_to(ROOT_DIR).as_posix()
+            recorded = fonts.get(key)
+            if (args.skip_unchanged and recorded and recorded['content'] == content
+                    and path.exists() and _digest(path.read_bytes()) == recorded['file']):
+                print(f'Unchanged {path}')
+                continue
+            if font is None:
+                font = build_font(variant_glyphs, variant_cmap, args.subrs, family)
+            try:
+                data = font_bytes(font, flavor)
+            except Exception as exc:
+                if flavor is None:
+                    raise
+                print(f'WOFF2 export skipped: {exc}')
+                continue
+            path.parent.mkdir(exist_ok=True)
+            path.write_bytes(data)
+            fonts[key] = {'content': content, 'file': _digest(data)}
+            print(f'Wrote {path}')
+
+    save_cache({syl: glyphs[f'skp.{syl}'] for syl in SYLLABLES if f'skp.{syl}' in glyphs},
+               fonts)
+    if args.size_report:
+        size_report(glyphs, cmap)
+
+    print(f'\nCodepoint mapping ({syllable_count} syllables):')
     for i, syllable in enumerate(SYLLABLES):
         glyph_name = f'skp.{syllable}'
-        if glyph_name in glyph_data:
+        if glyph_name in glyphs:
             print(f'  U+{PUA_BASE + i:04X}  {syllable}')
 
 
@@ -0,0 +1,197 @@
+"""
+Extract shared subroutines from a set of Type 2 charstring programs.
+
+The syllable glyphs are built from a handful of consonant and vowel shapes,
+and since charstrings use relative coordinates, a shape drawn at a different
+position is still the same run of operators and operands after its initial
+moveto. subroutinize() finds such runs across all glyphs and moves them into
+global subroutines (called with callgsubr), greedily taking whichever run
+saves the most bytes until no run is worth a subroutine.
+
+Programs are split into commands (operands followed by their operator) and
+only whole commands are shared, so the operand stack is always empty at a
+call. A glyph's first command, which carries the advance width, and the final
+endchar are never moved. Subroutines do not call other subroutines.
+
+This is a small stand-in for what cffsubr (the AFDKO subroutinizer) does;
+it needs nothing besides fontTools.
+
+Usage:
+    programs, subrs = subroutinize({'skp.ka': [...], 'skp.ma': [...]})
+"""
+
+import heapq
+from collections import defaultdict
+
+from fontTools.misc.psCharStrings import encodeIntT2, encodeFixed
+
+# Longest run of commands considered for a subroutine
+MAX_RUN = 64
+
+_CALL = 'callgsubr'
+
+
+def _token_size(token):
+    if isinstance(token, str):
+        return 2 if token in ('hflex', 'flex', 'hflex1', 'flex1') else 1
+    if isinstance(token, float) and not token.is_integer():
+        return len(encodeFixed(token))
+    return len(encodeIntT2(int(token)))
+
+
+def _bias(count):
+    if count < 1240:
+        return 107
+    if count < 33900:
+        return 1131
+    return 32768
+
+
+def split_commands(program):
+    """Split a program into tuples of operands followed by their operator."""
+    commands = []
+    start = 0
+    for i, token in enumerate(program):
+        if isinstance(token, str):
+            commands.append(tuple(program[start:i + 1]))
+            start = i + 1
+    if start != len(program):
+        raise ValueError('program does not end with an operator')
+    return commands
+
+
+def _glyph_runs(commands, endchar):
+    """{run: occurrences} of every run of movable commands in one glyph,
+    counting only non-overlapping occurrences.
+
+    Commands are numbered (see subroutinize()) and calls are negative.
+    """
+    counts = defaultdict(int)
+    last_end = {}
+    end = len(commands)
+    if end and commands[-1] == endchar:
+        end -= 1
+    for i in range(1, end):
+        if commands[i] < 0:
+            continue
+        for j in range(i + 1, min(i + MAX_RUN, end) + 1):
+            if commands[j - 1] < 0:
+                break
+            run = tuple(commands[i:j])
+            if last_end.get(run, 0) > i:
+                continue
+            last_end[run] = j
+            counts[run] += 1
+    return counts
+
+
+def _replace(commands, run, call):
+    out = []
+    i = 0
+    n = len(run)
+    while i < len(commands):
+        if i > 0 and tuple(commands[i:i + n]) == run:
+            out.append(call)
+            i += n
+        else:
+            out.append(commands[i])
+            i += 1
+    return out
+
+
+def subroutinize(programs):
+    """Move shared command runs of the programs into global subroutines.
+
+    programs maps glyph names to Type 2 programs (lists of operands and
+    operator names, as in T2CharString.program). Returns (programs, subrs):
+    the rewritten programs by glyph name and the subroutine programs in
+    GlobalSubrs order.
+    """
+    names = list(programs)
+    # Number the distinct commands so that runs are tuples of ints
+    numbers = {}
+    table = []
+    glyphs = []
+    for name in names:
+        commands = []
+        for command in split_commands(programs[name]):
+            if command not in numbers:
+                numbers[command] = len(table)
+                table.append(command)
+            commands.append(numbers[command])
+        glyphs.append(commands)
+    sizes = {n: sum(_token_size(token) for token in command)
+             for n, command in enumerate(table)}
+    endchar = numbers.get(('endchar',))
+
+    # Occurrences of every run, kept per glyph so that only the glyphs a new
+    # subroutine is taken from need to be scanned again
+    per_glyph = [_glyph_runs(commands, endchar) for commands in glyphs]
+    counts = defaultdict(int)
+    for glyph_counts in per_glyph:
+        for run, count in glyph_counts.items():
+            counts[run] += count
+
+    # Assume a two-byte index operand; the final ordering by use makes most
+    # calls cheaper than this.
+    call_cost = 3
+
+    def saving(run):
+        # Each use shrinks by size - call_cost; the subroutine costs its body,
+        # a return and an offset in the GlobalSubrs INDEX.
+        size = sum(sizes[c] for c in run)
+        return counts[run] * (size - call_cost) - (size + 1 + 2)
+
+    # Max-heap of (-saving, run); entries go stale when counts change and are
+    # checked against the current saving when popped.
+    heap = [(-saving(run), run) for run, count in counts.items() if count > 1]
+    heapq.heapify(heap)
+
+    runs = []
+    while heap:
+        negative, run = heapq.heappop(heap)
+        current = saving(run) if counts[run] > 1 else 0
+        if current != -negative:
+            if current > 0:
+                heapq.heappush(heap, (-current, run))
+            continue
+        if current <= 0:
+            break
+
+        call = -1 - len(runs)
+        runs.append(run)
+        for g, commands in enumerate(glyphs):
+            if per_glyph[g].get(run):
+                glyphs[g] = _replace(commands, run, call)
+                changed = set(per_glyph[g])
+                for old, count in per_glyph[g].items():
+                    counts[old] -= count
+                per_glyph[g] = _glyph_runs(glyphs[g], endchar)
+                for new, count in per_glyph[g].items():
+                    counts[new] += count
+                changed.update(per_glyph[g])
+                for other in changed:
+                    if counts[other] > 1 and other != run:
+                        heapq.heappush(heap, (-saving(other), other))
+
+    # Number the most used subroutines first so they get the shortest indices
+    uses = [0] * len(runs)
+    for commands in glyphs:
+        for command in commands:
+            if command < 0:
+                uses[-1 - command] += 1
+    order = sorted(range(len(runs)), key=lambda k: -uses[k])
+    number = {k: n for n, k in enumerate(order)}
+    bias = _bias(len(runs))
+
+    def flatten(commands):
+        program = []
+        for command in commands:
+            if command < 0:
+                program += [number[-1 - command] - bias, _CALL]
+            else:
+                program += table[command]
+        return program
+
+    subrs = [flatten(runs[k]) + ['return'] for k in order]
+    return {name: flatten(commands) for name, commands in zip(names, glyphs)}, subrs
@@ -0,0 +1,124 @@
+"""
+Token trie over the compound word glyphs in sitelen_seli_kiwen_svgs/.
+
+Compound SVGs are named with hyphens ('Sitelen seli kiwen - jan-sewi.svg').
+The index splits each name into tokens and stores them in a trie, so a
+phrase can be matched against every compound in a single left-to-right
+pass with longest-match semantics, whatever the compound length.
+
+The index can be persisted to data/compound_index.json so that a process
+doesn't need to glob the whole directory; the file records the directory
+mtime it was built from and is ignored once that no longer matches.
+
+Usage:
+    python compound_index.py
+"""
+
+import json
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+ROOT_DIR = SCRIPT_DIR.parent
+WORD_SVGS_DIR = ROOT_DIR / 'sitelen_seli_kiwen_svgs'
+INDEX_FILE = ROOT_DIR / 'data' / 'compound_index.json'
+
+PREFIX = 'Sitelen seli kiwen - '
+COMPOUND_GLOB = f'{PREFIX}*-*.svg'
+
+# Trie key marking the end of a compound; never a real token.
+_END = None
+
+
+class CompoundIndex:
+    """Token trie over hyphenated compound names."""
+
+    def __init__(self, names=()):
+        self._root = {}
+        self._names = set()
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        node = self._root
+        for token in name.split('-'):
+            node = node.setdefault(token, {})
+        node[_END] = name
+        self._names.add(name)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self):
+        return iter(sorted(self._names))
+
+    def match(self, word_tokens):
+        """Replace runs of tokens with the longest compound starting there.
+
+        e.g. ['jan', 'sewi', 'pona'] -> ['jan-sewi', 'pona']
+        """
+        result = []
+        i = 0
+        n = len(word_tokens)
+        while i < n:
+            node = self._root
+            best = None
+            best_end = i + 1
+            j = i
+            while j < n:
+                node = node.get(word_tokens[j])
+                if node is None:
+                    break
+                j += 1
+                name = node.get(_END)
+                if name is not None and j - i > 1:
+                    best, best_end = name, j
+            result.append(best if best is not None else word_tokens[i])
+            i = best_end
+        return result
+
+    @classmethod
+    def scan(cls, words_dir=WORD_SVGS_DIR):
+        """Build the index by globbing words_dir for compound SVGs."""
+        return cls(f.stem[len(PREFIX):] for f in Path(words_dir).glob(COMPOUND_GLOB))
+
+    def save(self, index_file=INDEX_FILE, words_dir=WORD_SVGS_DIR):
+        data = {
+            'source_mtime_ns': Path(words_dir).stat().st_mtime_ns,
+            'compounds': list(self),
+        }
+        with open(index_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=None)
+
+    @classmethod
+    def load(cls, index_file=INDEX_FILE, words_dir=WORD_SVGS_DIR):
+        """Load a persisted index, or return None if it is missing or stale."""
+        try:
+            with open(index_file, encoding='utf-8') as f:
+                data = json.load(f)
+            current_mtime = Path(words_dir).stat().st_mtime_ns
+        except (OSError, ValueError):
+            return None
+        if data.get('source_mtime_ns') != current_mtime:
+            return None
+        return cls(data.get('compounds', []))
+
+    @classmethod
+    def load_or_scan(cls, words_dir=WORD_SVGS_DIR, index_file=INDEX_FILE):
+        index = cls.load(index_file, words_dir)
+        if index is None:
+            index = cls.scan(words_dir)
+        return index
+
+
+def main():
+    index = CompoundIndex.scan(WORD_SVGS_DIR)
+    INDEX_FILE.parent.mkdir(exist_ok=True)
+    index.save(INDEX_FILE, WORD_SVGS_DIR)
+    print(f'Wrote {INDEX_FILE} ({len(index)} compounds)')
+
+
+if __name__ == '__main__':
+    main()
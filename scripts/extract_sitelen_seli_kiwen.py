@@ -1,6 +1,7 @@
 """Extract all glyphs from sitelen-seli-kiwen.woff2 into individual SVG files.
 
-Uses uharfbuzz to discover compound word glyphs via ZWJ shaping.
+Uses uharfbuzz to discover compound word glyphs via ZWJ shaping (imported
+only for that step).
 Outputs files named to match Wikimedia Commons conventions:
   - Individual: 'Sitelen seli kiwen - jan.svg'
   - Compound:   'Sitelen seli kiwen - jan-sewi.svg'
@@ -9,9 +10,6 @@ import sys, io, os, tempfile
 from pathlib import Path
 from fontTools.ttLib import TTFont
 from fontTools.pens.svgPathPen import SVGPathPen
-import uharfbuzz as hb
-
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 SCRIPT_DIR = Path(__file__).parent
 ROOT_DIR = SCRIPT_DIR.parent
@@ -86,6 +84,8 @@ def extract_glyph_svg_by_name(font, glyph_set, glyph_name):
 
 def find_compounds_via_harfbuzz(font_path, ttfont):
     """Use harfbuzz to find all 2-word ZWJ compounds."""
+    import uharfbuzz as hb
+
     # Save as TTF for harfbuzz (it can't read WOFF2 cmap properly)
     tmp = tempfile.NamedTemporaryFile(suffix='.ttf', delete=False)
     tmp_path = tmp.name
@@ -122,6 +122,7 @@ def find_compounds_via_harfbuzz(font_path, ttfont):
 
 
 def main():
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     OUTPUT_DIR.mkdir(exist_ok=True)
 
     font = TTFont(str(FONT_PATH))
@@ -6,27 +6,59 @@ and generates an SVG combining word symbols and sound symbols.
 
 Uses pre-extracted SVGs from sitelen_seli_kiwen_svgs/ and uniform_syllables/.
 
+layout() places the glyphs and returns a RenderResult; to_svg() and
+to_sidecar() serialize it, render() goes straight to SVG bytes, and
+generate() does all of that and writes the files to output/. These use
+DEFAULT_RENDERER; create a Renderer for other glyph directories, another
+cartouche or different layout settings. A Renderer can be shared between
+threads.
+
 Usage:
     python generate_sitelen_kalama_pona.py "jan sewi Amatelasu"
     python generate_sitelen_kalama_pona.py "tomo sewi Isukusima"
+    python generate_sitelen_kalama_pona.py --defs "jan sewi Amatelasu"
+    python generate_sitelen_kalama_pona.py --flatten "jan sewi Amatelasu"
+    python generate_sitelen_kalama_pona.py --minify 1 "jan sewi Amatelasu"
+    python generate_sitelen_kalama_pona.py -q "jan sewi Amatelasu"   # just the path
+    python generate_sitelen_kalama_pona.py --stdin < phrases.txt > results.ndjson
+    python generate_sitelen_kalama_pona.py --stdin --inline < records.ndjson
+
+With --stdin, each input line is either a plain phrase or a JSON record
+with a "label" (and optionally "qid"). One JSON object is written to
+stdout per line, in input order: the record's qid and label plus the
+"output" path written (or, with --inline, the "svg" itself and no files),
+"width", or an "error" (with the raw "input" line if it could not be
+parsed). Glyphs and caches stay warm for the whole stream.
 """
 
+import json
 import sys
 import io
+import os
 import re
+import threading
 import xml.etree.ElementTree as ET
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
 from pathlib import Path
+from time import perf_counter
+from types import MappingProxyType
 
-if sys.stdout and hasattr(sys.stdout, 'buffer'):
-    try:
-        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    except Exception:
-        pass
+from compound_index import CompoundIndex
+from output_writer import write_files
+from path_geometry import (
+    format_segments, minify_path, multiply, parse_transform, path_bbox, transform_segments,
+    union_bbox,
+)
 
 SCRIPT_DIR = Path(__file__).parent
 ROOT_DIR = SCRIPT_DIR.parent
 SYLLABLES_DIR = ROOT_DIR / 'uniform_syllables'
 WORD_SVGS_DIR = ROOT_DIR / 'sitelen_seli_kiwen_svgs'
+COMPOUND_INDEX_FILE = ROOT_DIR / 'data' / 'compound_index.json'
+# Written by glyph_bundle.py
+BUNDLE_FILE = ROOT_DIR / 'data' / 'glyph_bundle.bin'
+OUTPUT_DIR = ROOT_DIR / 'output'
 
 # Special Commons filenames that don't follow the standard pattern
 SPECIAL_COMMONS = {
@@ -37,226 +69,270 @@ CONSONANTS = set('mnptkwjls')
 TARGET_HEIGHT = 1000
 SPACING = 80
 CARTOUCHE_SVG = ROOT_DIR / 'Jan_Sinpo_We_(Jimbo_Wales_in_Sitelen_Pona).svg'
+CARTOUCHE_LABELS = ('left', 'center', 'right')
+# Decimal places kept for coordinates in flattened output (output units are
+# 1/TARGET_HEIGHT of the image height)
+FLATTEN_PRECISION = 1
 
 
-def get_available_compounds():
-    """Scan sitelen_seli_kiwen_svgs/ for compound SVG files (those with hyphens)."""
-    compounds = set()
-    for f in WORD_SVGS_DIR.glob('Sitelen seli kiwen - *-*.svg'):
-        name = f.stem.replace('Sitelen seli kiwen - ', '')
-        compounds.add(name)
-    return compounds
+SVG_NS = 'http://www.w3.org/2000/svg'
+INKSCAPE_NS = 'http://www.inkscape.org/namespaces/inkscape'
 
+# Enough for every word, compound and syllable SVG plus the cartouche.
+GLYPH_CACHE_SIZE = 1024
+# Serialized word runs and cartouche blocks kept for reuse
+FRAGMENT_CACHE_SIZE = 512
 
-def read_svg_paths(svg_file):
-    """Read path data and viewBox from an SVG file. Returns (paths, viewBox)."""
-    if not svg_file.exists():
-        return None, None
+# logging, argparse and glyph_bundle are imported where they are used, so
+# that importing this module (the render path) stays cheap; see
+# benchmarks/import_time.py.
+LOGGER_NAME = 'sitelen.render'
+
+GlyphEntry = namedtuple(
+    'GlyphEntry', 'stamp paths labeled_paths viewbox bbox label_bboxes'
+)
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize bundle_hits')
+
+
+def _is_flipped(transform):
+    """True for font-extracted paths carrying transform="scale(1,-1)"."""
+    return 'scale(1,-1)' in transform.replace(' ', '')
+
+
+def glyph_path(d, transform, flip):
+    """A cached glyph path: a read-only {'d', 'transform', 'flip'} mapping,
+    so that no caller can change it for every later render."""
+    return MappingProxyType({'d': d, 'transform': transform, 'flip': flip})
 
-    tree = ET.parse(str(svg_file))
-    root = tree.getroot()
-    ns = {'svg': 'http://www.w3.org/2000/svg'}
+
+def _parse_glyph_svg(svg_file, stamp, with_bboxes=True):
+    """Parse an SVG file once into a GlyphEntry.
+
+    `paths` follows read_svg_paths (namespaced <path> elements, falling back
+    to bare ones); `labeled_paths` keeps every path with its inkscape:label
+    for read_svg_paths_by_label, and `label_bboxes` holds the bbox of each
+    label's paths. Paths are glyph_path() mappings in tuples, so entries are
+    immutable. Without with_bboxes the bbox fields are left as None and
+    {} for the caller to fill in (the bundle builder does them in a batch).
+    """
+    root = ET.parse(str(svg_file)).getroot()
 
     viewBox = root.get('viewBox', '0 0 1000 1000')
-    vb = [float(x) for x in viewBox.split()]
+    vb = tuple(float(x) for x in viewBox.split())
+
+    def collect(path_els):
+        found = []
+        for path_el in path_els:
+            d = path_el.get('d')
+            if not d:
+                continue
+            transform = path_el.get('transform', '')
+            label = path_el.get(f'{{{INKSCAPE_NS}}}label')
+            found.append((label, glyph_path(d, transform, _is_flipped(transform))))
+        return tuple(found)
+
+    ns_paths = collect(root.iter(f'{{{SVG_NS}}}path'))
+    bare_paths = collect(root.iter('path'))
+    labeled_paths = ns_paths + bare_paths
+
+    by_label = {}
+    for label, path in labeled_paths:
+        if label is not None:
+            by_label.setdefault(label, []).append(path)
+
+    paths = tuple(p for _, p in (ns_paths or bare_paths))
+    if not with_bboxes:
+        return GlyphEntry(stamp, paths, labeled_paths, vb, None, {})
+    return GlyphEntry(
+        stamp=stamp,
+        paths=paths,
+        labeled_paths=labeled_paths,
+        viewbox=vb,
+        bbox=_paths_bbox(paths),
+        label_bboxes={label: _paths_bbox(ps) for label, ps in by_label.items()},
+    )
+
+
+class GlyphCache:
+    """Bounded LRU cache of parsed glyph SVGs, keyed by file path.
+
+    Entries are revalidated against the file's mtime and size on every
+    lookup, so edited SVGs are re-parsed without restarting the process.
+    On a miss the precompiled glyph bundle is consulted before parsing; its
+    paths are relative to bundle_root.
+    """
 
-    path_els = root.findall('.//svg:path', ns)
-    if not path_els:
-        path_els = root.findall('.//path')
-    if not path_els:
-        return None, None
+    def __init__(self, maxsize=GLYPH_CACHE_SIZE, bundle_file=None, bundle_root=ROOT_DIR):
+        self.maxsize = maxsize
+        self.bundle_file = bundle_file
+        self.bundle_root = bundle_root
+        self.hits = 0
+        self.misses = 0
+        self.bundle_hits = 0
+        self._entries = OrderedDict()
+        self._bundle = None
+        self._bundle_loaded = False
+        self._lock = threading.Lock()
+
+    def bundle(self):
+        """The GlyphBundle backing this cache, loaded on first use, or None."""
+        with self._lock:
+            if not self._bundle_loaded:
+                self._bundle_loaded = True
+                if self.bundle_file is not None and os.path.exists(self.bundle_file):
+                    from glyph_bundle import GlyphBundle
+                    self._bundle = GlyphBundle.open(self.bundle_file, self.bundle_root)
+            return self._bundle
+
+    def get(self, svg_file):
+        """Return the GlyphEntry for svg_file, or None if it does not exist."""
+        key = str(svg_file)
+        try:
+            st = os.stat(key)
+        except OSError:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stamp == stamp:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry
+            self.misses += 1
+
+        # Decode outside the lock; two threads missing on the same file at
+        # once both parse it and the second result wins, which is harmless.
+        entry = None
+        bundle = self.bundle()
+        if bundle is not None:
+            parts = bundle.lookup(key, stamp, glyph_path)
+            if parts is not None:
+                entry = GlyphEntry(stamp, *parts)
+        from_bundle = entry is not None
+        if entry is None:
+            entry = _parse_glyph_svg(key, stamp)
+
+        with self._lock:
+            if from_bundle:
+                self.bundle_hits += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.maxsize, len(self._entries), self.bundle_hits
+            )
 
-    paths = []
-    for path_el in path_els:
-        d = path_el.get('d')
-        if not d:
-            continue
-        transform = path_el.get('transform', '')
-        paths.append({'d': d, 'transform': transform})
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.bundle_hits = 0
 
-    if not paths:
-        return None, None
 
-    return paths, vb
+GLYPH_CACHE = GlyphCache(bundle_file=BUNDLE_FILE)
+
+
+def glyph_cache_info():
+    """Hit/miss counters for the process-wide glyph cache."""
+    return GLYPH_CACHE.info()
+
+
+def clear_glyph_cache():
+    GLYPH_CACHE.clear()
+
+
+def read_svg_paths(svg_file):
+    """Read path data and viewBox from an SVG file. Returns (paths, viewBox)
+    as tuples; the paths are read-only (see glyph_path())."""
+    return DEFAULT_RENDERER.read_svg_paths(svg_file)
 
 
 def read_svg_paths_by_label(svg_file, labels):
     """Read path data by inkscape:label. Returns (paths_by_label, viewBox)."""
-    if not svg_file.exists():
+    entry = GLYPH_CACHE.get(svg_file)
+    if entry is None:
         return None, None
 
-    tree = ET.parse(str(svg_file))
-    root = tree.getroot()
-    ns = {
-        'svg': 'http://www.w3.org/2000/svg',
-        'inkscape': 'http://www.inkscape.org/namespaces/inkscape',
-    }
-
-    viewBox = root.get('viewBox', '0 0 1000 1000')
-    vb = [float(x) for x in viewBox.split()]
-
     paths_by_label = {label: [] for label in labels}
-    for path_el in root.findall('.//svg:path', ns) + root.findall('.//path'):
-        label = path_el.get(f'{{{ns["inkscape"]}}}label')
-        if label not in paths_by_label:
-            continue
-        d = path_el.get('d')
-        if not d:
-            continue
-        transform = path_el.get('transform', '')
-        paths_by_label[label].append({'d': d, 'transform': transform})
+    for label, path in entry.labeled_paths:
+        if label in paths_by_label:
+            paths_by_label[label].append(path)
 
-    return paths_by_label, vb
+    return paths_by_label, list(entry.viewbox)
 
 
 def _path_bbox(d):
-    """Approximate bbox for an SVG path (handles common commands safely)."""
-    if not d:
-        return None
-    tokens = re.findall(r'[a-zA-Z]|[-+]?(?:\d*\.\d+|\d+)(?:[eE][-+]?\d+)?', d)
-    if not tokens:
-        return None
-
-    idx = 0
-    cmd = None
-    x = y = 0.0
-    start_x = start_y = 0.0
-    last_cx = last_cy = None
-    min_x = min_y = float('inf')
-    max_x = max_y = float('-inf')
-
-    def update(px, py):
-        nonlocal min_x, min_y, max_x, max_y
-        min_x = min(min_x, px)
-        min_y = min(min_y, py)
-        max_x = max(max_x, px)
-        max_y = max(max_y, py)
-
-    def read_numbers(n):
-        nonlocal idx
-        if idx + n > len(tokens):
-            return None
-        vals = tokens[idx:idx + n]
-        if any(re.match(r'[a-zA-Z]', v) for v in vals):
-            return None
-        idx += n
-        return [float(v) for v in vals]
-
-    while idx < len(tokens):
-        if re.match(r'[a-zA-Z]', tokens[idx]):
-            cmd = tokens[idx]
-            idx += 1
-        if cmd is None:
-            break
+    """Exact bbox for an SVG path, or None if it draws nothing."""
+    return path_bbox(d)
 
-        c = cmd
-        if c in ('Z', 'z'):
-            x, y = start_x, start_y
-            update(x, y)
-            cmd = None
-            continue
 
-        if c in ('M', 'm', 'L', 'l', 'T', 't'):
-            vals = read_numbers(2)
-            if not vals:
-                break
-            dx, dy = vals
-            if c.islower():
-                x += dx
-                y += dy
-            else:
-                x = dx
-                y = dy
-            if c in ('M', 'm'):
-                start_x, start_y = x, y
-                cmd = 'l' if c == 'm' else 'L'
-            update(x, y)
-        elif c in ('H', 'h'):
-            vals = read_numbers(1)
-            if not vals:
-                break
-            dx = vals[0]
-            x = x + dx if c == 'h' else dx
-            update(x, y)
-        elif c in ('V', 'v'):
-            vals = read_numbers(1)
-            if not vals:
-                break
-            dy = vals[0]
-            y = y + dy if c == 'v' else dy
-            update(x, y)
-        elif c in ('C', 'c'):
-            vals = read_numbers(6)
-            if not vals:
-                break
-            x1, y1, x2, y2, x3, y3 = vals
-            if c.islower():
-                x1 += x; y1 += y; x2 += x; y2 += y; x3 += x; y3 += y
-            update(x1, y1)
-            update(x2, y2)
-            x, y = x3, y3
-            update(x, y)
-            last_cx, last_cy = x2, y2
-        elif c in ('S', 's'):
-            vals = read_numbers(4)
-            if not vals:
-                break
-            x2, y2, x3, y3 = vals
-            if last_cx is None:
-                x1, y1 = x, y
-            else:
-                x1, y1 = 2 * x - last_cx, 2 * y - last_cy
-            if c.islower():
-                x2 += x; y2 += y; x3 += x; y3 += y
-            update(x1, y1)
-            update(x2, y2)
-            x, y = x3, y3
-            update(x, y)
-            last_cx, last_cy = x2, y2
-        elif c in ('Q', 'q'):
-            vals = read_numbers(4)
-            if not vals:
-                break
-            x1, y1, x2, y2 = vals
-            if c.islower():
-                x1 += x; y1 += y; x2 += x; y2 += y
-            update(x1, y1)
-            x, y = x2, y2
-            update(x, y)
-            last_cx, last_cy = x1, y1
-        elif c in ('A', 'a'):
-            vals = read_numbers(7)
-            if not vals:
-                break
-            x2, y2 = vals[5], vals[6]
-            if c.islower():
-                x2 += x; y2 += y
-            x, y = x2, y2
-            update(x, y)
-        else:
-            cmd = None
+def _paths_bbox(paths):
+    return union_bbox(_path_bbox(p.get('d', '')) for p in paths)
 
-    if min_x == float('inf'):
-        return None
-    return min_x, min_y, max_x, max_y
 
+CartoucheSegment = namedtuple('CartoucheSegment', 'paths bbox width')
 
-def _paths_bbox(paths):
-    bbox = None
-    for p in paths:
-        b = _path_bbox(p.get('d', ''))
-        if not b:
-            continue
-        if bbox is None:
-            bbox = list(b)
-        else:
-            bbox[0] = min(bbox[0], b[0])
-            bbox[1] = min(bbox[1], b[1])
-            bbox[2] = max(bbox[2], b[2])
-            bbox[3] = max(bbox[3], b[3])
-    if bbox is None:
-        return None
-    return tuple(bbox)
+
+class CartoucheTemplate(namedtuple(
+        'CartoucheTemplate', 'source viewbox scale left center right bar_height stamp',
+        defaults=(None,))):
+    """Immutable cartouche geometry, scaled to the output height.
+
+    left, center and right are CartoucheSegments holding the segment's
+    paths, its bbox in SVG units and its width in output units. Laying out
+    a cartouche from a template is plain arithmetic: the left cap, one
+    center bar per syllable, then the right cap. stamp is the source SVG's
+    GlyphCache stamp, if the template was read from one.
+    """
+
+    @classmethod
+    def from_svg(cls, svg_file, glyph_cache=None, target_height=TARGET_HEIGHT):
+        """Build a template from an SVG whose paths carry inkscape:labels
+        'left', 'center' and 'right'."""
+        entry = (glyph_cache or GLYPH_CACHE).get(svg_file)
+        if entry is None or not entry.viewbox:
+            raise FileNotFoundError(f'Cartouche SVG not found or invalid: {svg_file}')
+
+        paths_by_label = {label: [] for label in CARTOUCHE_LABELS}
+        for label, path in entry.labeled_paths:
+            if label in paths_by_label:
+                paths_by_label[label].append(path)
+        if any(not paths for paths in paths_by_label.values()):
+            raise ValueError('Cartouche SVG is missing left/center/right labels.')
+
+        vb = tuple(entry.viewbox)
+        scale = target_height / vb[3] if vb[3] > 0 else 1
+        segments = {}
+        for label, paths in paths_by_label.items():
+            bbox = entry.label_bboxes.get(label)
+            if not bbox:
+                raise ValueError(f'Failed to compute cartouche {label} bounds.')
+            segments[label] = CartoucheSegment(
+                tuple(paths), bbox, (bbox[2] - bbox[0]) * scale
+            )
+
+        center_bbox = segments['center'].bbox
+        return cls(
+            source=Path(svg_file),
+            viewbox=vb,
+            scale=scale,
+            bar_height=(center_bbox[3] - center_bbox[1]) * scale,
+            stamp=entry.stamp,
+            **segments,
+        )
+
+    def width(self, syllable_count):
+        """Total width of a cartouche around syllable_count syllables."""
+        return self.left.width + self.center.width * syllable_count + self.right.width
 
 
 def parse_syllables(name):
@@ -316,22 +392,13 @@ def parse_input(text):
 
 
 def match_compounds(word_tokens, compound_set):
-    """Greedily match word tokens into compounds where possible."""
-    result = []
-    i = 0
-    while i < len(word_tokens):
-        matched = False
-        for length in range(min(4, len(word_tokens) - i), 1, -1):
-            candidate = '-'.join(word_tokens[i:i + length])
-            if candidate in compound_set:
-                result.append(candidate)
-                i += length
-                matched = True
-                break
-        if not matched:
-            result.append(word_tokens[i])
-            i += 1
-    return result
+    """Greedily match word tokens into the longest available compounds.
+
+    compound_set may be a CompoundIndex or any collection of compound names.
+    """
+    if not isinstance(compound_set, CompoundIndex):
+        compound_set = CompoundIndex(compound_set)
+    return compound_set.match(word_tokens)
 
 
 def word_commons_url(word):
@@ -366,342 +433,868 @@ def safe_filename(name):
     return name
 
 
-def generate(text):
-    """Generate a composed SVG for the given toki pona phrase."""
-    print(f'Input: {text}')
-
+def output_filename(text):
+    """Name of the SVG file generate() writes for text."""
     word_tokens, sound_name = parse_input(text)
-    print(f'  Words: {word_tokens}')
-    print(f'  Sound name: {sound_name}')
-
-    # Find available compounds from extracted SVGs
-    compound_set = get_available_compounds()
-    print(f'  Available compounds: {len(compound_set)}')
-
-    # Match compounds greedily
-    matched_words = match_compounds(word_tokens, compound_set)
-    print(f'  Matched words: {matched_words}')
-
-    # Parse syllables
-    syllables = parse_syllables(sound_name) if sound_name else []
-    print(f'  Syllables: {syllables}')
-
-    word_pieces = []
-    syllable_pieces = []
-    cartouche_pieces = []
-    sources = []
-    x_cursor = 0
-
-    # Read word SVGs
-    for word in matched_words:
-        svg_file = WORD_SVGS_DIR / f'Sitelen seli kiwen - {word}.svg'
-        paths, vb = read_svg_paths(svg_file)
-
-        if paths and vb:
-            vb_x, vb_y, vb_w, vb_h = vb
-            scale = (TARGET_HEIGHT / vb_h if vb_h > 0 else 1) * 1.15
-            word_pieces.append({
-                'type': 'word',
-                'paths': paths,
-                'viewbox': vb,
-                'scale': scale,
-                'x_offset': x_cursor,
-                'y_offset': 0,
-            })
-            x_cursor += vb_w * scale + SPACING
-            sources.append(f'{word}: {word_commons_url(word)}')
-            print(f'  Loaded word SVG: {word}')
-        else:
-            print(f'  Warning: could not load SVG for "{word}"')
-
-    # Read syllable SVGs and compute cartouche layout
-    syllable_items = []
-    for syl in syllables:
-        svg_name = syllable_to_svg_name(syl)
-        svg_file = SYLLABLES_DIR / f'sitelen kalama pona - {svg_name}.svg'
-        paths, vb = read_svg_paths(svg_file)
-
-        if paths and vb:
-            vb_x, vb_y, vb_w, vb_h = vb
-            scale = (TARGET_HEIGHT / vb_h if vb_h > 0 else 1) * 0.8
-            syllable_items.append({
-                'syllable': syl,
-                'paths': paths,
-                'viewbox': vb,
-                'scale': scale,
-            })
-            sources.append(f'{syl}: {syllable_commons_url(syl)}')
-            print(f'  Loaded syllable: {syl}')
-        else:
-            print(f'  Warning: could not load syllable "{syl}"')
+    if word_tokens and sound_name:
+        filename_text = f'{" ".join(word_tokens)}, {sound_name.lower()}'
+    elif sound_name:
+        filename_text = f', {sound_name.lower()}'
+    else:
+        filename_text = text
+    return f'sitelen ilo pona - {safe_filename(filename_text)}.svg'
 
-    if syllable_items:
-        cartouche_labels = {'left', 'center', 'right'}
-        cartouche_paths_by_label, cartouche_vb = read_svg_paths_by_label(
-            CARTOUCHE_SVG,
-            cartouche_labels,
-        )
-        if not cartouche_paths_by_label or not cartouche_vb:
-            raise FileNotFoundError(
-                f'Cartouche SVG not found or invalid: {CARTOUCHE_SVG}'
-            )
 
-        if any(not cartouche_paths_by_label[label] for label in cartouche_labels):
-            raise ValueError('Cartouche SVG is missing left/center/right labels.')
+PlacedGlyph = namedtuple(
+    'PlacedGlyph', 'kind name paths viewbox x y scale_x scale_y source', defaults=(None,)
+)
+PlacedGlyph.__doc__ = """One glyph placed in the output.
 
-        c_vb_x, c_vb_y, c_vb_w, c_vb_h = cartouche_vb
-        cartouche_scale = TARGET_HEIGHT / c_vb_h if c_vb_h > 0 else 1
-        center_bbox = _paths_bbox(cartouche_paths_by_label['center'])
-        if not center_bbox:
-            raise ValueError('Failed to compute cartouche center bounds.')
-        cartouche_bar_height = (center_bbox[3] - center_bbox[1]) * cartouche_scale
-
-        # Update syllable scaling to fit cartouche height
-        syllable_widths = []
-        for item in syllable_items:
-            vb_x, vb_y, vb_w, vb_h = item['viewbox']
-            item['scale'] = (TARGET_HEIGHT / vb_h if vb_h > 0 else 1) * 0.8
-            syllable_widths.append(vb_w * item['scale'])
-
-        syllable_start_x = x_cursor
-
-        syllable_total_width = sum(syllable_widths)
-        if len(syllable_widths) > 1:
-            syllable_total_width += SPACING * (len(syllable_widths) - 1)
-
-        left_bbox = _paths_bbox(cartouche_paths_by_label['left'])
-        right_bbox = _paths_bbox(cartouche_paths_by_label['right'])
-        if not left_bbox or not right_bbox:
-            raise ValueError('Failed to compute cartouche side bounds.')
-
-        left_w = (left_bbox[2] - left_bbox[0]) * cartouche_scale
-        right_w = (right_bbox[2] - right_bbox[0]) * cartouche_scale
-        center_w = (center_bbox[2] - center_bbox[0]) * cartouche_scale
-
-        seg_w = center_w
-        cartouche_inner_width = seg_w * len(syllable_widths)
-        cartouche_total_width = left_w + cartouche_inner_width + right_w
-
-        left_x = syllable_start_x
-        middle_x = left_x + left_w
-        right_x = middle_x + cartouche_inner_width
-
-        # Left/right keep native proportions (scale_x == scale_y)
-        cartouche_pieces.append({
-            'paths': cartouche_paths_by_label['left'],
-            'viewbox': cartouche_vb,
-            'scale_x': cartouche_scale,
-            'scale_y': cartouche_scale,
-            'x_offset': left_x - left_bbox[0] * cartouche_scale,
-            'y_offset': 0,
-        })
-
-        # Center repeats per syllable, no stretching
-        for i in range(len(syllable_widths)):
-            seg_x = middle_x + i * seg_w
-            center_x = seg_x + (seg_w - center_w) / 2
-            cartouche_pieces.append({
-                'paths': cartouche_paths_by_label['center'],
-                'viewbox': cartouche_vb,
-                'scale_x': cartouche_scale,
-                'scale_y': cartouche_scale,
-                'x_offset': center_x - center_bbox[0] * cartouche_scale,
-                'y_offset': 0,
-            })
-
-        cartouche_pieces.append({
-            'paths': cartouche_paths_by_label['right'],
-            'viewbox': cartouche_vb,
-            'scale_x': cartouche_scale,
-            'scale_y': cartouche_scale,
-            'x_offset': right_x - right_bbox[0] * cartouche_scale,
-            'y_offset': 0,
-        })
-
-        # Place syllables inside cartouche
-        for i, (item, width) in enumerate(zip(syllable_items, syllable_widths)):
-            seg_x = middle_x + i * seg_w
-            x_cursor = seg_x + (seg_w - width) / 2
-            vb_x, vb_y, vb_w, vb_h = item['viewbox']
-            y_offset = (TARGET_HEIGHT - vb_h * item['scale']) / 2
-            syllable_pieces.append({
-                'type': 'syllable',
-                'paths': item['paths'],
-                'viewbox': item['viewbox'],
-                'scale': item['scale'],
-                'x_offset': x_cursor,
-                'y_offset': y_offset,
-            })
-
-        # Move cursor to the end of cartouche block
-        x_cursor = syllable_start_x + cartouche_total_width + SPACING
-
-    # Build SVG
-    has_content = bool(word_pieces or syllable_pieces or cartouche_pieces)
-    total_width = x_cursor - SPACING if has_content else 0
-
-    # Categories for Commons uploads
-    word_phrase = ' '.join(word_tokens)
-    categories = ['[[Category:Sitelen kalama pona]]']
-    if word_phrase:
-        categories.append(f'[[Category:Toki Pona text containing {word_phrase}]]')
-    for syl in syllables:
-        categories.append(
-            f'[[Category:Toki Pona text containing sound symbol {syllable_category_label(syl)}]]'
-        )
+kind is 'word', 'cartouche' or 'syllable'. The glyph's paths are drawn in
+its own viewBox units and mapped to output space by
+translate(x, y) scale(scale_x, scale_y). source is (glyph file, GlyphCache
+stamp) of the SVG the paths were read from, or None.
+"""
 
-    description_lines = [
-        f'Representation of "{text}" in sitelen ilo pona.',
-        'Sources: ' + '; '.join(sources) if sources else 'Sources: (none)',
-    ]
+RenderResult = namedtuple(
+    'RenderResult',
+    'text words sound_name matched_words syllables missing glyphs width height '
+    'sources categories',
+)
+RenderResult.__doc__ = """Layout of a phrase, independent of any output format.
+
+glyphs are in drawing order (words, then the cartouche, then the syllables
+on top of it). missing lists the words and syllables that had no glyph.
+"""
 
-    comment_lines = [
-        f'Representation of "{text}" in sitelen ilo pona',
-        'Generated by generate_sitelen_kalama_pona.py',
-        '',
-        'Description:',
-    ] + [f'  {d}' for d in description_lines] + [
-        '',
-        'Categories:',
-    ] + [f'  {c}' for c in categories] + [
-        '',
-        'Sources:',
-    ] + [f'  {s}' for s in sources]
-    comment = '\n'.join(comment_lines)
-
-    svg_parts = [
-        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
-        f'<!--\n{comment}\n-->',
-        f'<svg version="1.1" width="{total_width:.0f}" height="{TARGET_HEIGHT}"',
-        f'     viewBox="0 0 {total_width:.0f} {TARGET_HEIGHT}"',
-        '     xmlns="http://www.w3.org/2000/svg">',
+
+def description_lines(result):
+    return [
+        f'Representation of "{result.text}" in sitelen ilo pona.',
+        'Sources: ' + '; '.join(result.sources) if result.sources else 'Sources: (none)',
     ]
 
-    def strip_flip_transform(transform):
-        if not transform:
-            return ''
-        return re.sub(r'scale\(\s*1\s*,\s*-1\s*\)', '', transform).strip()
-
-    # Render word glyphs
-    for piece in word_pieces:
-        vb_x, vb_y, vb_w, vb_h = piece['viewbox']
-        s = piece['scale']
-        tx = piece['x_offset'] - vb_x * s
-        ty = -vb_y * s + piece['y_offset']
-
-        for path in piece['paths']:
-            transform = path.get('transform', '')
-            has_flip = 'scale(1,-1)' in transform.replace(' ', '')
-            inner_transform = strip_flip_transform(transform) if has_flip else transform
-            inner_transform = inner_transform.strip()
-
-            if has_flip:
-                # Word SVGs from font: viewBox like "0 -1000 900 1200", path has scale(1,-1)
-                # The path is in font coordinates (Y-up). scale(1,-1) flips it.
-                # viewBox origin is (0, -ascent). We need to map this into our output space.
-                outer = f'translate({tx:.2f},{ty:.2f}) scale({s:.4f},{-s:.4f})'
-            else:
-                # Syllable SVGs: viewBox like "0 0 1000 1000", no flip
-                outer = f'translate({tx:.2f},{ty:.2f}) scale({s:.4f},{s:.4f})'
+
+def _strip_flip_transform(transform):
+    if not transform:
+        return ''
+    return re.sub(r'scale\(\s*1\s*,\s*-1\s*\)', '', transform).strip()
+
+
+@lru_cache(maxsize=4 * GLYPH_CACHE_SIZE)
+def _minified(d, precision):
+    return minify_path(d, precision)
+
+
+def _placement(glyph, path):
+    """(outer transform, inner transform) for one path of a placed glyph."""
+    rest, inner = _placement_after_x(glyph, path)
+    return f'translate({glyph.x:.2f}{rest}', inner
+
+
+def _placement_after_x(glyph, path):
+    """_placement() with the outer transform cut after its x offset, so that
+    a fragment can be serialized once and placed at any x."""
+    ty = glyph.y
+    sx, sy = glyph.scale_x, glyph.scale_y
+    transform = path.get('transform') or ''
+    has_flip = False
+    if glyph.kind != 'cartouche':
+        # Word and syllable SVGs extracted from the font are in font
+        # coordinates (Y-up) with scale(1,-1) on the path, and a viewBox like
+        # "0 -1000 900 1200"; the flip is folded into the outer scale. The
+        # cartouche is drawn as-is.
+        has_flip = path.get('flip')
+        if has_flip is None:
+            has_flip = _is_flipped(transform)
+    if has_flip:
+        return (f',{ty:.2f}) scale({sx:.4f},{-sy:.4f})',
+                _strip_flip_transform(transform))
+    return (f',{ty:.2f}) scale({sx:.4f},{sy:.4f})',
+            transform.strip())
+
+
+def _fragments(result):
+    """Split a result's glyphs into the word run and the cartouche block
+    (cartouche segments plus the syllables inside them)."""
+    words = [g for g in result.glyphs if g.kind == 'word']
+    block = [g for g in result.glyphs if g.kind != 'word']
+    return [f for f in (words, block) if f]
+
+
+def _fragment_key(glyphs, options):
+    """Key for a serialized fragment: each glyph's source file and stamp (or
+    its path data, for glyphs not read from a file), its placement relative
+    to the fragment's origin (its first glyph's x), and the output options
+    (flatten, precision, minify).
+
+    Relative offsets are rounded far below the output precision, so that
+    float noise from a different origin does not miss.
+    """
+    origin = glyphs[0].x
+    return (options,) + tuple(
+        (g.kind, g.name,
+         g.source or tuple((p['d'], p.get('transform'), p.get('flip')) for p in g.paths),
+         round(g.x - origin, 6), g.y, g.scale_x, g.scale_y)
+        for g in glyphs
+    )
+
+
+def _serialize_fragment(glyphs, flatten, precision, minify):
+    """SVG elements for glyphs (without <defs>), relative to the fragment's
+    origin; see _place_fragment().
+
+    Returns (lines, path bytes before minifying, path bytes after). Each line
+    is (head, x, tail): head and tail surround the x offset of a glyph's
+    translate(), with x relative to the origin. Flattened lines are instead
+    the transform_segments() of a path relative to the origin, which are
+    formatted and minified when placed, and count no bytes here.
+    """
+    origin = glyphs[0].x
+    lines = []
+    before = after = 0
+    for glyph in glyphs:
+        x = glyph.x - origin
+        for path in glyph.paths:
+            if flatten:
+                matrix = multiply((glyph.scale_x, 0.0, 0.0, glyph.scale_y, x, glyph.y),
+                                  parse_transform(path.get('transform') or ''))
+                lines.append(transform_segments(path['d'], matrix, precision))
+                continue
+            d = path['d']
+            rest, inner_transform = _placement_after_x(glyph, path)
+            if minify is not None:
+                before += len(d)
+                d = _minified(d, minify)
+                after += len(d)
 
             if inner_transform:
-                svg_parts.append(
-                    f'  <g transform="{outer}">'
-                    f'<path d="{path["d"]}" transform="{inner_transform}" fill="#000000" />'
-                    f'</g>'
-                )
-            else:
-                svg_parts.append(
-                    f'  <path d="{path["d"]}"'
-                    f' transform="{outer}"'
-                    f' fill="#000000" />'
-                )
-
-    # Render cartouche pieces behind syllables
-    for piece in cartouche_pieces:
-        vb_x, vb_y, vb_w, vb_h = piece['viewbox']
-        sx = piece['scale_x']
-        sy = piece['scale_y']
-        tx = piece['x_offset'] - vb_x * sx
-        ty = piece['y_offset'] - vb_y * sy
-
-        for path in piece['paths']:
-            inner_transform = (path.get('transform') or '').strip()
-            if inner_transform:
-                svg_parts.append(
-                    f'  <g transform="translate({tx:.2f},{ty:.2f}) scale({sx:.4f},{sy:.4f})">'
-                    f'<path d="{path["d"]}" transform="{inner_transform}" fill="#000000" />'
-                    f'</g>'
-                )
+                lines.append((
+                    '  <g transform="translate(',
+                    x,
+                    f'{rest}">'
+                    f'<path d="{d}" transform="{inner_transform}" fill="#000000" />'
+                    f'</g>',
+                ))
             else:
-                svg_parts.append(
-                    f'  <path d="{path["d"]}"'
-                    f' transform="translate({tx:.2f},{ty:.2f}) scale({sx:.4f},{sy:.4f})"'
-                    f' fill="#000000" />'
-                )
-
-    # Render syllable glyphs
-    for piece in syllable_pieces:
-        vb_x, vb_y, vb_w, vb_h = piece['viewbox']
-        s = piece['scale']
-        tx = piece['x_offset'] - vb_x * s
-        ty = -vb_y * s + piece['y_offset']
-
-        for path in piece['paths']:
-            transform = path.get('transform', '')
-            has_flip = 'scale(1,-1)' in transform.replace(' ', '')
-            inner_transform = strip_flip_transform(transform) if has_flip else transform
-            inner_transform = inner_transform.strip()
-
-            if has_flip:
-                outer = f'translate({tx:.2f},{ty:.2f}) scale({s:.4f},{-s:.4f})'
+                lines.append((
+                    f'  <path d="{d}"'
+                    f' transform="translate(',
+                    x,
+                    f'{rest}"'
+                    f' fill="#000000" />',
+                ))
+    return lines, before, after
+
+
+def _place_fragment(lines, origin, flatten=False, precision=2, minify=None):
+    """The SVG lines of a serialized fragment placed at origin, with the
+    path bytes before and after minifying the flattened paths."""
+    if not flatten:
+        return [f'{head}{x + origin:.2f}{tail}' for head, x, tail in lines], 0, 0
+    placed = []
+    before = after = 0
+    for segments in lines:
+        d = format_segments(segments, precision, origin)
+        if minify is not None:
+            before += len(d)
+            d = _minified(d, minify)
+            after += len(d)
+        placed.append(f'  <path d="{d}" fill="#000000" />')
+    return placed, before, after
+
+
+class FragmentCache:
+    """Bounded LRU cache of serialized fragments.
+
+    Many labels share a word run ("jan", "tomo sewi") or a proper name;
+    their SVG elements are looked up here by glyph file and placement
+    relative to the fragment's origin, and stitched into the document at
+    its x instead of being formatted again. Flattened fragments are kept
+    untransformed by the origin, so placing one elsewhere only translates
+    its coordinates.
+    """
+
+    def __init__(self, maxsize=FRAGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, glyphs, flatten, precision, minify):
+        """(lines, path bytes, minified bytes) for a fragment."""
+        key = _fragment_key(glyphs, (flatten, precision, minify))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
             else:
-                outer = f'translate({tx:.2f},{ty:.2f}) scale({s:.4f},{s:.4f})'
+                self.misses += 1
+        if entry is None:
+            entry = _serialize_fragment(glyphs, flatten, precision, minify)
+            with self._lock:
+                self._entries[key] = entry
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        lines, before, after = entry
+        placed, placed_before, placed_after = _place_fragment(
+            lines, glyphs[0].x, flatten, precision, minify)
+        return placed, before + placed_before, after + placed_after
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries), 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+FRAGMENT_CACHE = FragmentCache()
+
+
+def fragment_cache_info():
+    """Hit/miss counters for the process-wide fragment cache."""
+    return FRAGMENT_CACHE.info()
+
+
+def to_sidecar(result):
+    """Commons-friendly description + categories for the .wiki.txt sidecar."""
+    return '\n'.join(description_lines(result) + [''] + result.categories) + '\n'
+
+
+def layout_lines(result, compound_count):
+    """The per-phrase detail generate() logs at debug level."""
+    lines = [
+        f'  Words: {result.words}',
+        f'  Sound name: {result.sound_name}',
+        f'  Available compounds: {compound_count}',
+        f'  Matched words: {result.matched_words}',
+        f'  Syllables: {result.syllables}',
+    ]
+    for word in result.matched_words:
+        if word not in result.missing:
+            lines.append(f'  Loaded word SVG: {word}')
+        else:
+            lines.append(f'  Warning: could not load SVG for "{word}"')
+    for syl in result.syllables:
+        if syl not in result.missing:
+            lines.append(f'  Loaded syllable: {syl}')
+        else:
+            lines.append(f'  Warning: could not load syllable "{syl}"')
+    return lines
 
-            if inner_transform:
-                svg_parts.append(
-                    f'  <g transform="{outer}">'
-                    f'<path d="{path["d"]}" transform="{inner_transform}" fill="#000000" />'
-                    f'</g>'
-                )
+
+def configure_logging(level=None, stream=None):
+    """Send the 'sitelen' loggers' records to stream (default: stdout) as
+    plain lines, at level (default: INFO) and above. Used by the command-line
+    entry points; importing the modules configures nothing."""
+    import logging
+    if level is None:
+        level = logging.INFO
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    root = logging.getLogger('sitelen')
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    root.propagate = False
+    return handler
+
+
+# Pipeline stages timed into a stats dict (as '<stage>_seconds') by layout(),
+# output_files() and generate()
+STAGES = ('parse', 'match', 'syllables', 'assets', 'layout', 'serialize', 'write')
+
+
+def add_stats(stats, **values):
+    """Add values (e.g. parse_seconds=0.01, files_written=2) to stats."""
+    for key, value in values.items():
+        stats[key] = stats.get(key, 0) + value
+
+
+class Renderer:
+    """Renders phrases from one set of glyph sources and layout settings.
+
+    A Renderer holds where glyphs come from (word and syllable SVG
+    directories and the cartouche), the output height
+    and glyph spacing, and its glyph and fragment caches. It is safe to
+    share across threads: the caches lock internally, and the compound
+    index and cartouche are loaded once under a lock. Several Renderers
+    with different settings can live in one process.
+
+    The module-level functions (layout(), to_svg(), generate(), ...) use
+    DEFAULT_RENDERER, which renders from this repository.
+    """
+
+    def __init__(self, words_dir=WORD_SVGS_DIR, syllables_dir=SYLLABLES_DIR,
+                 cartouche=CARTOUCHE_SVG, target_height=TARGET_HEIGHT, spacing=SPACING,
+                 compound_index_file=None, glyph_cache=None, fragment_cache=None):
+        self.words_dir = Path(words_dir)
+        self.syllables_dir = Path(syllables_dir)
+        self.target_height = target_height
+        self.spacing = spacing
+        self.compound_index_file = compound_index_file
+        self.glyph_cache = glyph_cache if glyph_cache is not None else GlyphCache()
+        self.fragment_cache = fragment_cache if fragment_cache is not None else FragmentCache()
+        self._lock = threading.Lock()
+        self._compound_index = None
+        self._cartouche_source = None
+        self._cartouche = None
+        self.set_cartouche_source(cartouche)
+
+    def compound_index(self):
+        """Compound trie for words_dir, built once."""
+        with self._lock:
+            if self._compound_index is None:
+                index = None
+                bundle = self.glyph_cache.bundle()
+                if bundle is not None:
+                    index = bundle.compound_index(self.words_dir)
+                if index is None and self.compound_index_file is not None:
+                    index = CompoundIndex.load_or_scan(self.words_dir, self.compound_index_file)
+                if index is None:
+                    index = CompoundIndex.scan(self.words_dir)
+                self._compound_index = index
+            return self._compound_index
+
+    def set_cartouche_source(self, source):
+        """Use a different cartouche.
+
+        source is a path to an SVG with 'left'/'center'/'right' labelled
+        paths, a ready CartoucheTemplate, or a zero-argument callable
+        returning one.
+        """
+        with self._lock:
+            self._cartouche_source = source
+            self._cartouche = source if isinstance(source, CartoucheTemplate) else None
+
+    def cartouche(self):
+        """The cartouche template, loaded from the current source once."""
+        with self._lock:
+            if self._cartouche is None:
+                source = self._cartouche_source
+                if callable(source):
+                    self._cartouche = source()
+                else:
+                    self._cartouche = CartoucheTemplate.from_svg(
+                        source, self.glyph_cache, self.target_height
+                    )
+            return self._cartouche
+
+    def cartouche_file(self):
+        """File the cartouche is drawn from, for dependency tracking, or None."""
+        source = self._cartouche_source
+        if isinstance(source, (str, Path)):
+            return Path(source)
+        cartouche = self._cartouche
+        return cartouche.source if cartouche is not None else None
+
+    def word_svg_file(self, word):
+        """Path of the word (or compound) glyph SVG."""
+        return self.words_dir / f'Sitelen seli kiwen - {word}.svg'
+
+    def syllable_svg_file(self, syllable):
+        """Path of the syllable glyph SVG."""
+        return self.syllables_dir / f'sitelen kalama pona - {syllable_to_svg_name(syllable)}.svg'
+
+    def read_svg_paths(self, svg_file):
+        """(paths, viewBox) of a glyph SVG as tuples, or (None, None). The
+        paths are the cached, read-only glyph_path() mappings."""
+        return self._read_glyph(svg_file)[:2]
+
+    def _read_glyph(self, svg_file):
+        """read_svg_paths() plus the PlacedGlyph source of the SVG."""
+        entry = self.glyph_cache.get(svg_file)
+        if entry is None or not entry.paths:
+            return None, None, None
+        return entry.paths, entry.viewbox, (str(svg_file), entry.stamp)
+
+    def glyph_dependencies(self, text):
+        """Glyph files the output for text depends on, whether or not they exist.
+
+        Same list, in the same order, as layout() records in `dependencies`:
+        word SVGs, then syllable SVGs, then the cartouche SVG, which are all
+        the files the output is drawn from.
+        """
+        word_tokens, sound_name = parse_input(text)
+        files = [self.word_svg_file(w)
+                 for w in match_compounds(word_tokens, self.compound_index())]
+        syllables = parse_syllables(sound_name) if sound_name else []
+        for syl in syllables:
+            files.append(self.syllable_svg_file(syl))
+        if syllables and self.cartouche_file() is not None:
+            files.append(self.cartouche_file())
+        return files
+
+    def layout(self, text, dependencies=None, stats=None):
+        """Lay out a toki pona phrase. Returns a RenderResult.
+
+        Does no printing and writes nothing. If a list is passed as
+        dependencies, every glyph file the layout depends on is appended to it
+        (see glyph_dependencies()). If a dict is passed as stats, the time
+        spent parsing the input, matching compounds, splitting the name into
+        syllables, loading glyphs and placing them is added to its
+        parse_seconds, match_seconds, syllables_seconds, assets_seconds and
+        layout_seconds.
+        """
+        if dependencies is None:
+            dependencies = []
+
+        start = perf_counter()
+        word_tokens, sound_name = parse_input(text)
+        parsed = perf_counter()
+        matched_words = match_compounds(word_tokens, self.compound_index())
+        matched = perf_counter()
+        syllables = parse_syllables(sound_name) if sound_name else []
+        split = perf_counter()
+        asset_seconds = 0.0
+
+        glyphs = []
+        missing = []
+        sources = []
+        x_cursor = 0
+
+        # Word glyphs
+        for word in matched_words:
+            svg_file = self.word_svg_file(word)
+            dependencies.append(svg_file)
+            loading = perf_counter()
+            paths, vb, source = self._read_glyph(svg_file)
+            asset_seconds += perf_counter() - loading
+
+            if paths and vb:
+                vb_x, vb_y, vb_w, vb_h = vb
+                scale = (self.target_height / vb_h if vb_h > 0 else 1) * 1.15
+                glyphs.append(PlacedGlyph(
+                    'word', word, paths, vb,
+                    x_cursor - vb_x * scale, 0 - vb_y * scale, scale, scale, source,
+                ))
+                x_cursor += vb_w * scale + self.spacing
+                sources.append(f'{word}: {word_commons_url(word)}')
+            else:
+                missing.append(word)
+
+        # Syllable glyphs
+        syllable_items = []
+        for syl in syllables:
+            svg_file = self.syllable_svg_file(syl)
+            dependencies.append(svg_file)
+            loading = perf_counter()
+            paths, vb, source = self._read_glyph(svg_file)
+            asset_seconds += perf_counter() - loading
+
+            if paths and vb:
+                vb_x, vb_y, vb_w, vb_h = vb
+                scale = (self.target_height / vb_h if vb_h > 0 else 1) * 0.8
+                syllable_items.append((syl, paths, vb, scale, source))
+                sources.append(f'{syl}: {syllable_commons_url(syl)}')
             else:
-                svg_parts.append(
-                    f'  <path d="{path["d"]}"'
-                    f' transform="{outer}"'
-                    f' fill="#000000" />'
-                )
+                missing.append(syl)
+
+        if syllables and self.cartouche_file() is not None:
+            dependencies.append(self.cartouche_file())
+
+        if syllable_items:
+            loading = perf_counter()
+            cartouche = self.cartouche()
+            asset_seconds += perf_counter() - loading
+            scale = cartouche.scale
+            vb_x, vb_y = cartouche.viewbox[:2]
+            left, center, right = cartouche.left, cartouche.center, cartouche.right
+            cartouche_source = None
+            if cartouche.stamp is not None:
+                cartouche_source = (str(cartouche.source), cartouche.stamp)
+
+            seg_w = center.width
+            left_x = x_cursor
+            middle_x = left_x + left.width
+            right_x = middle_x + seg_w * len(syllable_items)
+
+            def place_segment(name, segment, x):
+                glyphs.append(PlacedGlyph(
+                    'cartouche', name, segment.paths, cartouche.viewbox,
+                    x - segment.bbox[0] * scale - vb_x * scale, 0 - vb_y * scale,
+                    scale, scale, cartouche_source,
+                ))
+
+            # Left/right keep native proportions; the center repeats per
+            # syllable, no stretching
+            place_segment('left', left, left_x)
+            for i in range(len(syllable_items)):
+                place_segment('center', center, middle_x + i * seg_w)
+            place_segment('right', right, right_x)
+
+            # Syllables centred in their segment
+            for i, (syl, paths, vb, s, source) in enumerate(syllable_items):
+                vb_x, vb_y, vb_w, vb_h = vb
+                width = vb_w * s
+                x = middle_x + i * seg_w + (seg_w - width) / 2
+                y = (self.target_height - vb_h * s) / 2
+                glyphs.append(PlacedGlyph('syllable', syl, paths, vb,
+                                          x - vb_x * s, y - vb_y * s, s, s, source))
+
+            x_cursor += cartouche.width(len(syllable_items)) + self.spacing
+
+        total_width = x_cursor - self.spacing if glyphs else 0
+
+        # Categories for Commons uploads
+        word_phrase = ' '.join(word_tokens)
+        categories = ['[[Category:Sitelen kalama pona]]']
+        if word_phrase:
+            categories.append(f'[[Category:Toki Pona text containing {word_phrase}]]')
+        for syl in syllables:
+            categories.append(
+                f'[[Category:Toki Pona text containing sound symbol {syllable_category_label(syl)}]]'
+            )
 
-    svg_parts.append('</svg>')
-    svg_content = '\n'.join(svg_parts) + '\n'
+        if stats is not None:
+            add_stats(stats, parse_seconds=parsed - start, match_seconds=matched - parsed,
+                      syllables_seconds=split - matched, assets_seconds=asset_seconds,
+                      layout_seconds=perf_counter() - split - asset_seconds)
+
+        return RenderResult(
+            text=text,
+            words=word_tokens,
+            sound_name=sound_name,
+            matched_words=matched_words,
+            syllables=syllables,
+            missing=missing,
+            glyphs=glyphs,
+            width=total_width,
+            height=self.target_height,
+            sources=sources,
+            categories=categories,
+        )
 
-    output_dir = ROOT_DIR / 'output'
-    output_dir.mkdir(exist_ok=True)
-    if word_tokens and sound_name:
-        filename_text = f'{" ".join(word_tokens)}, {sound_name.lower()}'
-    elif sound_name:
-        filename_text = f', {sound_name.lower()}'
-    else:
-        filename_text = text
-    output_name = f'sitelen ilo pona - {safe_filename(filename_text)}.svg'
-    output_path = output_dir / output_name
-    with open(str(output_path), 'w', encoding='utf-8') as f:
-        f.write(svg_content)
+    def to_svg(self, result, use_defs=False, flatten=False, precision=FLATTEN_PRECISION,
+               minify=None, stats=None):
+        """Serialize a RenderResult as an SVG document (str).
+
+        With use_defs, each distinct glyph path is written once inside <defs>
+        and every occurrence is placed with <use>, which keeps long names and
+        repeated cartouche segments from inlining the same path data.
+
+        With flatten, each glyph's placement and its path's own transform are
+        applied to the path coordinates, which are rounded to precision decimal
+        places, so the output is plain absolute <path>s without transforms or
+        <g> wrappers.
+
+        With minify set to a number of decimal places, path data is rewritten
+        by path_geometry.minify_path(). If a dict is passed as stats, the path
+        data bytes before and after are added to its 'path_bytes' and
+        'minified_bytes'.
+
+        Outside of use_defs mode the word run and the cartouche block are
+        serialized through the fragment cache.
+        """
+        if use_defs and flatten:
+            raise ValueError('use_defs and flatten cannot be combined')
+
+        description = description_lines(result)
+        comment_lines = [
+            f'Representation of "{result.text}" in sitelen ilo pona',
+            'Generated by generate_sitelen_kalama_pona.py',
+            '',
+            'Description:',
+        ] + [f'  {d}' for d in description] + [
+            '',
+            'Categories:',
+        ] + [f'  {c}' for c in result.categories] + [
+            '',
+            'Sources:',
+        ] + [f'  {s}' for s in result.sources]
+        comment = '\n'.join(comment_lines)
+
+        svg_parts = [
+            '<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
+            f'<!--\n{comment}\n-->',
+            f'<svg version="1.1" width="{result.width:.0f}" height="{result.height}"',
+            f'     viewBox="0 0 {result.width:.0f} {result.height}"',
+            '     xmlns="http://www.w3.org/2000/svg">',
+        ]
+        path_bytes = minified_bytes = 0
+
+        if use_defs:
+            svg_parts[-1] = '     xmlns="http://www.w3.org/2000/svg"'
+            svg_parts.append('     xmlns:xlink="http://www.w3.org/1999/xlink">')
+
+            # (d, inner transform) -> id of the <defs> entry, in first-use order
+            def_ids = {}
+            uses = []
+            for glyph in result.glyphs:
+                for path in glyph.paths:
+                    outer, inner_transform = _placement(glyph, path)
+                    key = (path['d'], inner_transform)
+                    def_id = def_ids.get(key)
+                    if def_id is None:
+                        def_id = def_ids[key] = f'g{len(def_ids)}'
+                    uses.append(f'  <use xlink:href="#{def_id}" transform="{outer}" />')
+
+            if def_ids:
+                svg_parts.append('  <defs>')
+                for (d, inner_transform), def_id in def_ids.items():
+                    if minify is not None:
+                        path_bytes += len(d)
+                        d = _minified(d, minify)
+                        minified_bytes += len(d)
+                    transform_attr = f' transform="{inner_transform}"' if inner_transform else ''
+                    svg_parts.append(
+                        f'    <path id="{def_id}" d="{d}"{transform_attr} fill="#000000" />'
+                    )
+                svg_parts.append('  </defs>')
+            svg_parts += uses
+        else:
+            for glyphs in _fragments(result):
+                lines, before, after = self.fragment_cache.get(glyphs, flatten, precision, minify)
+                svg_parts += lines
+                path_bytes += before
+                minified_bytes += after
+
+        if stats is not None and minify is not None:
+            add_stats(stats, path_bytes=path_bytes, minified_bytes=minified_bytes)
+
+        svg_parts.append('</svg>')
+        return '\n'.join(svg_parts) + '\n'
+
+    def render(self, text, use_defs=False, flatten=False, minify=None):
+        """Render a phrase straight to SVG bytes without touching output/."""
+        svg = self.to_svg(self.layout(text), use_defs=use_defs, flatten=flatten, minify=minify)
+        return svg.encode('utf-8')
+
+    def output_files(self, result, use_defs=False, flatten=False, minify=None,
+                     output_dir=OUTPUT_DIR, stats=None):
+        """(path, bytes) pairs to write for a RenderResult: the SVG and its
+        .wiki.txt sidecar. If a dict is passed as stats, the time taken is
+        added to its serialize_seconds (and see to_svg())."""
+        start = perf_counter()
+        svg_path = Path(output_dir) / output_filename(result.text)
+        svg = self.to_svg(result, use_defs=use_defs, flatten=flatten, minify=minify,
+                          stats=stats)
+        files = [
+            (svg_path, svg.encode('utf-8')),
+            (svg_path.with_name(f'{svg_path.name}.wiki.txt'),
+             to_sidecar(result).encode('utf-8')),
+        ]
+        if stats is not None:
+            add_stats(stats, serialize_seconds=perf_counter() - start)
+        return files
+
+    def generate(self, text, use_defs=False, dependencies=None, output_dir=OUTPUT_DIR,
+                 writer=None, flatten=False, minify=None, stats=None):
+        """Generate a composed SVG for the given toki pona phrase and write it,
+        with its .wiki.txt sidecar, to output_dir.
+
+        layout() and to_svg() do the work; this adds the progress output and
+        the files. If writer (an output_writer.BackgroundWriter) is given the
+        files are handed to it instead of being written before returning.
+        What was matched and loaded is logged at debug level, so batch runs
+        pay nothing for it unless debug logging is on.
+
+        If a list is passed as dependencies, every glyph file the output
+        depends on is appended to it (see glyph_dependencies()). With minify,
+        the bytes saved are printed. If a dict is passed as stats, the time
+        spent in each of STAGES and the minification byte counts are added to
+        it (see layout(), output_files() and to_svg()), and so are the files
+        and bytes written, unless a writer does the writing.
+        """
+        import logging
+        logger = logging.getLogger(LOGGER_NAME)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        file_stats = {}
+        result = self.layout(text, dependencies, stats=file_stats)
+        if debug:
+            lines = [f'Input: {text}'] + layout_lines(result, len(self.compound_index()))
+            logger.debug('\n'.join(lines))
+
+        files = self.output_files(result, use_defs=use_defs, flatten=flatten, minify=minify,
+                                  output_dir=output_dir, stats=file_stats)
+        if debug and 'path_bytes' in file_stats:
+            before, after = file_stats['path_bytes'], file_stats['minified_bytes']
+            logger.debug('  Path data: %d -> %d bytes (%d saved, %.0f%%)',
+                         before, after, before - after, 100 * (1 - after / before))
+        if writer is not None:
+            writer.submit(files)
+        else:
+            start = perf_counter()
+            write_files(files)
+            add_stats(file_stats, write_seconds=perf_counter() - start, files_written=len(files),
+                      bytes_written=sum(len(data) for _, data in files))
+        if stats is not None:
+            add_stats(stats, **file_stats)
 
-    # Write a Commons-friendly description + categories sidecar
-    sidecar_name = f'{output_name}.wiki.txt'
-    sidecar_path = output_dir / sidecar_name
-    sidecar_lines = description_lines + [''] + categories
-    with open(str(sidecar_path), 'w', encoding='utf-8') as f:
-        f.write('\n'.join(sidecar_lines) + '\n')
+        output_path = files[0][0]
+        logger.debug('  Output: %s', output_path)
+        return output_path
 
-    print(f'\n  Output: {output_path}')
-    return output_path
 
+DEFAULT_RENDERER = Renderer(
+    compound_index_file=COMPOUND_INDEX_FILE,
+    glyph_cache=GLYPH_CACHE,
+    fragment_cache=FRAGMENT_CACHE,
+)
 
-if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print('Usage: python generate_sitelen_kalama_pona.py "jan sewi Amatelasu"')
-        sys.exit(1)
 
-    text = sys.argv[1]
-    generate(text)
+def get_compound_index():
+    """Compound trie for sitelen_seli_kiwen_svgs/, built once per process."""
+    return DEFAULT_RENDERER.compound_index()
+
+
+def get_available_compounds():
+    """Names of the compound SVG files (those with hyphens)."""
+    return set(get_compound_index())
+
+
+def set_cartouche_source(source):
+    """Use a different cartouche for DEFAULT_RENDERER (see Renderer)."""
+    DEFAULT_RENDERER.set_cartouche_source(source)
+
+
+def get_cartouche():
+    """The cartouche template, loaded from the current source once per process."""
+    return DEFAULT_RENDERER.cartouche()
+
+
+def cartouche_file():
+    return DEFAULT_RENDERER.cartouche_file()
+
+
+def word_svg_file(word):
+    return DEFAULT_RENDERER.word_svg_file(word)
+
+
+def syllable_svg_file(syllable):
+    return DEFAULT_RENDERER.syllable_svg_file(syllable)
+
+
+def glyph_dependencies(text):
+    return DEFAULT_RENDERER.glyph_dependencies(text)
+
+
+def layout(text, dependencies=None):
+    return DEFAULT_RENDERER.layout(text, dependencies)
+
+
+def to_svg(result, **options):
+    return DEFAULT_RENDERER.to_svg(result, **options)
+
+
+def render(text, **options):
+    return DEFAULT_RENDERER.render(text, **options)
+
+
+def output_files(result, **options):
+    return DEFAULT_RENDERER.output_files(result, **options)
+
+
+def generate(text, **options):
+    return DEFAULT_RENDERER.generate(text, **options)
+
+
+def _parse_record(line):
+    """A stream line as a dict with 'label' (and any other fields)."""
+    if line.startswith('{'):
+        record = json.loads(line)
+        if not isinstance(record, dict) or not isinstance(record.get('label'), str):
+            raise ValueError('JSON records need a "label" string')
+        return record
+    return {'label': line}
+
+
+def stream(lines, out, use_defs=False, flatten=False, minify=None, inline=False,
+           output_dir=OUTPUT_DIR, renderer=None):
+    """Render every phrase or JSON record in lines, writing one NDJSON
+    result per input line to out (flushed after each line).
+
+    Returns (succeeded, failed) counts. Blank lines are skipped.
+    """
+    renderer = renderer or DEFAULT_RENDERER
+    succeeded = failed = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        result = {}
+        try:
+            record = _parse_record(line)
+            if 'qid' in record:
+                result['qid'] = record['qid']
+            result['label'] = record['label']
+            layout_result = renderer.layout(record['label'])
+            if inline:
+                result['svg'] = renderer.to_svg(layout_result, use_defs=use_defs, flatten=flatten,
+                                       minify=minify)
+            else:
+                files = renderer.output_files(layout_result, use_defs=use_defs, flatten=flatten,
+                                     minify=minify, output_dir=output_dir)
+                write_files(files)
+                result['output'] = str(files[0][0])
+            result['width'] = round(layout_result.width)
+            succeeded += 1
+        except Exception as exc:
+            if 'label' not in result:
+                result['input'] = line
+            result['error'] = str(exc)
+            failed += 1
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+        out.flush()
+    return succeeded, failed
+
+
+def use_utf8_stdout():
+    """Rewrap sys.stdout as UTF-8, for consoles whose default encoding
+    cannot print the phrases. Called by the command-line entry points only,
+    so importing this module leaves sys.stdout alone."""
+    if sys.stdout and hasattr(sys.stdout, 'buffer'):
+        try:
+            sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+        except Exception:
+            pass
+
+
+def main():
+    import argparse
+    import logging
+
+    logger = logging.getLogger(LOGGER_NAME)
+    use_utf8_stdout()
+    parser = argparse.ArgumentParser(description='Generate a sitelen kalama pona SVG.')
+    parser.add_argument('text', nargs='?', help='toki pona phrase, e.g. "jan sewi Amatelasu"')
+    parser.add_argument('--stdin', action='store_true',
+                        help='read phrases or JSON records from stdin, write NDJSON results')
+    parser.add_argument('--inline', action='store_true',
+                        help='with --stdin, return the SVG in each result instead of writing files')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--defs', action='store_true',
+                      help='emit each distinct glyph once in <defs> and place it with <use>')
+    mode.add_argument('--flatten', action='store_true',
+                      help='bake transforms into absolute path coordinates')
+    parser.add_argument('--minify', type=int, nargs='?', const=2, metavar='PRECISION',
+                        help='minify path data, keeping PRECISION decimal places (default: 2)')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                        help='only print the output path (with --stdin, only errors)')
+    args = parser.parse_args()
+    if args.stdin == bool(args.text):
+        parser.error('give either a phrase or --stdin')
+
+    if args.stdin:
+        # stdout carries the NDJSON results
+        configure_logging(logging.WARNING if args.quiet else logging.INFO, sys.stderr)
+        stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        succeeded, failed = stream(stdin, sys.stdout, use_defs=args.defs, flatten=args.flatten,
+                                   minify=args.minify, inline=args.inline)
+        logger.info('%d rendered, %d failed', succeeded, failed)
+        sys.exit(1 if failed else 0)
+
+    configure_logging(logging.INFO if args.quiet else logging.DEBUG)
+    output_path = generate(args.text, use_defs=args.defs, flatten=args.flatten,
+                           minify=args.minify)
+    if args.quiet:
+        logger.info(output_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""
+Compile every glyph the renderer uses into a single bundle file.
+
+Parses the word SVGs in sitelen_seli_kiwen_svgs/, the syllable SVGs in
+uniform_syllables/ and the cartouche SVG once, and writes their path data,
+viewBoxes, flip flags, bounding boxes (including the cartouche's
+left/center/right segments) and the compound list to data/glyph_bundle.bin.
+
+generate_sitelen_kalama_pona maps the bundle with mmap. Opening it only reads
+the fixed-size header; a lookup binary-searches the sorted key table and
+decodes the one record it finds, so a process that renders one phrase reads
+a few pages of the file, not an index of every glyph. Each record holds the
+mtime and size of its source SVG; a record whose source has changed since
+the bundle was built is ignored and that SVG is parsed from disk instead.
+
+File layout (integers are little-endian uint32):
+    8 bytes    magic (b'SKPBNDL2')
+    16 bytes   bbox algorithm (path_geometry.BBOX_ALGORITHM, NUL-padded)
+    12 bytes   file count, key width and length of the meta record
+    ...        key table: for each file, sorted by key, its path relative
+               to the repository root (UTF-8, NUL-padded to the key width)
+               and the offset and length of its record
+    ...        meta record: JSON with the compound list, the glyph
+               directories' mtimes and the cartouche segments
+    ...        file records: JSON with the stamp, viewBox, bounding boxes
+               and paths of one SVG; offsets count from the meta record
+
+Usage:
+    python glyph_bundle.py
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+from path_geometry import BBOX_ALGORITHM, batch_bboxes, union_bbox
+
+SCRIPT_DIR = Path(__file__).parent
+ROOT_DIR = SCRIPT_DIR.parent
+BUNDLE_FILE = ROOT_DIR / 'data' / 'glyph_bundle.bin'
+
+MAGIC = b'SKPBNDL2'
+HEADER = struct.Struct('<8s16sIII')
+KEY_ENTRY = struct.Struct('<II')
+
+
+def _relative_key(path, root):
+    try:
+        return Path(path).relative_to(root).as_posix()
+    except ValueError:
+        return None
+
+
+class GlyphBundle:
+    """Read-only view of a compiled glyph bundle."""
+
+    def __init__(self, data, root=ROOT_DIR):
+        magic, bbox_algorithm, count, key_width, meta_len = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError('Not a glyph bundle')
+        if bbox_algorithm.rstrip(b'\0').decode('ascii') != BBOX_ALGORITHM:
+            raise ValueError('Glyph bundle bboxes are out of date')
+        self.root = Path(root)
+        self._data = data
+        self._count = count
+        self._key_width = key_width
+        self._entry_size = key_width + KEY_ENTRY.size
+        self._meta_start = HEADER.size + count * self._entry_size
+        self._meta_len = meta_len
+        self._meta = None
+
+    @classmethod
+    def open(cls, bundle_file, root=ROOT_DIR):
+        """Map bundle_file into memory. Returns None if missing or invalid."""
+        try:
+            with open(bundle_file, 'rb') as f:
+                try:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    data = f.read()
+            return cls(data, root)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def _record(self, offset, length):
+        start = self._meta_start + offset
+        return json.loads(self._data[start:start + length].decode('utf-8'))
+
+    def meta(self):
+        """The meta record (compounds, dir_mtimes, cartouche), decoded once."""
+        if self._meta is None:
+            self._meta = self._record(0, self._meta_len)
+        return self._meta
+
+    def _find(self, key):
+        """(offset, length) of key's record, or None."""
+        target = key.encode('utf-8')
+        if len(target) > self._key_width:
+            return None
+        target = target.ljust(self._key_width, b'\0')
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = HEADER.size + mid * self._entry_size
+            found = self._data[start:start + self._key_width]
+            if found < target:
+                lo = mid + 1
+            elif found > target:
+                hi = mid
+            else:
+                return KEY_ENTRY.unpack_from(self._data, start + self._key_width)
+        return None
+
+    def lookup(self, svg_file, stamp, make_path):
+        """Return (paths, labeled_paths, viewbox, bbox, label_bboxes) for an
+        SVG, or None if it isn't bundled or has changed since the build.
+        make_path(d, transform, flip) builds each path (the generator passes
+        glyph_path)."""
+        key = _relative_key(svg_file, self.root)
+        found = self._find(key) if key is not None else None
+        if found is None:
+            return None
+        info = self._record(*found)
+        if tuple(info['stamp']) != tuple(stamp):
+            return None
+
+        labeled_paths = tuple(
+            (label, make_path(d, transform, flip))
+            for d, transform, label, flip in info['paths']
+        )
+        paths = tuple(p for _, p in labeled_paths[:info['path_count']])
+
+        bbox = tuple(info['bbox']) if info['bbox'] else None
+        label_bboxes = {
+            label: tuple(b) if b else None
+            for label, b in info['label_bboxes'].items()
+        }
+        return paths, labeled_paths, tuple(info['viewbox']), bbox, label_bboxes
+
+    def compound_index(self, words_dir):
+        """CompoundIndex from the bundle, or None if words_dir has changed."""
+        from compound_index import CompoundIndex
+
+        key = _relative_key(words_dir, self.root)
+        try:
+            current = Path(words_dir).stat().st_mtime_ns
+        except OSError:
+            return None
+        meta = self.meta()
+        if key is None or meta['dir_mtimes'].get(key) != current:
+            return None
+        return CompoundIndex(meta['compounds'])
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def build_bundle(bundle_file=BUNDLE_FILE, root=ROOT_DIR):
+    """Parse every glyph SVG under root (the repository by default) and write
+    the bundle. Returns the file count."""
+    import generate_sitelen_kalama_pona as gen
+    from compound_index import CompoundIndex
+
+    root = Path(root)
+    words_dir, syllables_dir, cartouche_svg = (
+        root / p.relative_to(ROOT_DIR)
+        for p in (gen.WORD_SVGS_DIR, gen.SYLLABLES_DIR, gen.CARTOUCHE_SVG)
+    )
+    svg_files = sorted(words_dir.glob('Sitelen seli kiwen - *.svg'))
+    svg_files += sorted(syllables_dir.glob('sitelen kalama pona - *.svg'))
+    if cartouche_svg.exists():
+        svg_files.append(cartouche_svg)
+
+    entries = []
+    for svg_file in svg_files:
+        st = svg_file.stat()
+        entries.append(gen._parse_glyph_svg(svg_file, (st.st_mtime_ns, st.st_size),
+                                            with_bboxes=False))
+
+    # Bounds of every path in every glyph, computed in one batch
+    all_paths = [path for entry in entries for _, path in entry.labeled_paths]
+    path_bboxes = dict(zip(map(id, all_paths), batch_bboxes([p['d'] for p in all_paths])))
+
+    records = {}
+    for svg_file, entry in zip(svg_files, entries):
+        by_label = {}
+        for label, path in entry.labeled_paths:
+            if label is not None:
+                by_label.setdefault(label, []).append(path_bboxes[id(path)])
+        bbox = union_bbox(path_bboxes[id(p)] for p in entry.paths)
+        label_bboxes = {label: union_bbox(bs) for label, bs in by_label.items()}
+
+        records[_relative_key(svg_file, root)] = {
+            'stamp': list(entry.stamp),
+            'viewbox': list(entry.viewbox),
+            'bbox': list(bbox) if bbox else None,
+            'label_bboxes': {
+                label: list(b) if b else None
+                for label, b in label_bboxes.items()
+            },
+            # read_svg_paths returns a prefix of the labeled paths
+            'path_count': len(entry.paths),
+            'paths': [[path['d'], path['transform'], label, path['flip']]
+                      for label, path in entry.labeled_paths],
+        }
+
+    cartouche = None
+    cartouche_key = _relative_key(cartouche_svg, root)
+    if cartouche_key in records:
+        bboxes = records[cartouche_key]['label_bboxes']
+        cartouche = {
+            'file': cartouche_key,
+            'segments': {label: bboxes.get(label) for label in gen.CARTOUCHE_LABELS},
+        }
+
+    meta = _dumps({
+        'compounds': list(CompoundIndex.scan(words_dir)),
+        'dir_mtimes': {
+            _relative_key(d, root): d.stat().st_mtime_ns
+            for d in (words_dir, syllables_dir) if d.exists()
+        },
+        'cartouche': cartouche,
+    })
+
+    keys = sorted(records, key=lambda k: k.encode('utf-8'))
+    key_width = max((len(k.encode('utf-8')) for k in keys), default=0)
+    table = bytearray()
+    blob = bytearray(meta)
+    for key in keys:
+        record = _dumps(records[key])
+        table += key.encode('utf-8').ljust(key_width, b'\0')
+        table += KEY_ENTRY.pack(len(blob), len(record))
+        blob += record
+
+    bundle_file = Path(bundle_file)
+    bundle_file.parent.mkdir(exist_ok=True)
+    tmp_file = bundle_file.with_name(bundle_file.name + '.tmp')
+    with open(tmp_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, BBOX_ALGORITHM.encode('ascii'), len(keys), key_width,
+                            len(meta)))
+        f.write(table)
+        f.write(blob)
+    os.replace(tmp_file, bundle_file)
+    return len(records)
+
+
+def main():
+    count = build_bundle(BUNDLE_FILE)
+    if not count:
+        print('No glyph SVGs found!', file=sys.stderr)
+        sys.exit(1)
+    size = BUNDLE_FILE.stat().st_size
+    print(f'Wrote {BUNDLE_FILE} ({count} glyph files, {size / 1024:.0f} KiB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Write rendered files to disk, either directly or from a background thread.
+
+generate_sitelen_kalama_pona.output_files() returns (path, bytes) pairs;
+write_files() writes them in the calling thread. BackgroundWriter accepts
+the same pairs through a bounded queue and writes them from a single I/O
+thread, so rendering can carry on while the disk catches up:
+
+    with BackgroundWriter() as writer:
+        for text in phrases:
+            generate(text, writer=writer)
+
+Errors raised while writing are re-raised by close() (and so at the end of
+the with block). files_written, bytes_written and write_seconds count what
+the I/O thread has done.
+"""
+
+import queue
+import threading
+from pathlib import Path
+from time import perf_counter
+
+
+def write_files(files):
+    """Write (path, bytes) pairs, creating parent directories as needed."""
+    for path, data in files:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+
+class BackgroundWriter:
+    """Writes submitted files in order from a daemon thread."""
+
+    def __init__(self, maxsize=256):
+        self._queue = queue.Queue(maxsize)
+        self._error = None
+        self.files_written = 0
+        self.bytes_written = 0
+        self.write_seconds = 0.0
+        self._thread = threading.Thread(target=self._run, name='output-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            files = self._queue.get()
+            if files is None:
+                break
+            if self._error is None:
+                try:
+                    start = perf_counter()
+                    write_files(files)
+                    self.write_seconds += perf_counter() - start
+                    self.files_written += len(files)
+                    self.bytes_written += sum(len(data) for _, data in files)
+                except Exception as exc:
+                    self._error = exc
+
+    def submit(self, files):
+        """Queue (path, bytes) pairs; blocks while the queue is full."""
+        if self._error is not None:
+            raise self._error
+        self._queue.put(list(files))
+
+    def close(self):
+        """Wait for every queued file to be written."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,11 +1,19 @@
+import argparse
 import os
-import re
-import glob
+
+from path_geometry import minify_path
+from sfdir import SFDir
 
 SFDIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), '..sfdir')
 OUTDIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uniform_syllables')
 
-ASCENT = 800  # from font.props
+ASCENT = 800  # overridden by font.props when it is read
+
+GLYPH_SUFFIX = '.sitelen_kalama_pona'
+
+# Decimal places kept by the path minifier (contours_to_path writes 2, so the
+# default loses nothing). Override with --precision N.
+MINIFY_PRECISION = 2
 
 consonants = ['x', 'm', 'n', 'p', 't', 'k', 'w', 'j', 'l', 's']
 vowels = ['a', 'an', 'e', 'en', 'i', 'in', 'o', 'on', 'u', 'un']
@@ -28,73 +36,35 @@ for c in consonants:
         syllable_to_svgname[glyph_name] = svg_syllable
 
 
-def parse_splineset(lines):
-    """Parse FontForge SplineSet into SVG path data, flipping Y axis."""
-    path_parts = []
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        if not line or line == 'EndSplineSet':
-            break
-
-        tokens = line.split()
-
-        if len(tokens) >= 3 and tokens[-2] == 'm':
-            # Move to: x y m flag
-            x = float(tokens[0])
-            y = ASCENT - float(tokens[1])
-            path_parts.append(f'M {x:.2f},{y:.2f}')
-
-        elif len(tokens) >= 3 and tokens[-2] == 'l':
-            # Line to: x y l flag
-            x = float(tokens[0])
-            y = ASCENT - float(tokens[1])
-            path_parts.append(f'L {x:.2f},{y:.2f}')
-
-        elif len(tokens) >= 7 and tokens[-2] == 'c':
-            # Cubic bezier: cp1x cp1y cp2x cp2y x y c flag
-            cp1x = float(tokens[0])
-            cp1y = ASCENT - float(tokens[1])
-            cp2x = float(tokens[2])
-            cp2y = ASCENT - float(tokens[3])
-            x = float(tokens[4])
-            y = ASCENT - float(tokens[5])
-            path_parts.append(f'C {cp1x:.2f},{cp1y:.2f} {cp2x:.2f},{cp2y:.2f} {x:.2f},{y:.2f}')
-
-        i += 1
-
+def contours_to_path(contours, ascent=ASCENT):
+    """SVG path data for FontForge contours, flipping the Y axis."""
+    subpaths = []
+    for contour in contours:
+        path_parts = []
+        for seg in contour:
+            if seg[0] == 'm':
+                path_parts.append(f'M {seg[1]:.2f},{ascent - seg[2]:.2f}')
+            elif seg[0] == 'l':
+                path_parts.append(f'L {seg[1]:.2f},{ascent - seg[2]:.2f}')
+            else:
+                cp1x, cp1y, cp2x, cp2y, x, y = seg[1:]
+                path_parts.append(f'C {cp1x:.2f},{ascent - cp1y:.2f} '
+                                  f'{cp2x:.2f},{ascent - cp2y:.2f} {x:.2f},{ascent - y:.2f}')
+        subpaths.append(' '.join(path_parts))
     # Close each subpath
-    path_data = ' '.join(path_parts)
-    # Add Z to close paths at each new M (except the first)
-    # Split on M, add Z before each subsequent M
-    segments = path_data.split('M ')
-    result = ''
-    for j, seg in enumerate(segments):
-        if not seg.strip():
-            continue
-        if j > 1:  # close previous subpath
-            result += ' Z '
-        result += 'M ' + seg
-    result += ' Z'
-    return result
-
+    return '  Z '.join(subpaths) + ' Z'
 
-def glyph_to_svg(glyph_path, svg_syllable):
-    """Convert a .glyph file to an SVG file."""
-    with open(glyph_path, 'r', encoding='utf-8') as f:
-        content = f.read()
 
-    # Extract Width
-    width_match = re.search(r'Width:\s+(\d+)', content)
-    width = int(width_match.group(1)) if width_match else 1000
-
-    # Extract SplineSet
-    spline_match = re.search(r'SplineSet\n(.*?)EndSplineSet', content, re.DOTALL)
-    if not spline_match:
+def glyph_to_svg(glyph, svg_syllable, minify=True, precision=MINIFY_PRECISION, ascent=ASCENT):
+    """Convert a parsed glyph (see sfdir.py) to SVG text, or None if it has
+    no outlines."""
+    if glyph.contours is None:
         return None
+    width = glyph.width
 
-    spline_lines = spline_match.group(1).strip().split('\n')
-    path_data = parse_splineset(spline_lines)
+    path_data = contours_to_path(glyph.contours, ascent)
+    if minify:
+        path_data = minify_path(path_data, precision)
 
     height = 1000  # ascent + descent
     svg_name = f'sitelen kalama pona - {svg_syllable}'
@@ -116,29 +86,47 @@ def glyph_to_svg(glyph_path, svg_syllable):
     return svg
 
 
-# Process all glyphs
-count = 0
-for glyph_name, svg_syllable in sorted(syllable_to_svgname.items()):
-    # Find glyph file
-    glyph_filename = f'{glyph_name}.sitelen_kalama_pona.glyph'
-    glyph_path = os.path.join(SFDIR, glyph_filename)
+def main():
+    parser = argparse.ArgumentParser(description='Export the syllable SVGs from the .glyph sources.')
+    parser.add_argument('--precision', type=int, default=MINIFY_PRECISION,
+                        help=f'decimal places kept in path data (default: {MINIFY_PRECISION})')
+    args = parser.parse_args()
+
+    font = SFDir.read(SFDIR)
+    count = 0
+    total_before = total_after = 0
+    for glyph_name, svg_syllable in sorted(syllable_to_svgname.items()):
+        glyph = font.glyphs.get(glyph_name + GLYPH_SUFFIX)
+        if glyph is None:
+            print(f'  MISSING glyph: {glyph_name}{GLYPH_SUFFIX}.glyph')
+            continue
+
+        svg_filename = f'sitelen kalama pona - {svg_syllable}.svg'
+        svg_path = os.path.join(OUTDIR, svg_filename)
+
+        svg_content = glyph_to_svg(glyph, svg_syllable, precision=args.precision,
+                                   ascent=font.ascent)
+        if svg_content is None:
+            print(f'  NO SPLINES: {glyph_name}')
+            continue
 
-    if not os.path.exists(glyph_path):
-        print(f'  MISSING glyph: {glyph_filename}')
-        continue
+        with open(svg_path, 'w', encoding='utf-8') as f:
+            f.write(svg_content)
 
-    svg_filename = f'sitelen kalama pona - {svg_syllable}.svg'
-    svg_path = os.path.join(OUTDIR, svg_filename)
+        before = len(glyph_to_svg(glyph, svg_syllable, minify=False,
+                                  ascent=font.ascent).encode('utf-8'))
+        after = len(svg_content.encode('utf-8'))
+        total_before += before
+        total_after += after
 
-    svg_content = glyph_to_svg(glyph_path, svg_syllable)
-    if svg_content is None:
-        print(f'  NO SPLINES: {glyph_name}')
-        continue
+        count += 1
+        print(f'  {glyph_name} -> {svg_filename} ({before} -> {after} bytes, {before - after} saved)')
 
-    with open(svg_path, 'w', encoding='utf-8') as f:
-        f.write(svg_content)
+    print(f'\nDone! Wrote {count} SVG files to {OUTDIR}')
+    if total_before:
+        print(f'Minified path data saved {total_before - total_after} of {total_before} bytes '
+              f'({1 - total_after / total_before:.0%})')
 
-    count += 1
-    print(f'  {glyph_name} -> {svg_filename}')
 
-print(f'\nDone! Wrote {count} SVG files to {OUTDIR}')
+if __name__ == '__main__':
+    main()
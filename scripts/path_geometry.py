@@ -0,0 +1,778 @@
+"""
+Parse SVG path data into compact numeric arrays and compute exact bounds.
+
+parse_path() tokenizes a `d` string once and normalizes it to absolute
+coordinates: H/V become line ends, S/T are expanded to full cubic/quadratic
+segments with their reflected control points. The result keeps four flat
+array('d') buffers:
+
+    points   x, y            every segment end point (and move-to)
+    cubics   x0 y0 .. x3 y3  one row of 8 per cubic Bezier
+    quads    x0 y0 .. x2 y2  one row of 6 per quadratic Bezier
+    arcs     x0 y0 rx ry phi large sweep x1 y1   one row of 9 per arc
+
+Bounding boxes are exact: curve extrema come from the roots of the curve's
+derivative, and arcs are converted to center parameterization, rather than
+taking control points as an approximation.
+
+batch_bboxes() computes the bounds of many paths at once in a vectorized
+NumPy pass when numpy is installed, and falls back to pure Python otherwise.
+numpy is imported on the first call, so importing this module stays cheap.
+
+iter_segments() yields the same normalized segments one at a time, and
+transform_path() uses it to bake an affine transform (see parse_transform())
+into the coordinates of a path. transform_segments() and format_segments()
+are its two halves, for callers that place the same transformed path at
+several x offsets.
+"""
+
+import math
+import re
+from array import array
+
+# Set by _load_numpy() on first use; None if numpy is not installed
+np = None
+_numpy_loaded = False
+
+# Stored alongside precomputed bboxes (e.g. in the glyph bundle) so that they
+# are recomputed when the algorithm changes.
+BBOX_ALGORITHM = 'exact-1'
+
+_COMMAND_RE = re.compile(r'([MmLlHhVvCcSsQqTtAaZz])')
+_NUMBER_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+# Numbers consumed by one segment of each command
+ARITY = {'M': 2, 'L': 2, 'T': 2, 'H': 1, 'V': 1, 'C': 6, 'S': 4, 'Q': 4, 'A': 7, 'Z': 0}
+
+_ROW = {'cubics': 8, 'quads': 6, 'arcs': 9}
+_TAU = 2 * math.pi
+
+
+class PathGeometry:
+    """Absolute path segments of one `d` string in flat float arrays."""
+
+    __slots__ = ('points', 'cubics', 'quads', 'arcs')
+
+    def __init__(self):
+        self.points = array('d')
+        self.cubics = array('d')
+        self.quads = array('d')
+        self.arcs = array('d')
+
+    def __bool__(self):
+        return bool(self.points)
+
+
+def _arc_numbers(text):
+    """Numbers of an arc command, splitting flags written without separators
+    ("a1 1 0 01.5.5" -> 1 1 0 0 1 .5 .5)."""
+    tokens = _NUMBER_RE.findall(text)
+    nums = []
+    k = 0
+    while k < len(tokens):
+        tok = tokens[k]
+        if len(nums) % 7 in (3, 4) and len(tok) > 1 and tok[0] in '01':
+            nums.append(float(tok[0]))
+            tokens[k] = tok[1:]
+            continue
+        nums.append(float(tok))
+        k += 1
+    return nums
+
+
+def iter_segments(d):
+    """Yield the segments of SVG path data in absolute form.
+
+    Segments are tuples: ('M', x, y), ('L', x, y), ('C', x1, y1, x2, y2, x, y),
+    ('Q', x1, y1, x, y), ('A', rx, ry, phi, large, sweep, x, y) and ('Z',).
+    H/V become L, and S/T are expanded with their reflected control points.
+    Parsing stops at the first malformed command, keeping what came before,
+    as browsers do.
+    """
+    parts = _COMMAND_RE.split(d or '')
+    if _NUMBER_RE.search(parts[0]):
+        return
+
+    x = y = start_x = start_y = 0.0
+    prev_cubic = prev_quad = None  # reflected-control bookkeeping for S/T
+
+    for k in range(1, len(parts), 2):
+        cmd = parts[k]
+        c = cmd.upper()
+        rel = cmd != c
+        if c == 'A':
+            nums = _arc_numbers(parts[k + 1])
+        else:
+            nums = [float(v) for v in _NUMBER_RE.findall(parts[k + 1])]
+
+        if c == 'Z':
+            x, y = start_x, start_y
+            prev_cubic = prev_quad = None
+            yield ('Z',)
+            if nums:
+                return
+            continue
+
+        arity = ARITY[c]
+        if not nums:
+            return
+        for j in range(0, len(nums) - arity + 1, arity):
+            ox, oy = (x, y) if rel else (0.0, 0.0)
+            cubic_ctrl = quad_ctrl = None
+
+            if c == 'M':
+                x, y = start_x, start_y = nums[j] + ox, nums[j + 1] + oy
+                segment = ('M', x, y)
+                c = 'L'  # further pairs are implicit line-tos
+            elif c == 'L':
+                x, y = nums[j] + ox, nums[j + 1] + oy
+                segment = ('L', x, y)
+            elif c == 'H':
+                x = nums[j] + ox
+                segment = ('L', x, y)
+            elif c == 'V':
+                y = nums[j] + oy
+                segment = ('L', x, y)
+            elif c == 'C' or c == 'S':
+                if c == 'C':
+                    x1, y1 = nums[j] + ox, nums[j + 1] + oy
+                    j += 2
+                elif prev_cubic is None:
+                    x1, y1 = x, y
+                else:
+                    x1, y1 = 2 * x - prev_cubic[0], 2 * y - prev_cubic[1]
+                x2, y2 = nums[j] + ox, nums[j + 1] + oy
+                x, y = nums[j + 2] + ox, nums[j + 3] + oy
+                segment = ('C', x1, y1, x2, y2, x, y)
+                cubic_ctrl = (x2, y2)
+            elif c == 'Q' or c == 'T':
+                if c == 'Q':
+                    x1, y1 = nums[j] + ox, nums[j + 1] + oy
+                    j += 2
+                elif prev_quad is None:
+                    x1, y1 = x, y
+                else:
+                    x1, y1 = 2 * x - prev_quad[0], 2 * y - prev_quad[1]
+                x, y = nums[j] + ox, nums[j + 1] + oy
+                segment = ('Q', x1, y1, x, y)
+                quad_ctrl = (x1, y1)
+            else:  # A
+                rx, ry, phi, large, sweep = nums[j:j + 5]
+                x, y = nums[j + 5] + ox, nums[j + 6] + oy
+                segment = ('A', rx, ry, phi, large, sweep, x, y)
+
+            yield segment
+            prev_cubic = cubic_ctrl
+            prev_quad = quad_ctrl
+
+        if len(nums) % arity:
+            return
+
+
+def parse_path(d):
+    """Parse SVG path data into a PathGeometry.
+
+    Same normalization as iter_segments(), written out inline because this
+    is the hot path of every bbox computation.
+    """
+    geom = PathGeometry()
+    points, cubics, quads, arcs = geom.points, geom.cubics, geom.quads, geom.arcs
+    parts = _COMMAND_RE.split(d or '')
+    if _NUMBER_RE.search(parts[0]):
+        return geom
+
+    x = y = start_x = start_y = 0.0
+    prev_cubic = prev_quad = None  # reflected-control bookkeeping for S/T
+
+    for k in range(1, len(parts), 2):
+        cmd = parts[k]
+        c = cmd.upper()
+        rel = cmd != c
+        if c == 'A':
+            nums = _arc_numbers(parts[k + 1])
+        else:
+            nums = [float(v) for v in _NUMBER_RE.findall(parts[k + 1])]
+
+        if c == 'Z':
+            x, y = start_x, start_y
+            prev_cubic = prev_quad = None
+            if nums:
+                break
+            continue
+
+        arity = ARITY[c]
+        if not nums:
+            break
+        for j in range(0, len(nums) - arity + 1, arity):
+            ox, oy = (x, y) if rel else (0.0, 0.0)
+            cubic_ctrl = quad_ctrl = None
+
+            if c == 'M' or c == 'L':
+                x, y = nums[j] + ox, nums[j + 1] + oy
+                if c == 'M':
+                    start_x, start_y = x, y
+                    c = 'L'  # further pairs are implicit line-tos
+            elif c == 'H':
+                x = nums[j] + ox
+            elif c == 'V':
+                y = nums[j] + oy
+            elif c == 'C' or c == 'S':
+                if c == 'C':
+                    x1, y1 = nums[j] + ox, nums[j + 1] + oy
+                    j += 2
+                elif prev_cubic is None:
+                    x1, y1 = x, y
+                else:
+                    x1, y1 = 2 * x - prev_cubic[0], 2 * y - prev_cubic[1]
+                x2, y2 = nums[j] + ox, nums[j + 1] + oy
+                x3, y3 = nums[j + 2] + ox, nums[j + 3] + oy
+                cubics.extend((x, y, x1, y1, x2, y2, x3, y3))
+                cubic_ctrl = (x2, y2)
+                x, y = x3, y3
+            elif c == 'Q' or c == 'T':
+                if c == 'Q':
+                    x1, y1 = nums[j] + ox, nums[j + 1] + oy
+                    j += 2
+                elif prev_quad is None:
+                    x1, y1 = x, y
+                else:
+                    x1, y1 = 2 * x - prev_quad[0], 2 * y - prev_quad[1]
+                x2, y2 = nums[j] + ox, nums[j + 1] + oy
+                quads.extend((x, y, x1, y1, x2, y2))
+                quad_ctrl = (x1, y1)
+                x, y = x2, y2
+            else:  # A
+                rx, ry, phi, large, sweep = nums[j:j + 5]
+                nx, ny = nums[j + 5] + ox, nums[j + 6] + oy
+                if rx and ry and (nx, ny) != (x, y):
+                    arcs.extend((x, y, rx, ry, phi, large, sweep, nx, ny))
+                x, y = nx, ny
+
+            points.extend((x, y))
+            prev_cubic = cubic_ctrl
+            prev_quad = quad_ctrl
+
+        if len(nums) % arity:
+            break
+
+    return geom
+
+
+def _quadratic_roots(a, b, c):
+    """Real roots of a*t^2 + b*t + c strictly inside (0, 1)."""
+    if abs(a) < 1e-12:
+        if abs(b) < 1e-12:
+            return ()
+        roots = (-c / b,)
+    else:
+        disc = b * b - 4 * a * c
+        if disc < 0:
+            return ()
+        sq = math.sqrt(disc)
+        roots = ((-b + sq) / (2 * a), (-b - sq) / (2 * a))
+    return [t for t in roots if 0 < t < 1]
+
+
+def _arc_center(x0, y0, rx, ry, phi_deg, large, sweep, x1, y1):
+    """SVG endpoint -> center parameterization.
+
+    Returns (cx, cy, rx, ry, cos_phi, sin_phi, theta1, dtheta) with radii
+    scaled up if they are too small to span the end points.
+    """
+    phi = math.radians(phi_deg)
+    cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+    dx2, dy2 = (x0 - x1) / 2, (y0 - y1) / 2
+    x1p = cos_phi * dx2 + sin_phi * dy2
+    y1p = -sin_phi * dx2 + cos_phi * dy2
+    rx, ry = abs(rx), abs(ry)
+    lam = (x1p / rx) ** 2 + (y1p / ry) ** 2
+    if lam > 1:
+        s = math.sqrt(lam)
+        rx, ry = rx * s, ry * s
+    num = (rx * ry) ** 2 - (rx * y1p) ** 2 - (ry * x1p) ** 2
+    den = (rx * y1p) ** 2 + (ry * x1p) ** 2
+    coef = math.sqrt(max(0.0, num / den)) if den else 0.0
+    if large == sweep:
+        coef = -coef
+    cxp = coef * rx * y1p / ry
+    cyp = -coef * ry * x1p / rx
+    cx = cos_phi * cxp - sin_phi * cyp + (x0 + x1) / 2
+    cy = sin_phi * cxp + cos_phi * cyp + (y0 + y1) / 2
+    theta1 = math.atan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    theta2 = math.atan2((-y1p - cyp) / ry, (-x1p - cxp) / rx)
+    dtheta = theta2 - theta1
+    if not sweep and dtheta > 0:
+        dtheta -= _TAU
+    elif sweep and dtheta < 0:
+        dtheta += _TAU
+    return cx, cy, rx, ry, cos_phi, sin_phi, theta1, dtheta
+
+
+def _arc_extrema(row):
+    """Points where an arc reaches an x or y extreme between its ends."""
+    cx, cy, rx, ry, cos_phi, sin_phi, theta1, dtheta = _arc_center(*row)
+    candidates = []
+    for base in (math.atan2(-ry * sin_phi, rx * cos_phi),
+                 math.atan2(ry * cos_phi, rx * sin_phi)):
+        candidates += [base, base + math.pi]
+    found = []
+    for t in candidates:
+        if dtheta >= 0:
+            inside = (t - theta1) % _TAU <= dtheta
+        else:
+            inside = (theta1 - t) % _TAU <= -dtheta
+        if inside:
+            ct, st = math.cos(t), math.sin(t)
+            found.append((cx + rx * cos_phi * ct - ry * sin_phi * st,
+                          cy + rx * sin_phi * ct + ry * cos_phi * st))
+    return found
+
+
+def geometry_bbox(geom):
+    """Exact (min_x, min_y, max_x, max_y) of a PathGeometry, or None."""
+    if not geom.points:
+        return None
+    xs = list(geom.points[0::2])
+    ys = list(geom.points[1::2])
+
+    c = geom.cubics
+    for k in range(0, len(c), 8):
+        for vals, p0, p1, p2, p3 in ((xs, c[k], c[k + 2], c[k + 4], c[k + 6]),
+                                     (ys, c[k + 1], c[k + 3], c[k + 5], c[k + 7])):
+            for t in _quadratic_roots(p3 - 3 * p2 + 3 * p1 - p0,
+                                      2 * (p0 - 2 * p1 + p2),
+                                      p1 - p0):
+                mt = 1 - t
+                vals.append(mt ** 3 * p0 + 3 * mt * mt * t * p1
+                            + 3 * mt * t * t * p2 + t ** 3 * p3)
+
+    q = geom.quads
+    for k in range(0, len(q), 6):
+        for vals, p0, p1, p2 in ((xs, q[k], q[k + 2], q[k + 4]),
+                                 (ys, q[k + 1], q[k + 3], q[k + 5])):
+            denom = p0 - 2 * p1 + p2
+            if denom:
+                t = (p0 - p1) / denom
+                if 0 < t < 1:
+                    mt = 1 - t
+                    vals.append(mt * mt * p0 + 2 * mt * t * p1 + t * t * p2)
+
+    a = geom.arcs
+    for k in range(0, len(a), 9):
+        for px, py in _arc_extrema(a[k:k + 9]):
+            xs.append(px)
+            ys.append(py)
+
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def path_bbox(d):
+    """Exact bbox of SVG path data, or None if it draws nothing."""
+    return geometry_bbox(parse_path(d))
+
+
+def union_bbox(bboxes):
+    """Smallest bbox containing every non-None bbox, or None."""
+    result = None
+    for b in bboxes:
+        if not b:
+            continue
+        if result is None:
+            result = list(b)
+        else:
+            result[0] = min(result[0], b[0])
+            result[1] = min(result[1], b[1])
+            result[2] = max(result[2], b[2])
+            result[3] = max(result[3], b[3])
+    return tuple(result) if result is not None else None
+
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+_TRANSFORM_RE = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)')
+
+
+def multiply(m1, m2):
+    """Affine matrix m1 * m2 (m2 is applied first), as SVG (a b c d e f)."""
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (a1 * a2 + c1 * b2, b1 * a2 + d1 * b2,
+            a1 * c2 + c1 * d2, b1 * c2 + d1 * d2,
+            a1 * e2 + c1 * f2 + e1, b1 * e2 + d1 * f2 + f1)
+
+
+def parse_transform(text):
+    """Parse an SVG transform attribute into one (a b c d e f) matrix."""
+    result = IDENTITY
+    for name, args in _TRANSFORM_RE.findall(text or ''):
+        v = [float(n) for n in _NUMBER_RE.findall(args)]
+        if name == 'matrix' and len(v) == 6:
+            m = tuple(v)
+        elif name == 'translate' and v:
+            m = (1.0, 0.0, 0.0, 1.0, v[0], v[1] if len(v) > 1 else 0.0)
+        elif name == 'scale' and v:
+            m = (v[0], 0.0, 0.0, v[1] if len(v) > 1 else v[0], 0.0, 0.0)
+        elif name == 'rotate' and v:
+            a = math.radians(v[0])
+            m = (math.cos(a), math.sin(a), -math.sin(a), math.cos(a), 0.0, 0.0)
+            if len(v) == 3:
+                m = multiply(multiply((1.0, 0.0, 0.0, 1.0, v[1], v[2]), m),
+                             (1.0, 0.0, 0.0, 1.0, -v[1], -v[2]))
+        elif name == 'skewX' and v:
+            m = (1.0, 0.0, math.tan(math.radians(v[0])), 1.0, 0.0, 0.0)
+        elif name == 'skewY' and v:
+            m = (1.0, math.tan(math.radians(v[0])), 0.0, 1.0, 0.0, 0.0)
+        else:
+            continue
+        result = multiply(result, m)
+    return result
+
+
+def _transform_arc(m, rx, ry, phi):
+    """Radii and rotation of an arc's ellipse after the linear part of m."""
+    cos_phi, sin_phi = math.cos(math.radians(phi)), math.sin(math.radians(phi))
+    a, b, c, d = m[:4]
+    # Columns of the ellipse's matrix M * R(phi) * diag(rx, ry)
+    p, r = (a * cos_phi + c * sin_phi) * rx, (b * cos_phi + d * sin_phi) * rx
+    q, s = (c * cos_phi - a * sin_phi) * ry, (d * cos_phi - b * sin_phi) * ry
+    # Its singular values are the new radii; the left singular vector gives
+    # the new rotation
+    e, f = (p + s) / 2, (p - s) / 2
+    g, h = (r + q) / 2, (r - q) / 2
+    big, small = math.hypot(e, h), math.hypot(f, g)
+    angle = (math.atan2(h, e) + math.atan2(g, f)) / 2
+    return big + small, abs(big - small), math.degrees(angle)
+
+
+def format_number(value, precision):
+    """Shortest decimal for value rounded to precision digits."""
+    text = f'{value:.{precision}f}'
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    return '0' if text in ('-0', '') else text
+
+
+def transform_segments(d, matrix, precision=2):
+    """transform_path() before its coordinates are formatted.
+
+    Returns a list of (prefix, points): prefix is the command letter (for an
+    arc, with its radii, rotation and flags already formatted) and points
+    the transformed (x, y) pairs, unrounded, so that format_segments() can
+    still translate them.
+    """
+    a, b, c, dd, e, f = matrix
+    flips = a * dd - b * c < 0
+
+    def pt(x, y):
+        return (a * x + c * y + e, b * x + dd * y + f)
+
+    out = []
+    for seg in iter_segments(d):
+        cmd = seg[0]
+        if cmd == 'Z':
+            out.append(('Z', ()))
+        elif cmd == 'A':
+            rx, ry, phi, large, sweep, x, y = seg[1:]
+            if rx and ry:
+                rx, ry, phi = _transform_arc(matrix, abs(rx), abs(ry), phi)
+                if flips:
+                    sweep = 1 - sweep
+                out.append(('A{},{} {} {},{} '.format(
+                    format_number(rx, precision), format_number(ry, precision),
+                    format_number(phi, precision), int(large), int(sweep)), (pt(x, y),)))
+            else:
+                out.append(('L', (pt(x, y),)))
+        else:
+            coords = seg[1:]
+            out.append((cmd, tuple(pt(coords[k], coords[k + 1])
+                                   for k in range(0, len(coords), 2))))
+    return out
+
+
+def format_segments(segments, precision=2, dx=0.0):
+    """Path data for transform_segments() output, moved dx along x."""
+    return ''.join(
+        prefix + ' '.join(format_number(x + dx, precision) + ',' + format_number(y, precision)
+                          for x, y in points)
+        for prefix, points in segments
+    )
+
+
+def transform_path(d, matrix, precision=2):
+    """Apply an affine matrix to SVG path data.
+
+    Returns absolute path data (M/L/C/Q/A/Z) with every coordinate rounded
+    to precision decimal places.
+    """
+    return format_segments(transform_segments(d, matrix, precision), precision)
+
+
+def _format_units(value, precision):
+    """Format an integer count of 10**-precision units as a short decimal
+    (1250 at precision 2 -> '12.5', -50 -> '-.5')."""
+    if not precision:
+        return str(value)
+    sign = '-' if value < 0 else ''
+    digits = str(abs(value)).rjust(precision + 1, '0')
+    whole, frac = digits[:-precision], digits[-precision:].rstrip('0')
+    if whole == '0' and frac:
+        whole = ''
+    return sign + whole + ('.' + frac if frac else '')
+
+
+def _needs_separator(prev, num):
+    """False when num can follow prev directly: before a minus sign, or
+    before '.5' when prev already has a decimal point."""
+    return not (num[0] == '-' or (num[0] == '.' and '.' in prev))
+
+
+def _join_numbers(numbers):
+    out = numbers[0]
+    for prev, num in zip(numbers, numbers[1:]):
+        out += (' ' if _needs_separator(prev, num) else '') + num
+    return out
+
+
+# Numbers after a command without a new letter repeat that command, except
+# after a move-to, where they are line-tos
+_IMPLICIT = {'M': 'L', 'm': 'l'}
+
+
+def minify_path(d, precision=2):
+    """Rewrite SVG path data in its shortest form.
+
+    Coordinates are quantized to precision decimal places (absolute
+    positions are rounded, so relative steps never accumulate error).
+    Each segment is written absolute or relative, whichever is shorter;
+    lines become H/V where possible, curves become S/T when their first
+    control point is the reflection of the previous one, repeated command
+    letters and zero-length lines are dropped, and numbers lose leading
+    and trailing zeroes.
+    """
+    k = 10 ** precision
+    out = []
+    last_cmd = last_number = None
+    x = y = start_x = start_y = 0
+    prev_cubic = prev_quad = None
+
+    def q(v):
+        return int(round(v * k))
+
+    def rel(values):
+        return [v - (y if i % 2 else x) for i, v in enumerate(values)]
+
+    def emit(*options):
+        """Append the shortest of the (cmd, values) options."""
+        nonlocal last_cmd, last_number
+        chosen = None
+        for cmd, values in options:
+            numbers = [_format_units(v, precision) for v in values]
+            text = _join_numbers(numbers)
+            implicit = _IMPLICIT.get(last_cmd, last_cmd)
+            if cmd == implicit and last_number is not None:
+                if _needs_separator(last_number, numbers[0]):
+                    text = ' ' + text
+            else:
+                text = cmd + text
+            if chosen is None or len(text) < len(chosen[0]):
+                chosen = (text, cmd, numbers[-1])
+        text, last_cmd, last_number = chosen
+        out.append(text)
+
+    for seg in iter_segments(d):
+        cmd = seg[0]
+        cubic_ctrl = quad_ctrl = None
+        if cmd == 'Z':
+            out.append('z')
+            last_cmd, last_number = 'z', None
+            x, y = start_x, start_y
+            prev_cubic = prev_quad = None
+            continue
+
+        if cmd == 'A':
+            head = [q(seg[1]), q(seg[2]), q(seg[3]), int(seg[4]) * k, int(seg[5]) * k]
+            px, py = q(seg[6]), q(seg[7])
+            emit(('A', head + [px, py]), ('a', head + rel([px, py])))
+        else:
+            pts = [q(v) for v in seg[1:]]
+            px, py = pts[-2], pts[-1]
+            if cmd == 'M':
+                emit(('M', pts), ('m', rel(pts)))
+                start_x, start_y = px, py
+            elif cmd == 'L':
+                if (px, py) == (x, y):
+                    continue
+                if py == y:
+                    emit(('H', [px]), ('h', [px - x]))
+                elif px == x:
+                    emit(('V', [py]), ('v', [py - y]))
+                else:
+                    emit(('L', pts), ('l', rel(pts)))
+            elif cmd == 'C':
+                cubic_ctrl = (pts[2], pts[3])
+                reflected = (x, y) if prev_cubic is None else (
+                    2 * x - prev_cubic[0], 2 * y - prev_cubic[1])
+                if (pts[0], pts[1]) == reflected:
+                    emit(('S', pts[2:]), ('s', rel(pts[2:])))
+                else:
+                    emit(('C', pts), ('c', rel(pts)))
+            else:  # Q
+                quad_ctrl = (pts[0], pts[1])
+                reflected = (x, y) if prev_quad is None else (
+                    2 * x - prev_quad[0], 2 * y - prev_quad[1])
+                if quad_ctrl == reflected:
+                    emit(('T', pts[2:]), ('t', rel(pts[2:])))
+                else:
+                    emit(('Q', pts), ('q', rel(pts)))
+
+        x, y = px, py
+        prev_cubic = cubic_ctrl
+        prev_quad = quad_ctrl
+
+    return ''.join(out)
+
+
+def _load_numpy():
+    global np, _numpy_loaded
+    if not _numpy_loaded:
+        _numpy_loaded = True
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np
+
+
+def _gather(geoms, field):
+    """Concatenate one buffer of every geometry into an (n, row) array plus
+    the index of the geometry each row came from."""
+    width = _ROW.get(field, 2)
+    data = array('d')
+    counts = []
+    for g in geoms:
+        buf = getattr(g, field)
+        data.extend(buf)
+        counts.append(len(buf) // width)
+    values = np.frombuffer(data, dtype=np.float64).reshape(-1, width)
+    owner = np.repeat(np.arange(len(geoms)), counts)
+    return values, owner
+
+
+def _bezier_extrema(coeffs, roots_of, evaluate, owner, out_min, out_max):
+    """Fold per-axis curve extrema into out_min/out_max by owner."""
+    t = roots_of(*coeffs)
+    valid = np.isfinite(t) & (t > 0) & (t < 1)
+    if not valid.any():
+        return
+    values = evaluate(np.where(valid, t, 0.0))
+    rows = np.broadcast_to(owner[:, None], t.shape)[valid]
+    np.minimum.at(out_min, rows, values[valid])
+    np.maximum.at(out_max, rows, values[valid])
+
+
+def _batch_bboxes_numpy(geoms):
+    n = len(geoms)
+    lo = np.full((2, n), np.inf)
+    hi = np.full((2, n), -np.inf)
+
+    pts, owner = _gather(geoms, 'points')
+    for axis in (0, 1):
+        np.minimum.at(lo[axis], owner, pts[:, axis])
+        np.maximum.at(hi[axis], owner, pts[:, axis])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cubics, owner = _gather(geoms, 'cubics')
+        if len(cubics):
+            for axis in (0, 1):
+                p0, p1, p2, p3 = (cubics[:, 2 * k + axis] for k in range(4))
+
+                def cubic_roots(a, b, c):
+                    disc = np.sqrt(b * b - 4 * a * c)
+                    linear = np.abs(a) < 1e-12
+                    a_safe = np.where(linear, 1.0, a)
+                    r1 = np.where(linear, -c / b, (-b + disc) / (2 * a_safe))
+                    r2 = np.where(linear, np.nan, (-b - disc) / (2 * a_safe))
+                    return np.stack([r1, r2], axis=1)
+
+                def cubic_at(t, p0=p0, p1=p1, p2=p2, p3=p3):
+                    mt = 1 - t
+                    return (mt ** 3 * p0[:, None] + 3 * mt * mt * t * p1[:, None]
+                            + 3 * mt * t * t * p2[:, None] + t ** 3 * p3[:, None])
+
+                coeffs = (p3 - 3 * p2 + 3 * p1 - p0, 2 * (p0 - 2 * p1 + p2), p1 - p0)
+                _bezier_extrema(coeffs, cubic_roots, cubic_at, owner, lo[axis], hi[axis])
+
+        quads, owner = _gather(geoms, 'quads')
+        if len(quads):
+            for axis in (0, 1):
+                p0, p1, p2 = (quads[:, 2 * k + axis] for k in range(3))
+
+                def quad_root(p0, p1, p2):
+                    return ((p0 - p1) / (p0 - 2 * p1 + p2))[:, None]
+
+                def quad_at(t, p0=p0, p1=p1, p2=p2):
+                    mt = 1 - t
+                    return mt * mt * p0[:, None] + 2 * mt * t * p1[:, None] + t * t * p2[:, None]
+
+                _bezier_extrema((p0, p1, p2), quad_root, quad_at, owner, lo[axis], hi[axis])
+
+        arcs, owner = _gather(geoms, 'arcs')
+        if len(arcs):
+            x0, y0, rx, ry, phi, large, sweep, x1, y1 = arcs.T
+            phi = np.radians(phi)
+            cos_phi, sin_phi = np.cos(phi), np.sin(phi)
+            dx2, dy2 = (x0 - x1) / 2, (y0 - y1) / 2
+            x1p = cos_phi * dx2 + sin_phi * dy2
+            y1p = -sin_phi * dx2 + cos_phi * dy2
+            rx, ry = np.abs(rx), np.abs(ry)
+            lam = np.maximum((x1p / rx) ** 2 + (y1p / ry) ** 2, 1.0)
+            rx, ry = rx * np.sqrt(lam), ry * np.sqrt(lam)
+            num = (rx * ry) ** 2 - (rx * y1p) ** 2 - (ry * x1p) ** 2
+            den = (rx * y1p) ** 2 + (ry * x1p) ** 2
+            coef = np.sqrt(np.maximum(0.0, np.where(den > 0, num / den, 0.0)))
+            coef = np.where(large == sweep, -coef, coef)
+            cxp = coef * rx * y1p / ry
+            cyp = -coef * ry * x1p / rx
+            cx = cos_phi * cxp - sin_phi * cyp + (x0 + x1) / 2
+            cy = sin_phi * cxp + cos_phi * cyp + (y0 + y1) / 2
+            theta1 = np.arctan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+            theta2 = np.arctan2((-y1p - cyp) / ry, (-x1p - cxp) / rx)
+            dtheta = theta2 - theta1
+            dtheta = np.where((sweep == 0) & (dtheta > 0), dtheta - _TAU, dtheta)
+            dtheta = np.where((sweep == 1) & (dtheta < 0), dtheta + _TAU, dtheta)
+
+            tx = np.arctan2(-ry * sin_phi, rx * cos_phi)
+            ty = np.arctan2(ry * cos_phi, rx * sin_phi)
+            t = np.stack([tx, tx + np.pi, ty, ty + np.pi], axis=1)
+            forward = dtheta[:, None] >= 0
+            delta = np.where(forward, (t - theta1[:, None]) % _TAU,
+                             (theta1[:, None] - t) % _TAU)
+            inside = delta <= np.abs(dtheta)[:, None]
+            ct, st = np.cos(t), np.sin(t)
+            ex = cx[:, None] + rx[:, None] * cos_phi[:, None] * ct - ry[:, None] * sin_phi[:, None] * st
+            ey = cy[:, None] + rx[:, None] * sin_phi[:, None] * ct + ry[:, None] * cos_phi[:, None] * st
+            rows = np.broadcast_to(owner[:, None], t.shape)[inside]
+            for axis, values in ((0, ex), (1, ey)):
+                np.minimum.at(lo[axis], rows, values[inside])
+                np.maximum.at(hi[axis], rows, values[inside])
+
+    result = []
+    for k in range(n):
+        if not geoms[k].points:
+            result.append(None)
+        else:
+            result.append((float(lo[0, k]), float(lo[1, k]), float(hi[0, k]), float(hi[1, k])))
+    return result
+
+
+def batch_bboxes(paths):
+    """Exact bboxes for many paths (`d` strings or PathGeometry objects).
+
+    Uses one vectorized NumPy pass over all segments when numpy is
+    available. Returns a list with one bbox (or None) per input.
+    """
+    geoms = [p if isinstance(p, PathGeometry) else parse_path(p) for p in paths]
+    if not geoms or _load_numpy() is None:
+        return [geometry_bbox(g) for g in geoms]
+    return _batch_bboxes_numpy(geoms)
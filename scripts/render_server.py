@@ -0,0 +1,285 @@
+"""
+Local HTTP service that renders sitelen ilo pona SVGs on demand.
+
+    GET /render?text=jan+sewi+Amatelasu          -> image/svg+xml
+    GET /render?text=...&flatten=1&minify=2      (also defs=1)
+
+Every glyph SVG, the compound index and the cartouche are loaded at
+startup and stay resident. Responses carry a strong ETag (a hash of the
+SVG) and are answered with 304 when the client already has them; the most
+recently requested renders are kept in an LRU response cache. A cached
+render is checked against the mtime and size of every glyph file it uses
+at most once every REVALIDATE_SECONDS, so an edited glyph is picked up
+without a restart. Connections are kept alive (HTTP/1.1; HTTP/1.0 clients
+only when they send Connection: keep-alive). Renders run in the event
+loop's thread pool, so a slow render does not hold up other clients.
+
+Only meant to listen on localhost (e.g. behind a wiki tool); see
+benchmarks/load_test.py for a load generator.
+
+Usage:
+    python render_server.py
+    python render_server.py --port 8080 --cache-size 4096
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+import generate_sitelen_kalama_pona as gen
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+RESPONSE_CACHE_SIZE = 1024
+REVALIDATE_SECONDS = 2.0
+MAX_TEXT_LENGTH = 500
+
+REASONS = {
+    200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 500: 'Internal Server Error',
+}
+
+
+def preload_glyphs():
+    """Load every glyph SVG, the compound index and the cartouche. Returns
+    the number of glyph files loaded."""
+    gen.get_compound_index()
+    files = sorted(gen.WORD_SVGS_DIR.glob('Sitelen seli kiwen - *.svg'))
+    files += sorted(gen.SYLLABLES_DIR.glob('sitelen kalama pona - *.svg'))
+    if gen.GLYPH_CACHE.maxsize < len(files) + 1:
+        gen.GLYPH_CACHE.maxsize = len(files) + 1
+    for svg_file in files:
+        gen.GLYPH_CACHE.get(svg_file)
+    try:
+        gen.get_cartouche()
+    except (OSError, ValueError) as exc:
+        print(f'Warning: cartouche unavailable, names will fail: {exc}', file=sys.stderr)
+    return len(files)
+
+
+def _flag(query, name):
+    return query.get(name, [''])[0].lower() in ('1', 'true', 'yes')
+
+
+def _stamp(path):
+    """(mtime, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _stamps(text):
+    """_stamp() of every glyph file the output for text depends on."""
+    return tuple(_stamp(path) for path in gen.glyph_dependencies(text))
+
+
+class RenderService:
+    """Renders query strings to (status, headers, body), with an LRU cache
+    of recent responses keyed by text and options. Each entry remembers the
+    mtime and size of the glyph files it was drawn from, and is checked
+    against them again once it is revalidate_seconds old. Safe to call
+    from several threads."""
+
+    def __init__(self, cache_size=RESPONSE_CACHE_SIZE, revalidate_seconds=REVALIDATE_SECONDS):
+        self.cache_size = cache_size
+        self.revalidate_seconds = revalidate_seconds
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def options(self, query):
+        """Output options from the query string, or raise ValueError."""
+        minify = query.get('minify', [None])[0]
+        options = {
+            'use_defs': _flag(query, 'defs'),
+            'flatten': _flag(query, 'flatten'),
+            'minify': int(minify) if minify not in (None, '') else None,
+        }
+        if options['use_defs'] and options['flatten']:
+            raise ValueError('defs and flatten cannot be combined')
+        if options['minify'] is not None and not 0 <= options['minify'] <= 6:
+            raise ValueError('minify must be between 0 and 6')
+        return options
+
+    def render(self, text, options):
+        """(body bytes, etag) for a phrase, from the cache when possible."""
+        key = (text, tuple(sorted(options.items())))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+        stamps = None
+        if entry is not None and now - entry[3] >= self.revalidate_seconds:
+            stamps = _stamps(text)
+            if stamps == entry[2]:
+                entry = entry[:3] + (now,)
+            else:
+                entry = None
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+                self._cache[key] = entry
+                self._cache.move_to_end(key)
+            return entry[:2]
+
+        with self._lock:
+            self.misses += 1
+        if stamps is None:
+            stamps = _stamps(text)
+        # Stamps taken before rendering, so a glyph edited meanwhile is
+        # caught by the next revalidation
+        body = gen.render(text, **options)
+        entry = (body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"', stamps, now)
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entry[:2]
+
+    def handle(self, method, target, headers):
+        """Return (status, extra headers, body) for one request."""
+        if method not in ('GET', 'HEAD'):
+            return 405, {'Allow': 'GET, HEAD'}, b''
+        url = urlsplit(target)
+        if url.path != '/render':
+            return 404, {}, b'Not found\n'
+
+        query = parse_qs(url.query)
+        text = ' '.join(query.get('text', [''])[0].split())
+        if not text:
+            return 400, {}, b'Missing text parameter\n'
+        if len(text) > MAX_TEXT_LENGTH:
+            return 400, {}, b'text is too long\n'
+        try:
+            options = self.options(query)
+        except ValueError as exc:
+            return 400, {}, f'{exc}\n'.encode('utf-8')
+
+        try:
+            body, etag = self.render(text, options)
+        except Exception as exc:
+            return 500, {}, f'Render failed: {exc}\n'.encode('utf-8')
+
+        headers_out = {'ETag': etag, 'Cache-Control': 'public, max-age=3600'}
+        match = headers.get('if-none-match', '')
+        if etag in (tag.strip() for tag in match.split(',')) or match.strip() == '*':
+            return 304, headers_out, b''
+        headers_out['Content-Type'] = 'image/svg+xml; charset=utf-8'
+        return 200, headers_out, body
+
+
+async def _read_request(reader):
+    """(method, target, version, headers) of the next request, or None at
+    EOF. method is 'BAD' for a request that cannot be parsed."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        return 'BAD', '', '', {}
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    # Requests with a body are not expected; skip it if one is sent
+    length = headers.get('content-length') or '0'
+    if not length.isdigit():
+        return 'BAD', '', '', {}
+    length = int(length)
+    if length:
+        await reader.readexactly(length)
+    return method, target, version.strip(), headers
+
+
+def _keep_alive(version, headers):
+    """Whether to keep the connection open after this request: by default
+    for HTTP/1.1, only on request for HTTP/1.0."""
+    connection = headers.get('connection', '').lower()
+    if version == 'HTTP/1.0':
+        return connection == 'keep-alive'
+    return connection != 'close'
+
+
+def _response(status, headers, body, keep_alive, head=False):
+    lines = [f'HTTP/1.1 {status} {REASONS.get(status, "")}']
+    headers = dict(headers)
+    if status != 304:
+        headers.setdefault('Content-Type', 'text/plain; charset=utf-8')
+        headers['Content-Length'] = str(len(body))
+    headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+    lines += [f'{name}: {value}' for name, value in headers.items()]
+    data = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+    if status != 304 and not head:
+        data += body
+    return data
+
+
+def make_handler(service):
+    async def handle_connection(reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers = request
+                if method == 'BAD':
+                    writer.write(_response(400, {}, b'Bad request\n', False))
+                    break
+                keep_alive = _keep_alive(version, headers)
+                status, extra, body = await loop.run_in_executor(
+                    None, service.handle, method, target, headers)
+                writer.write(_response(status, extra, body, keep_alive, method == 'HEAD'))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return handle_connection
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, cache_size=RESPONSE_CACHE_SIZE,
+                revalidate_seconds=REVALIDATE_SECONDS):
+    count = preload_glyphs()
+    service = RenderService(cache_size, revalidate_seconds)
+    server = await asyncio.start_server(make_handler(service), host, port)
+    print(f'Loaded {count} glyph files; serving on http://{host}:{port}/render?text=...',
+          file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve sitelen ilo pona SVGs over HTTP.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-size', type=int, default=RESPONSE_CACHE_SIZE,
+                        help=f'rendered responses to keep (default: {RESPONSE_CACHE_SIZE})')
+    parser.add_argument('--revalidate', type=float, default=REVALIDATE_SECONDS, metavar='SECONDS',
+                        help='check a cached response against its glyph files after this long '
+                             f'(default: {REVALIDATE_SECONDS})')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.cache_size, args.revalidate))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
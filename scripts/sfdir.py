@@ -0,0 +1,169 @@
+"""
+Read FontForge SFDir sources: font.props plus one .glyph file per glyph.
+
+Every .glyph file is read line by line in a single pass: the header keys the
+scripts need (StartChar, Encoding, Width) and the first SplineSet, which is
+turned into Contour objects. A contour keeps its segment types in a string
+('m', 'l' or 'c' per segment) and all coordinates in one flat array('d'), so
+a whole font stays small in memory; iterating over a contour yields the
+segments as tuples in absolute font units (y up):
+
+    ('m', x, y)    ('l', x, y)    ('c', x1, y1, x2, y2, x, y)
+
+Everything after the first SplineSet (hints, other layers) is skipped.
+
+Usage:
+    from sfdir import SFDir, read_glyph
+
+    font = SFDir.read(ROOT_DIR / '..sfdir')
+    font.ascent, font.descent
+    glyph = font.glyphs['ka.sitelen_kalama_pona']
+    glyph.width, glyph.encoding, glyph.contours
+
+    glyph = read_glyph(path)                   # a single file
+    glyph = parse_glyph(text.splitlines())     # or its lines
+"""
+
+from array import array
+from pathlib import Path
+
+
+class Contour:
+    """One closed contour: segment types and their flat coordinates."""
+
+    __slots__ = ('ops', 'coords')
+
+    def __init__(self, ops, coords):
+        self.ops = ops
+        self.coords = coords
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __iter__(self):
+        coords = self.coords
+        i = 0
+        for op in self.ops:
+            n = 6 if op == 'c' else 2
+            yield (op, *coords[i:i + n])
+            i += n
+
+
+class Glyph:
+    """A parsed .glyph file. contours is None if it has no SplineSet."""
+
+    __slots__ = ('name', 'encoding', 'unicode', 'width', 'contours')
+
+    def __init__(self, name=None, encoding=None, unicode=-1, width=1000, contours=None):
+        self.name = name
+        self.encoding = encoding
+        self.unicode = unicode
+        self.width = width
+        self.contours = contours
+
+
+def parse_splineset(lines):
+    """Contours from the lines of a SplineSet, up to EndSplineSet (or the
+    first blank line). Consumes lines from an iterator only that far."""
+    contours = []
+    ops = []
+    coords = array('d')
+    for line in lines:
+        line = line.strip()
+        if not line or line == 'EndSplineSet':
+            break
+        tokens = line.split()
+
+        if len(tokens) >= 3 and tokens[-2] == 'm':
+            if ops:
+                contours.append(Contour(''.join(ops), coords))
+                ops = []
+                coords = array('d')
+            ops.append('m')
+            coords.extend((float(tokens[0]), float(tokens[1])))
+        elif len(tokens) >= 3 and tokens[-2] == 'l':
+            ops.append('l')
+            coords.extend((float(tokens[0]), float(tokens[1])))
+        elif len(tokens) >= 7 and tokens[-2] == 'c':
+            ops.append('c')
+            coords.extend(float(token) for token in tokens[:6])
+
+    if ops:
+        contours.append(Contour(''.join(ops), coords))
+    return contours
+
+
+def parse_glyph(lines):
+    """Glyph from the lines of a .glyph file (any iterable of str)."""
+    glyph = Glyph()
+    lines = iter(lines)
+    for line in lines:
+        if line.rstrip() == 'SplineSet':
+            if glyph.contours is None:
+                glyph.contours = parse_splineset(lines)
+            continue
+        key, sep, value = line.partition(':')
+        if not sep:
+            continue
+        if key == 'StartChar':
+            glyph.name = value.strip()
+        elif key == 'Encoding':
+            fields = value.split()
+            glyph.encoding = int(fields[0])
+            if len(fields) > 1:
+                glyph.unicode = int(fields[1])
+        elif key == 'Width':
+            glyph.width = int(value)
+    return glyph
+
+
+def read_glyph(path):
+    with open(path, encoding='utf-8') as f:
+        return parse_glyph(f)
+
+
+def read_props(path):
+    """{key: raw value} of a font.props file (the first of repeated keys)."""
+    props = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            key, sep, value = line.partition(':')
+            if sep and not key.startswith((' ', '\t')):
+                props.setdefault(key, value.strip())
+    return props
+
+
+class SFDir:
+    """An SFDir's font.props and all of its glyphs, by glyph name."""
+
+    __slots__ = ('path', 'props', 'glyphs')
+
+    def __init__(self, path, props, glyphs):
+        self.path = path
+        self.props = props
+        self.glyphs = glyphs
+
+    @classmethod
+    def read(cls, path):
+        path = Path(path)
+        props_file = path / 'font.props'
+        props = read_props(props_file) if props_file.exists() else {}
+        glyphs = {}
+        for glyph_file in sorted(path.glob('*.glyph')):
+            glyph = read_glyph(glyph_file)
+            glyphs[glyph.name or glyph_file.stem] = glyph
+        return cls(path, props, glyphs)
+
+    @property
+    def ascent(self):
+        return int(self.props.get('Ascent', 800))
+
+    @property
+    def descent(self):
+        return int(self.props.get('Descent', 200))
+
+    def __iter__(self):
+        return iter(self.glyphs.values())
+
+    def __len__(self):
+        return len(self.glyphs)
@@ -0,0 +1,67 @@
+"""
+Single command-line entry point for the sitelen ilo pona scripts.
+
+    sitelen render "jan sewi Amatelasu"    generate_sitelen_kalama_pona.py
+    sitelen batch -j 4                     batch_generate_svgs.py
+    sitelen build-font                     build_font.py
+    sitelen subset-font page.html          subset_font.py
+    sitelen extract                        extract_sitelen_seli_kiwen.py
+    sitelen gallery                        generate_gallery.py
+    sitelen quickstatements                generate_quickstatements.py
+
+Everything after the subcommand is passed on to that script's main(). A
+script is imported only when its subcommand runs, so `sitelen render` does
+not load fontTools, uharfbuzz or numpy.
+
+The installed `sitelen` command (sitelen_ilo_pona/cli.py) puts this
+directory on sys.path and calls main(). The scripts read glyphs and data from
+this checkout, so install it in editable mode (`pip install -e .` in the
+repository root), or run this file directly.
+
+Usage:
+    sitelen --help
+    sitelen render --help
+    python sitelen_cli.py render "tomo sewi Isukusima"
+"""
+
+import importlib
+import sys
+
+# subcommand -> (module, description)
+COMMANDS = {
+    'render': ('generate_sitelen_kalama_pona', 'render a phrase (or an NDJSON stream) to SVG'),
+    'batch': ('batch_generate_svgs', 'render every label in data/wikidata_tok_labels.csv'),
+    'build-font': ('build_font', 'build sitelen-kalama-pona.otf/.woff2 from ..sfdir/'),
+    'subset-font': ('subset_font', 'write per-page web font subsets and @font-face CSS'),
+    'extract': ('extract_sitelen_seli_kiwen', 'extract word glyph SVGs from Sitelen Seli Kiwen'),
+    'gallery': ('generate_gallery', 'write gallery.html from the generated SVGs'),
+    'quickstatements': ('generate_quickstatements', 'write QuickStatements for P18 claims'),
+}
+
+
+def usage():
+    width = max(map(len, COMMANDS))
+    lines = ['usage: sitelen <command> [args...]', '', 'commands:']
+    lines += [f'  {name:<{width}}  {description}'
+              for name, (_, description) in COMMANDS.items()]
+    lines += ['', "Run 'sitelen <command> --help' for a command's options."]
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0
+    command, args = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"sitelen: unknown command '{command}'\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    module = importlib.import_module(COMMANDS[command][0])
+    sys.argv = [f'sitelen {command}', *args]
+    return module.main()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Subset the sitelen kalama pona font for individual web pages.
+
+For every page (an HTML file, or any other text file) and every --text
+string, collects the characters it shows (with --class, only the text of
+HTML elements of that class) and writes WOFF2 subsets of
+fonts/sitelen-kalama-pona-latin.otf (see build_font.py) holding only the
+glyphs it needs. Each page's subset is split by unicode-range into two files:
+
+    latin   letters, space and [ ], which the liga feature turns into
+            syllables and cartouches
+    pua     syllables written as PUA codepoints (U+E100 onwards)
+
+A <name>.css file next to them has one @font-face rule per file, so a
+browser only downloads the part whose unicode-range the page uses. The latin
+part keeps just the syllables that the page's words spell (split with
+parse_syllables(), as the liga feature does), not every ligature its letters
+could form.
+
+Prints the size of each page's subsets against the full font in the same
+format. WOFF2 needs the brotli module; without it, WOFF is written instead.
+
+Usage:
+    python build_font.py
+    python subset_font.py docs/index.html gallery.html
+    python subset_font.py --class sitelen page.html   # only <... class="sitelen">
+    python subset_font.py --text "jan [Sinpo] We" --name sinpo
+    python subset_font.py index.html --output-dir docs/fonts --url-prefix fonts/
+"""
+
+import argparse
+import io
+import re
+import sys
+from html.parser import HTMLParser
+from pathlib import Path
+
+from fontTools import subset
+from fontTools.ttLib import TTFont
+
+from build_font import LATIN_FAMILY, LATIN_OTF_PATH, cartouche_bar
+from generate_sitelen_kalama_pona import parse_syllables
+
+SCRIPT_DIR = Path(__file__).parent
+ROOT_DIR = SCRIPT_DIR.parent
+OUTPUT_DIR = ROOT_DIR / 'fonts' / 'subsets'
+FAMILY = LATIN_FAMILY
+
+GROUPS = ('latin', 'pua')
+CSS_FORMATS = {'woff2': 'woff2', 'woff': 'woff'}
+
+_WORD_RE = re.compile(r'[A-Za-z]+')
+
+
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                 'link', 'meta', 'source', 'track', 'wbr'}
+
+
+class _TextExtractor(HTMLParser):
+    """Collects the text content of an HTML page, without scripts and styles,
+    and if css_class is given only from inside elements with that class."""
+
+    def __init__(self, css_class=None):
+        super().__init__()
+        self.css_class = css_class
+        self.parts = []
+        # (tag, text in it counts) of the open elements
+        self._open = [(None, css_class is None)]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        counts = self._open[-1][1]
+        if tag in ('script', 'style'):
+            counts = False
+        elif not counts and self.css_class in (dict(attrs).get('class') or '').split():
+            counts = True
+        self._open.append((tag, counts))
+
+    def handle_endtag(self, tag):
+        for i in range(len(self._open) - 1, 0, -1):
+            if self._open[i][0] == tag:
+                del self._open[i:]
+                break
+
+    def handle_data(self, data):
+        if self._open[-1][1]:
+            self.parts.append(data)
+
+
+def page_text(path, css_class=None):
+    """Text of a page; for HTML, its text content (only inside elements of
+    css_class, if given). Text added by scripts is not seen."""
+    text = Path(path).read_text(encoding='utf-8')
+    if Path(path).suffix.lower() not in ('.html', '.htm'):
+        return text
+    extractor = _TextExtractor(css_class)
+    extractor.feed(text)
+    extractor.close()
+    return ' '.join(extractor.parts)
+
+
+def page_glyphs(text, cmap, widths):
+    """{group: (codepoints, glyph names)} needed to show text, given the
+    font's cmap and advance widths by glyph name."""
+    groups = {group: (set(), set()) for group in GROUPS}
+    for codepoint in {ord(ch) for ch in text}:
+        glyph_name = cmap.get(codepoint)
+        if glyph_name is None:
+            continue
+        group = 'pua' if glyph_name.startswith('skp.') else 'latin'
+        groups[group][0].add(codepoint)
+        groups[group][1].add(glyph_name)
+
+    latin = groups['latin'][1]
+    if latin:
+        # Ligature results have no codepoints of their own
+        for word in _WORD_RE.findall(text):
+            for syllable in parse_syllables(word):
+                if f'skp.{syllable}' in widths:
+                    latin.add(f'skp.{syllable}')
+                    if len(syllable) > 1 and syllable[0] == 'n':
+                        latin.add('n.onset')
+        if 'cartouche.left' in latin:
+            syllables = [glyph_name for glyph_name in latin if glyph_name.startswith('skp.')]
+            latin.update(bar for bar in {cartouche_bar(widths[name]) for name in syllables}
+                         if bar in widths)
+    # Spaces alone are not worth a download; the fallback font has them
+    return {group: sets for group, sets in groups.items()
+            if any(not chr(codepoint).isspace() for codepoint in sets[0])}
+
+
+def subset_bytes(font_data, codepoints, glyphs, flavor):
+    """The font subset to codepoints and glyphs, in flavor."""
+    options = subset.Options()
+    options.flavor = flavor
+    # Keep only the ligatures asked for, not everything the letters can form
+    options.layout_closure = False
+    font = TTFont(io.BytesIO(font_data), recalcTimestamp=False)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints, glyphs=glyphs)
+    subsetter.subset(font)
+    # The subsetter also keeps the cmap entries of every glyph asked for by
+    # name (A for a, a syllable's PUA codepoint in the latin part); map only
+    # the codepoints in this file's unicode-range
+    for table in font['cmap'].tables:
+        if hasattr(table, 'cmap'):
+            table.cmap = {cp: name for cp, name in table.cmap.items() if cp in codepoints}
+    return font_bytes(font, flavor)
+
+
+def font_bytes(font, flavor):
+    font.flavor = flavor
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue()
+
+
+def unicode_ranges(codepoints):
+    """CSS unicode-range value for a set of codepoints, merging runs."""
+    ranges = []
+    for codepoint in sorted(codepoints):
+        if ranges and ranges[-1][1] == codepoint - 1:
+            ranges[-1][1] = codepoint
+        else:
+            ranges.append([codepoint, codepoint])
+    return ', '.join(f'U+{start:X}' if start == end else f'U+{start:X}-{end:X}'
+                     for start, end in ranges)
+
+
+def font_face_css(name, groups, flavor, url_prefix=''):
+    rules = []
+    for group, (codepoints, _) in groups.items():
+        rules.append(
+            '@font-face {\n'
+            f"  font-family: '{FAMILY}';\n"
+            f"  src: url('{url_prefix}{name}.{group}.{flavor}') format('{CSS_FORMATS[flavor]}');\n"
+            f'  unicode-range: {unicode_ranges(codepoints)};\n'
+            '  font-display: swap;\n'
+            '}\n'
+        )
+    return '\n'.join(rules)
+
+
+def woff2_available():
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return False
+    return True
+
+
+def unique_names(names):
+    seen = {}
+    result = []
+    for name in names:
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        result.append(name if not count else f'{name}-{count + 1}')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write per-page subsets of the web font.')
+    parser.add_argument('pages', nargs='*', type=Path,
+                        help='HTML or text files to subset the font for')
+    parser.add_argument('--class', dest='css_class',
+                        help='only count HTML text inside elements with this class')
+    parser.add_argument('--text', action='append', default=[],
+                        help='subset for this text (can be repeated)')
+    parser.add_argument('--name', action='append', default=[],
+                        help='output name for each --text, in order (default: text, text-2, ...)')
+    parser.add_argument('--font', type=Path, default=LATIN_OTF_PATH,
+                        help='font to subset (default: the build_font.py Latin OTF)')
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR)
+    parser.add_argument('--url-prefix', default='',
+                        help='prefix for the font URLs in the CSS')
+    parser.add_argument('--flavor', choices=sorted(CSS_FORMATS), default='woff2')
+    args = parser.parse_args()
+
+    if not args.pages and not args.text:
+        parser.error('give at least one page or --text')
+    if not args.font.exists():
+        print(f'Font not found: {args.font} (run build_font.py first)', file=sys.stderr)
+        sys.exit(1)
+
+    flavor = args.flavor
+    if flavor == 'woff2' and not woff2_available():
+        print('brotli is not installed; writing WOFF instead of WOFF2')
+        flavor = 'woff'
+
+    font_data = args.font.read_bytes()
+    font = TTFont(io.BytesIO(font_data), recalcTimestamp=False)
+    cmap = font.getBestCmap()
+    widths = {glyph_name: advance for glyph_name, (advance, _) in font['hmtx'].metrics.items()}
+    full_size = len(font_bytes(font, flavor))
+
+    sources = [(page.stem, page_text(page, args.css_class)) for page in args.pages]
+    text_names = args.name + ['text'] * (len(args.text) - len(args.name))
+    sources += list(zip(text_names, args.text))
+    names = unique_names([name for name, _ in sources])
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    print(f'Full font: {full_size} bytes ({flavor})')
+    total_full = total_subset = 0
+    for name, (_, text) in zip(names, sources):
+        # Remove what an earlier run wrote for this name
+        (args.output_dir / f'{name}.css').unlink(missing_ok=True)
+        for group in GROUPS:
+            for suffix in CSS_FORMATS:
+                (args.output_dir / f'{name}.{group}.{suffix}').unlink(missing_ok=True)
+
+        groups = page_glyphs(text, cmap, widths)
+        if not groups:
+            print(f'  {name}: uses no characters from the font')
+            continue
+
+        sizes = {}
+        for group, (codepoints, glyphs) in groups.items():
+            data = subset_bytes(font_data, codepoints, glyphs, flavor)
+            (args.output_dir / f'{name}.{group}.{flavor}').write_bytes(data)
+            sizes[group] = len(data)
+        (args.output_dir / f'{name}.css').write_text(
+            font_face_css(name, groups, flavor, args.url_prefix), encoding='utf-8')
+
+        page_size = sum(sizes.values())
+        total_subset += page_size
+        total_full += full_size
+        parts = ', '.join(f'{group} {size}' for group, size in sizes.items())
+        print(f'  {name}: {parts} = {page_size} bytes, '
+              f'{full_size - page_size} saved ({1 - page_size / full_size:.0%})')
+
+    if total_full:
+        print(f'\nWrote subsets to {args.output_dir}: {total_subset} bytes instead of '
+              f'{total_full}, {total_full - total_subset} saved '
+              f'({1 - total_subset / total_full:.0%})')
+
+
+if __name__ == '__main__':
+    main()
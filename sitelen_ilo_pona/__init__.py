@@ -0,0 +1,6 @@
+"""
+Installed package for the sitelen ilo pona scripts.
+
+Only the `sitelen` command lives here (see cli.py); the scripts themselves
+stay loose files in scripts/ and are not installed as top-level modules.
+"""
@@ -0,0 +1,26 @@
+"""
+Entry point of the installed `sitelen` command.
+
+Puts this checkout's scripts/ directory on sys.path and hands over to
+scripts/sitelen_cli.py. The scripts read glyphs and data relative to the
+checkout, so this only works from an editable install (`pip install -e .`
+in the repository root); a regular install has no checkout to run from and
+says so.
+"""
+
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT_DIR / 'scripts'
+
+
+def main(argv=None):
+    if not (SCRIPTS_DIR / 'sitelen_cli.py').exists():
+        print(f'sitelen: no checkout found at {ROOT_DIR}; install the repository with '
+              f'`pip install -e .` instead of a regular install', file=sys.stderr)
+        return 1
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    import sitelen_cli
+
+    return sitelen_cli.main(argv)
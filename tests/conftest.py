@@ -0,0 +1,14 @@
+"""
+Shared setup for the tests: the scripts are loose modules in scripts/, so
+that directory goes on sys.path, as when they are run directly, and so does
+the repository root for the sitelen_ilo_pona package.
+"""
+
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+SCRIPTS_DIR = ROOT_DIR / 'scripts'
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(1, str(ROOT_DIR))
@@ -0,0 +1,175 @@
+"""
+Tests for the incremental rebuilds of scripts/batch_generate_svgs.py: the
+batch runs serially in a temporary copy of the glyph directories, and each
+test checks which outputs a second run renders again.
+"""
+
+import argparse
+import csv
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import batch_generate_svgs as batch
+import generate_sitelen_kalama_pona as gen
+from conftest import ROOT_DIR
+
+LABELS = ['jan pona', 'tomo sewi', 'ma Kanata', 'jan Ma', 'kulupu Ume']
+CARTOUCHE_FIXTURE = ROOT_DIR / 'benchmarks' / 'fixtures' / 'cartouche.svg'
+
+
+class Batch:
+    """A batch over a temporary tree; run() returns the run's report."""
+
+    def __init__(self, root):
+        self.root = root
+        self.words_dir = root / 'words'
+        self.syllables_dir = root / 'syllables'
+        self.cartouche = root / 'cartouche.svg'
+        self.output_dir = root / 'output'
+
+    def write_labels(self, labels):
+        with open(self.root / 'data' / 'wikidata_tok_labels.csv', 'w', encoding='utf-8',
+                  newline='') as f:
+            writer = csv.DictWriter(f, ['qid', 'label', 'tok_title'])
+            writer.writeheader()
+            for i, label in enumerate(labels, 1):
+                writer.writerow({'qid': f'Q{i}', 'label': label, 'tok_title': label})
+
+    def run(self, **options):
+        args = argparse.Namespace(defs=False, flatten=False, minify=None, jobs=1, force=False,
+                                  report=self.root / 'data' / 'batch_report.json')
+        for name, value in options.items():
+            setattr(args, name, value)
+        batch.run(args)
+        return json.loads(args.report.read_text(encoding='utf-8'))
+
+    def output(self, label):
+        return self.output_dir / gen.output_filename(label)
+
+    def manifest(self):
+        return json.loads(batch.MANIFEST_FILE.read_text(encoding='utf-8'))
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    b = Batch(tmp_path)
+    shutil.copytree(gen.WORD_SVGS_DIR, b.words_dir)
+    shutil.copytree(gen.SYLLABLES_DIR, b.syllables_dir)
+    shutil.copy2(CARTOUCHE_FIXTURE, b.cartouche)
+    (tmp_path / 'data').mkdir()
+    b.write_labels(LABELS)
+
+    monkeypatch.setattr(batch, 'ROOT_DIR', tmp_path)
+    monkeypatch.setattr(batch, 'OUTPUT_DIR', b.output_dir)
+    monkeypatch.setattr(batch, 'MANIFEST_FILE', tmp_path / 'data' / 'batch_manifest.json')
+    monkeypatch.setattr(gen, 'DEFAULT_RENDERER', gen.Renderer(
+        words_dir=b.words_dir, syllables_dir=b.syllables_dir, cartouche=b.cartouche))
+    report = b.run()
+    assert report['rendered'] == len(LABELS)
+    assert report['failed'] == 0
+    return b
+
+
+def edit_svg(path):
+    """Change a glyph SVG's contents (and so its digest)."""
+    text = path.read_text(encoding='utf-8')
+    path.write_text(text.replace(' d="', ' d="M 0,0 L 1,1 Z ', 1), encoding='utf-8')
+
+
+def test_dependencies_are_drawn_files(tree):
+    manifest = tree.manifest()
+    deps = {dep for entry in manifest['labels'].values() for dep in entry['deps']}
+    assert deps
+    assert all(dep.endswith('.svg') for dep in deps)
+    assert manifest['dependents']['cartouche.svg'] == sorted(
+        gen.output_filename(label) for label in ('ma Kanata', 'jan Ma', 'kulupu Ume'))
+
+
+def test_changed_word_svg_rerenders_its_labels(tree):
+    edit_svg(tree.words_dir / 'Sitelen seli kiwen - jan.svg')
+    # "jan pona" is drawn from the jan-pona compound, not from jan
+    before = tree.output('jan pona').stat().st_mtime_ns
+    assert tree.run()['rendered'] == 1  # jan Ma
+    assert tree.output('jan pona').stat().st_mtime_ns == before
+    assert 'M 0,0 L 1,1 Z' in tree.output('jan Ma').read_text(encoding='utf-8')
+
+
+def test_changed_syllable_svg_rerenders_its_labels(tree):
+    edit_svg(tree.syllables_dir / 'sitelen kalama pona - ka.svg')
+    assert tree.run()['rendered'] == 1  # ma Kanata
+
+
+def test_changed_cartouche_rerenders_names(tree):
+    edit_svg(tree.cartouche)
+    assert tree.run()['rendered'] == 3
+
+
+def test_touch_without_change_rerenders_nothing(tree):
+    path = tree.words_dir / 'Sitelen seli kiwen - jan.svg'
+    path.write_bytes(path.read_bytes())
+    assert tree.run()['rendered'] == 0
+
+
+def test_second_run_renders_nothing(tree):
+    mtimes = {p: p.stat().st_mtime_ns for p in tree.output_dir.iterdir()}
+    report = tree.run()
+    assert (report['rendered'], report['skipped']) == (0, len(LABELS))
+    assert {p: p.stat().st_mtime_ns for p in tree.output_dir.iterdir()} == mtimes
+
+
+def test_force_and_options_rerender_everything(tree):
+    assert tree.run(force=True)['rendered'] == len(LABELS)
+    assert tree.run(minify=2)['rendered'] == len(LABELS)
+    assert tree.run(minify=2)['rendered'] == 0
+
+
+def test_missing_output_is_rerendered(tree):
+    tree.output('tomo sewi').unlink()
+    assert tree.run()['rendered'] == 1
+    assert tree.output('tomo sewi').exists()
+
+
+def test_renderer_change_rerenders_everything(tree, monkeypatch):
+    source = tree.root / 'renderer.py'
+    source.write_text('# v1\n', encoding='utf-8')
+    monkeypatch.setattr(batch, 'RENDER_SOURCES', batch.RENDER_SOURCES + [source])
+    assert tree.run()['rendered'] == len(LABELS)
+    source.write_text('# v2\n', encoding='utf-8')
+    assert tree.run()['rendered'] == len(LABELS)
+
+
+def test_label_removed_from_csv(tree):
+    tree.write_labels(LABELS[1:])
+    report = tree.run()
+    assert (report['rendered'], report['removed']) == (0, 1)
+    assert not tree.output(LABELS[0]).exists()
+    assert gen.output_filename(LABELS[0]) not in {
+        entry['output'] for entry in tree.manifest()['labels'].values()}
+
+
+def test_render_sources_cover_imported_modules():
+    # Every module of this repository loaded while rendering, with and
+    # without the bundle, must be one of RENDER_SOURCES
+    scripts_dir = ROOT_DIR / 'scripts'
+    code = (
+        'import sys\n'
+        f'sys.path.insert(0, {str(scripts_dir)!r})\n'
+        'import generate_sitelen_kalama_pona as gen\n'
+        f'gen.set_cartouche_source({str(CARTOUCHE_FIXTURE)!r})\n'
+        "gen.render('jan pona', minify=2)\n"
+        "gen.render('ma Kanata', flatten=True)\n"
+        "gen.render('jan Ma', use_defs=True)\n"
+        'for module in list(sys.modules.values()):\n'
+        "    print(getattr(module, '__file__', None) or '')\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            check=True, cwd=ROOT_DIR)
+    loaded = {Path(line) for line in result.stdout.splitlines()
+              if line and Path(line).parent == scripts_dir}
+    assert loaded
+    assert loaded <= set(batch.RENDER_SOURCES)
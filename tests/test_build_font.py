@@ -0,0 +1,116 @@
+"""
+Tests for the two fonts of scripts/build_font.py: the main font maps only the
+PUA syllables, the Latin font also turns typed syllables and [cartouches]
+into syllable glyphs with its liga feature.
+"""
+
+from io import BytesIO
+
+import pytest
+from fontTools.pens.boundsPen import BoundsPen
+from fontTools.ttLib import TTFont
+
+from build_font import (
+    CARTOUCHE_BOTTOM, CARTOUCHE_TOP, LATIN_FAMILY, LETTERS, PUA_BASE,
+    build_font, cartouche_bar, compile_charstring, feature_text, font_bytes, text_glyphs,
+)
+
+# Syllables of different widths, so each needs its own cartouche bar
+WIDTHS = {'a': 600, 'ma': 1000, 'su': 800, 'na': 800, 'sin': 1000, 'po': 700}
+
+
+def syllable_glyphs():
+    glyphs = {}
+    cmap = {}
+    for i, (syllable, width) in enumerate(WIDTHS.items()):
+        contours = [[('m', 50, 0), ('l', width - 50, 0), ('l', width - 50, 700), ('l', 50, 700)]]
+        glyphs[f'skp.{syllable}'] = {
+            'width': width,
+            'contours': contours,
+            'charstring': compile_charstring(contours, width).hex(),
+        }
+        cmap[PUA_BASE + i] = f'skp.{syllable}'
+    return glyphs, cmap
+
+
+def load(font):
+    return TTFont(BytesIO(font_bytes(font)))
+
+
+@pytest.fixture(scope='module')
+def main_font():
+    return load(build_font(*syllable_glyphs()))
+
+
+@pytest.fixture(scope='module')
+def latin_font():
+    glyphs, cmap = syllable_glyphs()
+    text, text_cmap = text_glyphs(entry['width'] for entry in glyphs.values())
+    return load(build_font({**glyphs, **text}, {**cmap, **text_cmap}, family=LATIN_FAMILY))
+
+
+def test_main_font_maps_only_syllables(main_font):
+    _, cmap = syllable_glyphs()
+    assert main_font.getBestCmap() == cmap
+    assert 'GSUB' not in main_font
+    assert not any(name.startswith('cartouche') for name in main_font.getGlyphOrder())
+
+
+def test_feature_text_needs_text_glyphs():
+    glyphs, _ = syllable_glyphs()
+    assert feature_text(glyphs) is None
+    text, _ = text_glyphs([1000])
+    assert feature_text({**glyphs, **text}) is None  # no bar for 600, 700 or 800
+    text, _ = text_glyphs(entry['width'] for entry in glyphs.values())
+    assert 'liga' in feature_text({**glyphs, **text})
+
+
+def test_latin_font_names_and_cmap(latin_font):
+    assert latin_font['name'].getDebugName(1) == LATIN_FAMILY
+    cmap = latin_font.getBestCmap()
+    for letter in LETTERS:
+        assert cmap[ord(letter)] == cmap[ord(letter.upper())] == letter
+    assert cmap[ord('[')] == 'cartouche.left'
+    assert cmap[ord(']')] == 'cartouche.right'
+
+
+def test_cartouche_bar_per_width(latin_font):
+    glyph_set = latin_font.getGlyphSet()
+    for width in set(WIDTHS.values()):
+        glyph = glyph_set[cartouche_bar(width)]
+        pen = BoundsPen(glyph_set)
+        glyph.draw(pen)
+        assert glyph.width == 0
+        assert pen.bounds == (-width, CARTOUCHE_BOTTOM, 0, CARTOUCHE_TOP)
+
+
+def test_ligatures(latin_font):
+    ligatures = {}
+    for lookup in latin_font['GSUB'].table.LookupList.Lookup:
+        for subtable in lookup.SubTable:
+            for first, entries in getattr(subtable, 'ligatures', {}).items():
+                for ligature in entries:
+                    ligatures[(first, *ligature.Component)] = ligature.LigGlyph
+    assert ligatures[('m', 'a')] == 'skp.ma'
+    assert ligatures[('s', 'i', 'n')] == 'skp.sin'
+    assert ligatures[('n.onset', 'a')] == 'skp.na'
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('suna', ['skp.su', 'skp.na']),
+    ('Sinpo', ['skp.sin', 'skp.po']),
+    ('[ama]', ['cartouche.left', 'skp.a', 'cartouche.bar.600', 'skp.ma',
+               'cartouche.bar.1000', 'cartouche.right']),
+    ('a [po] a', ['skp.a', 'space', 'cartouche.left', 'skp.po', 'cartouche.bar.700',
+                  'cartouche.right', 'space', 'skp.a']),
+])
+def test_shaping(latin_font, text, expected):
+    hb = pytest.importorskip('uharfbuzz')
+    data = font_bytes(latin_font)
+    font = hb.Font(hb.Face(data))
+    buf = hb.Buffer()
+    buf.add_str(text)
+    buf.guess_segment_properties()
+    hb.shape(font, buf, {'liga': True})
+    glyph_order = latin_font.getGlyphOrder()
+    assert [glyph_order[info.codepoint] for info in buf.glyph_infos] == expected
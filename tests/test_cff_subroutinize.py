@@ -0,0 +1,63 @@
+"""
+Tests for scripts/cff_subroutinize.py: a font built with subroutines must draw
+every glyph exactly as the one built without them, and be smaller.
+"""
+
+from io import BytesIO
+
+import pytest
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.ttLib import TTFont
+
+from build_font import SYLLABLES, build_font, compile_glyph, font_bytes, text_glyphs
+from cff_subroutinize import split_commands, subroutinize
+
+
+@pytest.fixture(scope='module')
+def font_glyphs():
+    glyphs = {}
+    for syllable in SYLLABLES:
+        entry, _ = compile_glyph(syllable)
+        if entry is not None:
+            glyphs[f'skp.{syllable}'] = entry
+    assert glyphs
+    text, cmap = text_glyphs(entry['width'] for entry in glyphs.values())
+    glyphs.update(text)
+    return glyphs, cmap
+
+
+def outlines(data):
+    font = TTFont(BytesIO(data))
+    glyph_set = font.getGlyphSet()
+    result = {}
+    for glyph_name in font.getGlyphOrder():
+        pen = RecordingPen()
+        glyph_set[glyph_name].draw(pen)
+        result[glyph_name] = (glyph_set[glyph_name].width, pen.value)
+    return result
+
+
+def test_subroutinized_font_draws_the_same(font_glyphs):
+    glyphs, cmap = font_glyphs
+    plain = font_bytes(build_font(glyphs, cmap, subrs=False))
+    shared = font_bytes(build_font(glyphs, cmap, subrs=True))
+    assert TTFont(BytesIO(shared))['CFF '].cff.GlobalSubrs
+    assert outlines(shared) == outlines(plain)
+    assert len(shared) < len(plain)
+
+
+def test_first_command_and_endchar_stay_in_place():
+    # Two glyphs sharing a long run after different widths and movetos
+    run = [10, 20, 'rlineto', 30, 40, 'rlineto', -10, 5, 'rlineto', 7, -8, 'rlineto'] * 3
+    programs = {
+        'a': [500, 100, 100, 'rmoveto'] + run + ['endchar'],
+        'b': [600, 300, 50, 'rmoveto'] + run + ['endchar'],
+    }
+    new_programs, subrs = subroutinize(programs)
+    assert subrs
+    for glyph_name, program in programs.items():
+        commands = split_commands(new_programs[glyph_name])
+        assert commands[0] == split_commands(program)[0]
+        assert commands[-1] == ('endchar',)
+    for subr in subrs:
+        assert 'callgsubr' not in subr
@@ -0,0 +1,46 @@
+"""
+Tests for the `sitelen` command: sitelen_ilo_pona/cli.py hands over to
+scripts/sitelen_cli.py from an editable checkout and fails clearly without
+one, and subcommands only import their own script.
+"""
+
+import subprocess
+import sys
+
+import sitelen_cli
+from conftest import ROOT_DIR
+from sitelen_ilo_pona import cli
+
+
+def test_installed_without_checkout(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(cli, 'SCRIPTS_DIR', tmp_path / 'scripts')
+    assert cli.main(['render', 'jan pona']) == 1
+    assert 'pip install -e .' in capsys.readouterr().err
+
+
+def test_installed_hands_over(capsys):
+    assert cli.main(['--help']) == 0
+    out = capsys.readouterr().out
+    for command in sitelen_cli.COMMANDS:
+        assert command in out
+
+
+def test_unknown_command(capsys):
+    assert sitelen_cli.main(['nope']) == 2
+    assert "unknown command 'nope'" in capsys.readouterr().err
+
+
+def test_render_does_not_import_heavy_modules():
+    code = (
+        'import sys\n'
+        f'sys.path.insert(0, {str(ROOT_DIR / "scripts")!r})\n'
+        'import sitelen_cli\n'
+        'try:\n'
+        "    sitelen_cli.main(['render', '--help'])\n"
+        'except SystemExit:\n'
+        '    pass\n'
+        "print(sorted({'fontTools', 'uharfbuzz', 'numpy'} & set(sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            check=True)
+    assert result.stdout.splitlines()[-1] == '[]'
@@ -0,0 +1,79 @@
+"""
+Tests for scripts/compound_index.py: the trie must match exactly what the
+original matcher (kept here as reference_match) did, longest compound first.
+"""
+
+import csv
+import random
+
+from conftest import ROOT_DIR
+from compound_index import CompoundIndex
+from generate_sitelen_kalama_pona import match_compounds, parse_input
+
+
+def reference_match(word_tokens, compound_set, max_length=4):
+    """The matcher the trie replaced: try every length from the longest."""
+    result = []
+    i = 0
+    while i < len(word_tokens):
+        for length in range(min(max_length, len(word_tokens) - i), 1, -1):
+            candidate = '-'.join(word_tokens[i:i + length])
+            if candidate in compound_set:
+                result.append(candidate)
+                i += length
+                break
+        else:
+            result.append(word_tokens[i])
+            i += 1
+    return result
+
+
+def label_tokens():
+    with open(ROOT_DIR / 'data' / 'wikidata_tok_labels.csv', encoding='utf-8', newline='') as f:
+        return [parse_input(row['label'])[0] for row in csv.DictReader(f)]
+
+
+def test_matches_reference_on_labels():
+    index = CompoundIndex.scan(ROOT_DIR / 'sitelen_seli_kiwen_svgs')
+    names = set(index)
+    assert names
+    for tokens in label_tokens():
+        assert index.match(tokens) == reference_match(tokens, names)
+
+
+def test_matches_reference_on_long_compounds():
+    # Overlapping compounds of two to four tokens, where greedy longest
+    # matching and backing off to shorter prefixes both matter
+    names = {'jan-sewi', 'jan-sewi-pona', 'sewi-pona', 'tomo-tawa', 'tomo-tawa-kon',
+             'tomo-tawa-kon-suli', 'kon-suli', 'pona-mute', 'a-a-a'}
+    words = ['jan', 'sewi', 'pona', 'mute', 'tomo', 'tawa', 'kon', 'suli', 'a', 'li']
+    index = CompoundIndex(names)
+    rng = random.Random(0)
+    for _ in range(2000):
+        tokens = [rng.choice(words) for _ in range(rng.randint(0, 12))]
+        assert index.match(tokens) == reference_match(tokens, names)
+
+
+def test_longest_match_and_no_single_tokens():
+    index = CompoundIndex(['jan-sewi', 'jan-sewi-pona', 'pona'])
+    assert index.match(['jan', 'sewi', 'pona', 'mute']) == ['jan-sewi-pona', 'mute']
+    assert index.match(['jan', 'sewi', 'mute']) == ['jan-sewi', 'mute']
+    assert index.match(['jan']) == ['jan']
+    assert index.match([]) == []
+
+
+def test_match_compounds_accepts_any_collection():
+    names = ['tomo-sewi', 'jan-pona']
+    tokens = ['tomo', 'sewi', 'jan', 'pona']
+    assert match_compounds(tokens, set(names)) == match_compounds(tokens, CompoundIndex(names))
+
+
+def test_save_and_load(tmp_path):
+    words_dir = tmp_path / 'words'
+    words_dir.mkdir()
+    for name in ('jan-sewi', 'tomo-tawa-kon', 'jan'):
+        (words_dir / f'Sitelen seli kiwen - {name}.svg').write_text('<svg/>')
+    index_file = tmp_path / 'compound_index.json'
+    CompoundIndex.scan(words_dir).save(index_file, words_dir)
+    loaded = CompoundIndex.load(index_file, words_dir)
+    assert list(loaded) == ['jan-sewi', 'tomo-tawa-kon']
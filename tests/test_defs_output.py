@@ -0,0 +1,88 @@
+"""
+Tests for the <defs>/<use> output of Renderer.to_svg(): every placed path
+must draw the same path data under the same transforms as the plain output,
+and each distinct path must be written once.
+"""
+
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import generate_sitelen_kalama_pona as gen
+from conftest import ROOT_DIR
+
+SVG = '{http://www.w3.org/2000/svg}'
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+PHRASES = ['jan pona', 'pona pona pona', 'jan Ma en jan Ma', 'ma Kanata', 'tomo sewi Isukusima']
+
+
+@pytest.fixture(scope='module')
+def renderer():
+    return gen.Renderer(cartouche=ROOT_DIR / 'benchmarks' / 'fixtures' / 'cartouche.svg')
+
+
+def placed_paths(svg):
+    """(d, [transforms, outermost first]) of every path drawn, in order."""
+    root = ET.fromstring(svg)
+    defs = {p.get('id'): p for p in root.iter(f'{SVG}path') if p.get('id')}
+    placed = []
+    for el in root:
+        if el.tag == f'{SVG}defs':
+            continue
+        if el.tag == f'{SVG}use':
+            path = defs[el.get(XLINK_HREF)[1:]]
+            transforms = [el.get('transform'), path.get('transform')]
+        elif el.tag == f'{SVG}g':
+            path = el.find(f'{SVG}path')
+            transforms = [el.get('transform'), path.get('transform')]
+        else:
+            path = el
+            transforms = [el.get('transform')]
+        placed.append((path.get('d'), [t for t in transforms if t]))
+    return placed
+
+
+@pytest.mark.parametrize('minify', [None, 2])
+@pytest.mark.parametrize('text', PHRASES)
+def test_defs_draw_the_same(renderer, text, minify):
+    plain = renderer.render(text, minify=minify)
+    defs = renderer.render(text, use_defs=True, minify=minify)
+    assert placed_paths(defs) == placed_paths(plain)
+
+
+@pytest.mark.parametrize('text', PHRASES)
+def test_each_path_defined_once(renderer, text):
+    root = ET.fromstring(renderer.render(text, use_defs=True))
+    defined = [(p.get('d'), p.get('transform')) for p in root.iter(f'{SVG}path')]
+    assert all(p.get('id') for p in root.iter(f'{SVG}path'))
+    assert len(defined) == len(set(defined))
+    uses = root.findall(f'{SVG}use')
+    assert {u.get(XLINK_HREF)[1:] for u in uses} == {p.get('id') for p in root.iter(f'{SVG}path')}
+
+
+def test_repeated_word_is_shared(renderer):
+    root = ET.fromstring(renderer.render('pona pona pona', use_defs=True))
+    assert len(root.findall(f'{SVG}use')) == 3 * len(list(root.iter(f'{SVG}path')))
+
+
+def test_inner_transforms_are_kept(tmp_path):
+    # Word SVGs whose paths carry their own transform besides the flip
+    words_dir = tmp_path / 'words'
+    words_dir.mkdir()
+    for word, transform in (('pona', 'translate(40,0) scale(1,-1)'), ('jan', 'rotate(5)')):
+        (words_dir / f'Sitelen seli kiwen - {word}.svg').write_text(
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 -1000 900 1200">'
+            f'<path d="M 100,100 L 800,100 L 800,700 Z" transform="{transform}"/></svg>',
+            encoding='utf-8')
+    renderer = gen.Renderer(words_dir=words_dir)
+    plain = renderer.render('pona jan pona')
+    defs = renderer.render('pona jan pona', use_defs=True)
+    placed = placed_paths(defs)
+    assert placed == placed_paths(plain)
+    assert [transforms[1] for _, transforms in placed] == ['translate(40,0)', 'rotate(5)',
+                                                            'translate(40,0)']
+
+
+def test_defs_and_flatten_conflict(renderer):
+    with pytest.raises(ValueError):
+        renderer.render('jan pona', use_defs=True, flatten=True)
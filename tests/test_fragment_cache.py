@@ -0,0 +1,99 @@
+"""
+Tests for FragmentCache in scripts/generate_sitelen_kalama_pona.py: a word
+run or cartouche block is serialized once and placed at any x, flattened or
+not, gives the same output as formatting it again, and is formatted again
+when a glyph file it was read from changes.
+"""
+
+import os
+
+import pytest
+
+import generate_sitelen_kalama_pona as gen
+from conftest import ROOT_DIR
+
+CARTOUCHE_FIXTURE = ROOT_DIR / 'benchmarks' / 'fixtures' / 'cartouche.svg'
+PHRASES = ['jan Ma', 'tomo sewi jan Ma', 'jan pona', 'pona jan pona', 'ma Kanata', 'jan Kanata']
+OPTIONS = [
+    {},
+    {'minify': 2},
+    {'flatten': True},
+    {'flatten': True, 'minify': 1},
+    {'flatten': True, 'precision': 1},
+]
+
+
+def renderer(fragment_cache=None, **kwargs):
+    return gen.Renderer(cartouche=CARTOUCHE_FIXTURE, fragment_cache=fragment_cache, **kwargs)
+
+
+def to_svg(r, text, **options):
+    """(SVG, path byte stats) for text."""
+    stats = {}
+    return r.to_svg(r.layout(text), stats=stats, **options), stats
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_cached_output_matches_uncached(options):
+    cached = renderer()
+    uncached = renderer(gen.FragmentCache(maxsize=0))
+    for _ in range(2):
+        for text in PHRASES:
+            assert to_svg(cached, text, **options) == to_svg(uncached, text, **options)
+    assert uncached.fragment_cache.info().hits == 0
+    assert cached.fragment_cache.info().hits > len(PHRASES)
+
+
+@pytest.mark.parametrize('flatten', [False, True])
+def test_block_hits_at_another_offset(flatten):
+    r = renderer()
+    r.render('jan Ma', flatten=flatten)
+    info = r.fragment_cache.info()
+    # The "Ma" cartouche block follows a wider word run here
+    r.render('tomo sewi Ma', flatten=flatten)
+    after = r.fragment_cache.info()
+    assert (after.hits - info.hits, after.misses - info.misses) == (1, 1)
+
+
+def test_key_holds_no_path_data():
+    r = renderer()
+    result = r.layout('jan Ma')
+    for fragment in gen._fragments(result):
+        key = gen._fragment_key(fragment, (False, 2, None))
+        for glyph, part in zip(fragment, key[1:]):
+            st = os.stat(glyph.source[0])
+            assert part[2] == glyph.source == (glyph.source[0], (st.st_mtime_ns, st.st_size))
+        assert not any(p['d'] in repr(key) for glyph in fragment for p in glyph.paths)
+
+
+def test_glyph_change_misses(tmp_path):
+    words_dir = tmp_path / 'words'
+    words_dir.mkdir()
+    svg = words_dir / 'Sitelen seli kiwen - pona.svg'
+
+    def write(d, mtime_ns):
+        svg.write_text('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 -1000 900 1200">'
+                       f'<path d="{d}" transform="scale(1,-1)"/></svg>', encoding='utf-8')
+        os.utime(svg, ns=(mtime_ns, mtime_ns))
+
+    write('M 100,100 L 800,100 L 800,700 Z', 1_000_000_000)
+    r = renderer(words_dir=words_dir)
+    r.render('pona')
+    flattened = r.render('pona', flatten=True)
+    write('M 100,100 L 800,100 L 800,600 Z', 2_000_000_000)
+    misses = r.fragment_cache.info().misses
+    assert b'L 800,600' in r.render('pona')
+    assert r.render('pona', flatten=True) != flattened
+    assert r.fragment_cache.info().misses == misses + 2
+
+
+def test_lru_eviction():
+    r = renderer(gen.FragmentCache(maxsize=2))
+    for text in ('jan', 'pona', 'tomo'):
+        r.render(text)
+    assert r.fragment_cache.info().currsize == 2
+    misses = r.fragment_cache.info().misses
+    r.render('tomo')
+    assert r.fragment_cache.info().misses == misses
+    r.render('jan')
+    assert r.fragment_cache.info().misses == misses + 1
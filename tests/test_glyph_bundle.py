@@ -0,0 +1,118 @@
+"""
+Tests for scripts/glyph_bundle.py: a bundle built from a small copy of the
+glyph directories must give the same entries as parsing the SVGs, and any
+SVG whose mtime or size changed since the build must be parsed from disk.
+"""
+
+import os
+import shutil
+
+import pytest
+
+import generate_sitelen_kalama_pona as gen
+from conftest import ROOT_DIR
+from glyph_bundle import GlyphBundle, build_bundle
+
+WORDS = ['jan', 'sewi', 'jan-sewi', 'pona']
+SYLLABLES = ['ma', 'sin']
+
+
+def copy_glyph(src, root):
+    dest = root / src.relative_to(ROOT_DIR)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(src, dest)
+    return dest
+
+
+@pytest.fixture
+def glyph_root(tmp_path):
+    root = tmp_path / 'repo'
+    files = [copy_glyph(gen.WORD_SVGS_DIR / f'Sitelen seli kiwen - {w}.svg', root) for w in WORDS]
+    files += [copy_glyph(gen.SYLLABLES_DIR / f'sitelen kalama pona - {s}.svg', root)
+              for s in SYLLABLES]
+    cartouche = root / gen.CARTOUCHE_SVG.relative_to(ROOT_DIR)
+    shutil.copy2(ROOT_DIR / 'benchmarks' / 'fixtures' / 'cartouche.svg', cartouche)
+    files.append(cartouche)
+    bundle_file = tmp_path / 'glyph_bundle.bin'
+    assert build_bundle(bundle_file, root) == len(files)
+    return root, bundle_file, files
+
+
+def as_plain(entry):
+    return (
+        [dict(p) for p in entry.paths],
+        [(label, dict(p)) for label, p in entry.labeled_paths],
+        entry.viewbox,
+    )
+
+
+def stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def test_entries_match_parsed_svgs(glyph_root):
+    root, bundle_file, files = glyph_root
+    cache = gen.GlyphCache(bundle_file=bundle_file, bundle_root=root)
+    for svg_file in files:
+        entry = cache.get(svg_file)
+        parsed = gen._parse_glyph_svg(str(svg_file), stamp(svg_file))
+        assert as_plain(entry) == as_plain(parsed)
+        assert entry.bbox == pytest.approx(parsed.bbox)
+        assert entry.label_bboxes.keys() == parsed.label_bboxes.keys()
+    assert cache.info().bundle_hits == len(files)
+
+
+def test_cartouche_segments(glyph_root):
+    root, bundle_file, files = glyph_root
+    bundle = GlyphBundle.open(bundle_file, root)
+    segments = bundle.meta()['cartouche']['segments']
+    assert set(segments) == set(gen.CARTOUCHE_LABELS)
+    assert all(segments.values())
+
+
+def test_unknown_file_is_not_found(glyph_root):
+    root, bundle_file, files = glyph_root
+    bundle = GlyphBundle.open(bundle_file, root)
+    missing = root / gen.WORD_SVGS_DIR.relative_to(ROOT_DIR) / 'Sitelen seli kiwen - mute.svg'
+    assert bundle.lookup(missing, (0, 0), gen.glyph_path) is None
+    assert bundle.lookup(ROOT_DIR.parent / 'elsewhere.svg', (0, 0), gen.glyph_path) is None
+
+
+@pytest.mark.parametrize('change', ['mtime', 'content'])
+def test_stale_stamp_falls_back_to_svg(glyph_root, change):
+    root, bundle_file, files = glyph_root
+    svg_file = files[0]
+    bundled = gen.GlyphCache(bundle_file=bundle_file, bundle_root=root).get(svg_file)
+    if change == 'mtime':
+        st = os.stat(svg_file)
+        os.utime(svg_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    else:
+        text = svg_file.read_text(encoding='utf-8')
+        svg_file.write_text(text.replace(' d="', ' d="M 0,0 L 1,1 Z ', 1), encoding='utf-8')
+
+    bundle = GlyphBundle.open(bundle_file, root)
+    assert bundle.lookup(svg_file, stamp(svg_file), gen.glyph_path) is None
+    cache = gen.GlyphCache(bundle_file=bundle_file, bundle_root=root)
+    entry = cache.get(svg_file)
+    assert cache.info().bundle_hits == 0
+    assert entry.stamp == stamp(svg_file)
+    assert as_plain(entry) == as_plain(gen._parse_glyph_svg(str(svg_file), stamp(svg_file)))
+    if change == 'content':
+        assert as_plain(entry) != as_plain(bundled)
+
+
+def test_compound_index(glyph_root):
+    root, bundle_file, files = glyph_root
+    words_dir = root / gen.WORD_SVGS_DIR.relative_to(ROOT_DIR)
+    bundle = GlyphBundle.open(bundle_file, root)
+    assert list(bundle.compound_index(words_dir)) == ['jan-sewi']
+    copy_glyph(gen.WORD_SVGS_DIR / 'Sitelen seli kiwen - tomo-tawa.svg', root)
+    assert bundle.compound_index(words_dir) is None
+
+
+def test_invalid_bundle(tmp_path):
+    bad = tmp_path / 'glyph_bundle.bin'
+    bad.write_bytes(b'not a bundle at all, far too short' * 2)
+    assert GlyphBundle.open(bad) is None
+    assert GlyphBundle.open(tmp_path / 'missing.bin') is None
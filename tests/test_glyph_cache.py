@@ -0,0 +1,87 @@
+"""
+Tests for GlyphCache in scripts/generate_sitelen_kalama_pona.py: entries
+are revalidated against the file's mtime and size, the least recently used
+entry is evicted first, and cached paths cannot be changed by callers.
+"""
+
+import os
+
+import pytest
+
+import generate_sitelen_kalama_pona as gen
+
+SVG = ('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">'
+       '<path d="{d}"/></svg>')
+
+
+def write_svg(path, d, mtime_ns=None):
+    path.write_text(SVG.format(d=d), encoding='utf-8')
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def first_d(entry):
+    return entry.paths[0]['d']
+
+
+def test_hit_and_reload_on_change(tmp_path):
+    svg = write_svg(tmp_path / 'a.svg', 'M 0,0 L 10,10', 1_000_000_000)
+    cache = gen.GlyphCache()
+    assert first_d(cache.get(svg)) == 'M 0,0 L 10,10'
+    assert first_d(cache.get(svg)) == 'M 0,0 L 10,10'
+    assert cache.info()[:2] == (1, 1)
+
+    # Same size, new mtime
+    write_svg(svg, 'M 0,0 L 20,20', 2_000_000_000)
+    assert first_d(cache.get(svg)) == 'M 0,0 L 20,20'
+    # Same mtime, new size
+    write_svg(svg, 'M 0,0 L 300,300', 2_000_000_000)
+    assert first_d(cache.get(svg)) == 'M 0,0 L 300,300'
+    assert cache.info()[:2] == (1, 3)
+
+
+def test_missing_file_is_dropped(tmp_path):
+    svg = write_svg(tmp_path / 'a.svg', 'M 0,0 L 10,10')
+    cache = gen.GlyphCache()
+    assert cache.get(svg) is not None
+    svg.unlink()
+    assert cache.get(svg) is None
+    assert cache.info().currsize == 0
+
+
+def test_lru_eviction(tmp_path):
+    a, b, c = (write_svg(tmp_path / f'{name}.svg', f'M 0,0 L {i},{i}')
+               for i, name in enumerate('abc', 1))
+    cache = gen.GlyphCache(maxsize=2)
+    cache.get(a)
+    cache.get(b)
+    cache.get(a)  # b is now the least recently used
+    cache.get(c)
+    assert cache.info().currsize == 2
+
+    misses = cache.info().misses
+    cache.get(a)
+    cache.get(c)
+    assert cache.info().misses == misses
+    cache.get(b)
+    assert cache.info().misses == misses + 1
+
+
+def test_clear(tmp_path):
+    svg = write_svg(tmp_path / 'a.svg', 'M 0,0 L 10,10')
+    cache = gen.GlyphCache()
+    cache.get(svg)
+    cache.get(svg)
+    cache.clear()
+    assert cache.info() == (0, 0, cache.maxsize, 0, 0)
+
+
+def test_paths_are_read_only(tmp_path):
+    svg = write_svg(tmp_path / 'a.svg', 'M 0,0 L 10,10')
+    cache = gen.GlyphCache()
+    entry = cache.get(svg)
+    with pytest.raises(TypeError):
+        entry.paths[0]['d'] = 'M 0,0'
+    assert isinstance(entry.paths, tuple)
+    assert first_d(cache.get(svg)) == 'M 0,0 L 10,10'
@@ -0,0 +1,304 @@
+"""
+Tests for scripts/path_geometry.py, checked against the glyph SVGs in this
+repository and a few hand-written paths that use every command.
+
+Curves are sampled densely here, independently of the module's own
+derivative and arc-center code, and its results are compared with the
+samples.
+"""
+
+import math
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import ROOT_DIR
+from path_geometry import (
+    batch_bboxes, iter_segments, minify_path, multiply, parse_transform, path_bbox,
+    transform_path,
+)
+
+STEPS = 64
+# Largest gap between a curve's true extreme and its nearest sample, for the
+# glyph sizes here (about 1000 units)
+SAMPLE_TOLERANCE = 0.5
+
+# Every command, absolute and relative, including S/T reflection and arcs
+# with flags written without separators
+HAND_PATHS = [
+    'M10 10 L90 10 L90 90 Z',
+    'M0 0 C0 -50 100 -50 100 0 S200 50 200 0',
+    'm5 5 c10-40 60-40 70 0 s60 40 70 0 z',
+    'M0 0 Q50 -80 100 0 T200 0',
+    'M10,20 q40,60 80,0 t80,0',
+    'M0 0 H50 V50 h-25 v25 z',
+    'M100 100 A50 30 30 0 1 200 150',
+    'M100 100 a50 30 -45 1 0 100 50',
+    'M0 0 a1 1 0 01.5.5',
+    'M80 80 A45 45 0 0 0 125 125 L125 80 Z M230 80 A45 45 0 1 0 275 125 Z',
+]
+
+
+def glyph_path_data():
+    """Path data of every word and syllable glyph SVG."""
+    files = sorted((ROOT_DIR / 'sitelen_seli_kiwen_svgs').glob('*.svg'))
+    files += sorted((ROOT_DIR / 'uniform_syllables').glob('*.svg'))
+    ds = []
+    for svg_file in files:
+        for el in ET.parse(svg_file).getroot().iter():
+            if el.tag.rpartition('}')[2] == 'path' and el.get('d'):
+                ds.append(el.get('d'))
+    return ds
+
+
+GLYPH_PATHS = glyph_path_data()
+
+
+def _arc_ellipse(x0, y0, rx, ry, phi_deg, large, sweep, x1, y1):
+    """(cx, cy, rx, ry, cos_phi, sin_phi, start angle, sweep angle) of an SVG
+    arc (SVG implementation notes, F.6.5)."""
+    phi = math.radians(phi_deg)
+    cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+    dx, dy = (x0 - x1) / 2, (y0 - y1) / 2
+    xp = cos_phi * dx + sin_phi * dy
+    yp = -sin_phi * dx + cos_phi * dy
+    rx, ry = abs(rx), abs(ry)
+    scale = math.sqrt((xp / rx) ** 2 + (yp / ry) ** 2)
+    if scale > 1:
+        rx, ry = rx * scale, ry * scale
+    root = ((rx * ry) ** 2 - (rx * yp) ** 2 - (ry * xp) ** 2) / ((rx * yp) ** 2 + (ry * xp) ** 2)
+    root = math.sqrt(max(root, 0.0)) * (-1 if large == sweep else 1)
+    cxp, cyp = root * rx * yp / ry, -root * ry * xp / rx
+    cx = cos_phi * cxp - sin_phi * cyp + (x0 + x1) / 2
+    cy = sin_phi * cxp + cos_phi * cyp + (y0 + y1) / 2
+    start = math.atan2((yp - cyp) / ry, (xp - cxp) / rx)
+    end = math.atan2((-yp - cyp) / ry, (-xp - cxp) / rx)
+    sweep_angle = end - start
+    if sweep and sweep_angle < 0:
+        sweep_angle += 2 * math.pi
+    elif not sweep and sweep_angle > 0:
+        sweep_angle -= 2 * math.pi
+    return cx, cy, rx, ry, cos_phi, sin_phi, start, sweep_angle
+
+
+def _arc_points(x0, y0, rx, ry, phi_deg, large, sweep, x1, y1, steps):
+    """Points along an SVG arc."""
+    if not rx or not ry or (x0, y0) == (x1, y1):
+        return [(x1, y1)]
+    cx, cy, rx, ry, cos_phi, sin_phi, start, sweep_angle = _arc_ellipse(
+        x0, y0, rx, ry, phi_deg, large, sweep, x1, y1)
+    points = []
+    for i in range(1, steps + 1):
+        t = start + sweep_angle * i / steps
+        ex, ey = rx * math.cos(t), ry * math.sin(t)
+        points.append((cx + cos_phi * ex - sin_phi * ey, cy + sin_phi * ex + cos_phi * ey))
+    return points
+
+
+def sample_segments(d, steps=STEPS):
+    """[[(x, y), ...] per segment] sampled along the path."""
+    samples = []
+    x = y = start_x = start_y = 0.0
+    for seg in iter_segments(d):
+        cmd = seg[0]
+        if cmd == 'Z':
+            samples.append([(x, y), (start_x, start_y)])
+            x, y = start_x, start_y
+            continue
+        if cmd in ('M', 'L'):
+            points = [seg[1:3]]
+        elif cmd == 'C':
+            x1, y1, x2, y2, x3, y3 = seg[1:]
+            points = []
+            for i in range(1, steps + 1):
+                t = i / steps
+                mt = 1 - t
+                points.append((mt ** 3 * x + 3 * mt * mt * t * x1 + 3 * mt * t * t * x2 + t ** 3 * x3,
+                               mt ** 3 * y + 3 * mt * mt * t * y1 + 3 * mt * t * t * y2 + t ** 3 * y3))
+        elif cmd == 'Q':
+            x1, y1, x2, y2 = seg[1:]
+            points = []
+            for i in range(1, steps + 1):
+                t = i / steps
+                mt = 1 - t
+                points.append((mt * mt * x + 2 * mt * t * x1 + t * t * x2,
+                               mt * mt * y + 2 * mt * t * y1 + t * t * y2))
+        else:
+            points = _arc_points(x, y, *seg[1:], steps)
+        if cmd == 'M':
+            samples.append(points)
+            start_x, start_y = points[-1]
+        else:
+            samples.append([(x, y)] + points)
+        x, y = points[-1]
+    return samples
+
+
+def sampled_bbox(d, steps=STEPS):
+    points = [p for segment in sample_segments(d, steps) for p in segment]
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def assert_bbox_matches_samples(bbox, d):
+    sampled = sampled_bbox(d)
+    # Contains every sample...
+    assert bbox[0] <= sampled[0] + 1e-6 and bbox[1] <= sampled[1] + 1e-6
+    assert bbox[2] >= sampled[2] - 1e-6 and bbox[3] >= sampled[3] - 1e-6
+    # ...and is no larger than the sampling can miss
+    for exact, approx in zip(bbox, sampled):
+        assert exact == pytest.approx(approx, abs=SAMPLE_TOLERANCE)
+
+
+@pytest.mark.parametrize('d', HAND_PATHS)
+def test_bbox_of_every_command(d):
+    assert_bbox_matches_samples(path_bbox(d), d)
+
+
+def test_bbox_of_glyphs():
+    assert GLYPH_PATHS
+    for d in GLYPH_PATHS:
+        assert_bbox_matches_samples(path_bbox(d), d)
+
+
+def test_bbox_of_nothing():
+    assert path_bbox('') is None
+    assert path_bbox('10 10 L 20 20') is None
+
+
+def test_batch_bboxes_match_path_bbox():
+    # NumPy pass if numpy is installed, the pure Python fallback otherwise
+    ds = HAND_PATHS + GLYPH_PATHS
+    for d, bbox in zip(ds, batch_bboxes(ds)):
+        assert bbox == pytest.approx(path_bbox(d), abs=1e-6)
+
+
+# Placements like the ones --flatten bakes in, plus rotation, skew and a
+# flip, which reverses an arc's sweep
+TRANSFORMS = [
+    'translate(12.5,-30) scale(0.8,-0.8)',
+    'translate(922.5,0) scale(0.64,0.64) scale(1,-1)',
+    'rotate(30 100 100) scale(1.5,0.5)',
+    'skewX(20) translate(-5,7)',
+    'matrix(0.6,0.2,-0.3,0.9,40,-20)',
+    'scale(-1,1)',
+]
+
+
+def _apply(m, point):
+    a, b, c, d, e, f = m
+    x, y = point
+    return a * x + c * y + e, b * x + d * y + f
+
+
+def _on_ellipse(point, ellipse):
+    """How far point is from the ellipse, relative to its size (0 on it)."""
+    cx, cy, rx, ry, cos_phi, sin_phi = ellipse[:6]
+    dx, dy = point[0] - cx, point[1] - cy
+    local_x = cos_phi * dx + sin_phi * dy
+    local_y = -sin_phi * dx + cos_phi * dy
+    return abs(math.hypot(local_x / rx, local_y / ry) - 1)
+
+
+def _close(got, want, tolerance=1e-4):
+    return abs(got[0] - want[0]) <= tolerance and abs(got[1] - want[1]) <= tolerance
+
+
+def assert_transformed(d, m, steps=STEPS):
+    """transform_path(d, m) draws d with m applied to every point."""
+    out = transform_path(d, m, precision=6)
+    original_segments = list(iter_segments(d))
+    transformed_segments = list(iter_segments(out))
+    before, after = sample_segments(d, steps), sample_segments(out, steps)
+    assert len(original_segments) == len(transformed_segments) == len(before) == len(after)
+    start = (0.0, 0.0)
+    for segment, transformed_segment, original, transformed in zip(
+            original_segments, transformed_segments, before, after):
+        expected = [_apply(m, point) for point in original]
+        if segment[0] == 'A' and transformed_segment[0] == 'A':
+            # A transformed arc is the same curve under another
+            # parameterization: check that the points land on its ellipse
+            assert _close(transformed[-1], expected[-1])
+            ellipse = _arc_ellipse(*start, *transformed_segment[1:])
+            for point in expected:
+                assert _on_ellipse(point, ellipse) < 1e-6
+        else:
+            assert len(transformed) == len(expected)
+            for got, want in zip(transformed, expected):
+                assert _close(got, want), (segment, got, want)
+        if transformed:
+            start = transformed[-1]
+
+
+@pytest.mark.parametrize('transform', TRANSFORMS)
+@pytest.mark.parametrize('d', HAND_PATHS)
+def test_transform_path_hand_paths(d, transform):
+    assert_transformed(d, parse_transform(transform))
+
+
+@pytest.mark.parametrize('transform', TRANSFORMS)
+def test_transform_path_glyphs(transform):
+    m = parse_transform(transform)
+    for d in GLYPH_PATHS[::10]:
+        assert_transformed(d, m)
+
+
+def test_parse_transform_composes_in_order():
+    m = parse_transform('translate(10,20) scale(2,3)')
+    assert _apply(m, (1, 1)) == pytest.approx((12, 23))
+    m = parse_transform('rotate(90 10 10)')
+    assert _apply(m, (20, 10)) == pytest.approx((10, 20))
+    assert multiply(parse_transform('scale(2)'), parse_transform('translate(5,0)')) == \
+        pytest.approx(parse_transform('scale(2) translate(5,0)'))
+
+
+def quantized_segments(d, precision):
+    """iter_segments() of d in integer units of 10**-precision, without the
+    lines that rounding makes zero-length: what minify_path() must keep."""
+    k = 10 ** precision
+    out = []
+    x = y = start_x = start_y = None
+    for seg in iter_segments(d):
+        cmd = seg[0]
+        if cmd == 'Z':
+            out.append(('Z',))
+            x, y = start_x, start_y
+            continue
+        if cmd == 'A':
+            values = [round(v * k) for v in seg[1:4]] + [int(seg[4]), int(seg[5])]
+            values += [round(v * k) for v in seg[6:]]
+        else:
+            values = [round(v * k) for v in seg[1:]]
+        end = tuple(values[-2:])
+        if cmd == 'M':
+            start_x, start_y = end
+        elif cmd == 'L' and end == (x, y):
+            continue
+        out.append((cmd, *values))
+        x, y = end
+    return out
+
+
+@pytest.mark.parametrize('precision', [0, 1, 2, 3])
+def test_minify_round_trip(precision):
+    for d in HAND_PATHS + GLYPH_PATHS:
+        minified = minify_path(d, precision)
+        assert quantized_segments(minified, precision) == quantized_segments(d, precision), d
+        # Already minimal
+        assert minify_path(minified, precision) == minified
+
+
+def test_minify_shrinks_glyphs():
+    for d in GLYPH_PATHS:
+        assert len(minify_path(d, 2)) <= len(d)
+
+
+@pytest.mark.parametrize('d, expected', [
+    ('M 10.00,20.00 L 30.00,20.00 L 30.00,50.00 Z', 'M10 20H30V50z'),
+    ('M0,0 L0.004,0 L10,10', 'M0 0 10 10'),
+    ('M0 0 C0 -50 100 -50 100 0 C100 50 200 50 200 0', 'M0 0C0-50 100-50 100 0S200 50 200 0'),
+    ('M 0.50,-0.50 L 1.25,-0.75', 'M.5-.5l.75-.25'),
+])
+def test_minify_examples(d, expected):
+    assert minify_path(d, 2) == expected
@@ -0,0 +1,138 @@
+"""
+Tests for scripts/render_server.py: ETags and 304s, 400s for bad queries,
+response cache revalidation after a glyph edit, and keep-alive for HTTP/1.1
+but not (by default) for HTTP/1.0 clients.
+"""
+
+import asyncio
+import os
+import shutil
+
+import pytest
+
+import generate_sitelen_kalama_pona as gen
+import render_server
+from conftest import ROOT_DIR
+
+CARTOUCHE_FIXTURE = ROOT_DIR / 'benchmarks' / 'fixtures' / 'cartouche.svg'
+
+
+@pytest.fixture
+def words_dir(tmp_path, monkeypatch):
+    words_dir = tmp_path / 'words'
+    words_dir.mkdir()
+    for word in ('jan', 'pona'):
+        shutil.copy2(gen.WORD_SVGS_DIR / f'Sitelen seli kiwen - {word}.svg', words_dir)
+    monkeypatch.setattr(gen, 'DEFAULT_RENDERER', gen.Renderer(
+        words_dir=words_dir, cartouche=CARTOUCHE_FIXTURE, glyph_cache=gen.GlyphCache()))
+    return words_dir
+
+
+def get(service, target, **headers):
+    return service.handle('GET', target, {k.replace('_', '-'): v for k, v in headers.items()})
+
+
+def test_etag_and_not_modified(words_dir):
+    service = render_server.RenderService()
+    status, headers, body = get(service, '/render?text=jan+pona')
+    assert status == 200
+    assert headers['Content-Type'].startswith('image/svg+xml')
+    assert body == gen.render('jan pona')
+    etag = headers['ETag']
+    assert etag.startswith('"') and etag.endswith('"')
+
+    for match in (etag, f'"other", {etag}', '*'):
+        status, headers, body = get(service, '/render?text=jan%20%20pona', if_none_match=match)
+        assert (status, body, headers['ETag']) == (304, b'', etag)
+    assert get(service, '/render?text=jan+pona', if_none_match='"other"')[0] == 200
+    # Different options, different body and ETag
+    status, headers, _ = get(service, '/render?text=jan+pona&minify=1', if_none_match=etag)
+    assert status == 200 and headers['ETag'] != etag
+
+
+@pytest.mark.parametrize('target', [
+    '/render',
+    '/render?text=++',
+    '/render?text=' + 'a' * (render_server.MAX_TEXT_LENGTH + 1),
+    '/render?text=jan&defs=1&flatten=1',
+    '/render?text=jan&minify=7',
+    '/render?text=jan&minify=two',
+])
+def test_bad_requests(words_dir, target):
+    status, _, body = get(render_server.RenderService(), target)
+    assert status == 400
+    assert body
+
+
+def test_not_found_and_method(words_dir):
+    service = render_server.RenderService()
+    assert get(service, '/other?text=jan')[0] == 404
+    assert service.handle('POST', '/render?text=jan', {})[:2] == (405, {'Allow': 'GET, HEAD'})
+
+
+def test_cache_revalidates_after_interval(words_dir, monkeypatch):
+    svg = words_dir / 'Sitelen seli kiwen - pona.svg'
+    calls = []
+    dependencies = gen.glyph_dependencies
+
+    def counted(text):
+        calls.append(text)
+        return dependencies(text)
+
+    monkeypatch.setattr(gen, 'glyph_dependencies', counted)
+    service = render_server.RenderService(revalidate_seconds=3600)
+    body = service.render('pona', {})[0]
+    assert service.render('pona', {})[0] == body
+    assert (service.hits, service.misses, len(calls)) == (1, 1, 1)
+
+    text = svg.read_text(encoding='utf-8')
+    svg.write_text(text.replace(' d="', ' d="M 0,0 L 1,1 Z ', 1), encoding='utf-8')
+    st = os.stat(svg)
+    os.utime(svg, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    # Still within the interval: served from the cache without a stat
+    assert service.render('pona', {})[0] == body
+    assert len(calls) == 1
+
+    service.revalidate_seconds = 0
+    edited = service.render('pona', {})[0]
+    assert edited != body and b'M 0,0 L 1,1 Z' in edited
+    assert service.render('pona', {})[0] == edited
+    assert (service.hits, service.misses) == (3, 2)
+
+
+async def exchange(service, requests):
+    """Send raw requests on one connection; returns everything read until
+    the server closes it (or a timeout)."""
+    server = await asyncio.start_server(render_server.make_handler(service), '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for request in requests:
+            writer.write(request.encode('latin-1'))
+        await writer.drain()
+        data = b''
+        try:
+            while chunk := await asyncio.wait_for(reader.read(65536), 0.5):
+                data += chunk
+        except asyncio.TimeoutError:
+            closed = False
+        else:
+            closed = True
+        writer.close()
+    return data, closed
+
+
+@pytest.mark.parametrize('version, connection, keep_alive', [
+    ('HTTP/1.1', None, True),
+    ('HTTP/1.1', 'close', False),
+    ('HTTP/1.0', None, False),
+    ('HTTP/1.0', 'keep-alive', True),
+])
+def test_connection_handling(words_dir, version, connection, keep_alive):
+    header = f'Connection: {connection}\r\n' if connection else ''
+    request = f'GET /render?text=jan {version}\r\nHost: x\r\n{header}\r\n'
+    data, closed = asyncio.run(exchange(render_server.RenderService(), [request, request]))
+    responses = data.count(b'HTTP/1.1 200 OK')
+    assert responses == (2 if keep_alive else 1)
+    assert (b'Connection: keep-alive' if keep_alive else b'Connection: close') in data
+    assert closed != keep_alive
@@ -0,0 +1,99 @@
+"""
+Tests that a Renderer can be shared between threads: concurrent renders
+through small, constantly evicting caches give the same bytes as rendering
+serially, the cache counters add up, and the cartouche and compound index
+are loaded once however many threads ask for them at the same time.
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import generate_sitelen_kalama_pona as gen
+from conftest import ROOT_DIR
+
+CARTOUCHE_FIXTURE = ROOT_DIR / 'benchmarks' / 'fixtures' / 'cartouche.svg'
+PHRASES = [
+    'jan pona', 'tomo sewi', 'jan Ma', 'ma Kanata', 'kulupu Ume', 'pona pona pona',
+    'jan sewi Amatelasu', 'tomo sewi Isukusima', 'toki pona', 'ma tomo Pasila',
+]
+OPTIONS = [{}, {'minify': 2}, {'flatten': True}, {'use_defs': True}]
+THREADS = 8
+
+
+@pytest.fixture(autouse=True)
+def switch_often():
+    # Switch threads far more often than the default 5 ms, so that renders
+    # really interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_concurrent_renders_match_serial():
+    jobs = [(text, options) for options in OPTIONS for text in PHRASES] * 5
+    serial = gen.Renderer(cartouche=CARTOUCHE_FIXTURE)
+    expected = [serial.render(text, **options) for text, options in jobs]
+
+    shared = gen.Renderer(cartouche=CARTOUCHE_FIXTURE, glyph_cache=gen.GlyphCache(maxsize=8),
+                          fragment_cache=gen.FragmentCache(maxsize=4))
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(lambda job: shared.render(job[0], **job[1]), jobs))
+    assert results == expected
+
+    fragments = shared.fragment_cache.info()
+    assert fragments.currsize <= 4
+    # Only the plain, minified and flattened outputs go through the cache
+    layouts = [shared.layout(text) for text in PHRASES]
+    per_pass = sum(len(gen._fragments(result)) for result in layouts)
+    assert fragments.hits + fragments.misses == per_pass * 3 * 5
+    assert shared.glyph_cache.info().currsize <= 8
+
+
+def test_cartouche_loaded_once():
+    calls = []
+    template = gen.CartoucheTemplate.from_svg(CARTOUCHE_FIXTURE)
+
+    def load():
+        calls.append(threading.get_ident())
+        time.sleep(0.05)
+        return template
+
+    renderer = gen.Renderer(cartouche=load)
+    barrier = threading.Barrier(THREADS)
+
+    def render(_):
+        barrier.wait()
+        return renderer.render('jan Ma')
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(render, range(THREADS)))
+    assert len(calls) == 1
+    assert len(set(results)) == 1
+
+
+def test_compound_index_built_once(monkeypatch):
+    calls = []
+    scan = gen.CompoundIndex.scan
+
+    def slow_scan(words_dir):
+        calls.append(words_dir)
+        time.sleep(0.05)
+        return scan(words_dir)
+
+    monkeypatch.setattr(gen.CompoundIndex, 'scan', staticmethod(slow_scan))
+    renderer = gen.Renderer(cartouche=CARTOUCHE_FIXTURE)
+    barrier = threading.Barrier(THREADS)
+
+    def match(_):
+        barrier.wait()
+        return renderer.layout('jan pona').matched_words
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(match, range(THREADS)))
+    assert len(calls) == 1
+    assert results == [['jan-pona']] * THREADS
@@ -0,0 +1,103 @@
+"""
+Tests for scripts/sfdir.py: header keys and the first SplineSet of a .glyph
+file are parsed into Contours, everything after it is skipped, and every
+glyph of ..sfdir/ has the contours and segments its SplineSet lists.
+"""
+
+import pytest
+
+from conftest import ROOT_DIR
+from sfdir import SFDir, parse_glyph, parse_splineset, read_glyph
+
+SFDIR = ROOT_DIR / '..sfdir'
+
+GLYPH = """\
+StartChar: ka.sitelen_kalama_pona
+Encoding: 65710 -1 8
+Width: 900
+Flags: HW
+LayerCount: 2
+Fore
+SplineSet
+100 0 m 1
+ 800 0 l 1
+ 800 700 l 1,2,3
+ 450 900 200 900 100 700 c 0
+ 100 0 l 1
+300 200 m 0
+ 300 500 l 1
+ 500 200 l 1
+EndSplineSet
+Validated: 1
+Layer: 2
+SplineSet
+0 0 m 1
+ 10 10 l 1
+EndSplineSet
+EndChar
+"""
+
+
+def test_parse_glyph():
+    glyph = parse_glyph(GLYPH.splitlines())
+    assert (glyph.name, glyph.encoding, glyph.unicode, glyph.width) == (
+        'ka.sitelen_kalama_pona', 65710, -1, 900)
+    # The second SplineSet (another layer) is ignored
+    assert len(glyph.contours) == 2
+    outer, inner = glyph.contours
+    assert outer.ops == 'mllcl' and inner.ops == 'mll'
+    assert list(outer) == [
+        ('m', 100, 0), ('l', 800, 0), ('l', 800, 700),
+        ('c', 450, 900, 200, 900, 100, 700), ('l', 100, 0),
+    ]
+    assert list(outer.coords) == [100, 0, 800, 0, 800, 700, 450, 900, 200, 900, 100, 700, 100, 0]
+    assert len(inner) == 3
+
+
+def test_parse_glyph_defaults():
+    glyph = parse_glyph(['StartChar: space', 'Encoding: 32 32 1', 'EndChar'])
+    assert (glyph.name, glyph.encoding, glyph.unicode) == ('space', 32, 32)
+    assert glyph.width == 1000
+    assert glyph.contours is None
+
+
+def test_splineset_stops_at_end():
+    lines = iter(['0 0 m 1', ' 5 5 l 1', 'EndSplineSet', 'Width: 3'])
+    contours = parse_splineset(lines)
+    assert [list(c) for c in contours] == [[('m', 0, 0), ('l', 5, 5)]]
+    assert next(lines) == 'Width: 3'
+
+
+def splineset_counts(path):
+    """(contours, segments) of the first SplineSet, counted line by line."""
+    contours = segments = 0
+    inside = False
+    for line in path.read_text(encoding='utf-8').splitlines():
+        if line == 'SplineSet':
+            inside = True
+        elif line == 'EndSplineSet':
+            break
+        elif inside and line.split()[-2] in ('m', 'l', 'c'):
+            contours += line.split()[-2] == 'm'
+            segments += 1
+    return contours, segments
+
+
+@pytest.mark.skipif(not SFDIR.is_dir(), reason='..sfdir/ not checked out')
+def test_repository_font():
+    font = SFDir.read(SFDIR)
+    glyph_files = sorted(SFDIR.glob('*.glyph'))
+    assert len(font) == len(glyph_files)
+    assert (font.ascent, font.descent) == (800, 200)
+    for path in glyph_files:
+        glyph = font.glyphs[path.stem]
+        assert glyph.name == path.stem
+        contours, segments = splineset_counts(path)
+        assert len(glyph.contours) == contours
+        assert sum(len(c) for c in glyph.contours) == segments
+        assert all(c.ops[0] == 'm' and 'm' not in c.ops[1:] for c in glyph.contours)
+
+    a = read_glyph(SFDIR / 'a.sitelen_kalama_pona.glyph')
+    assert (a.encoding, a.width) == (65702, 1000)
+    assert next(iter(a.contours[0])) == ('m', 457.021499999, 133.306583832)
+    assert next(iter(a.contours[1])) == ('m', 370, -3.99509776351)
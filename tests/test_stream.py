@@ -0,0 +1,85 @@
+"""
+Tests for the NDJSON stream of scripts/generate_sitelen_kalama_pona.py
+(stream() and --stdin): one result per non-blank input line, in input
+order, with errors reported in the stream instead of stopping it.
+"""
+
+import io
+import json
+import subprocess
+import sys
+
+import pytest
+
+import generate_sitelen_kalama_pona as gen
+from conftest import ROOT_DIR
+
+CARTOUCHE_FIXTURE = ROOT_DIR / 'benchmarks' / 'fixtures' / 'cartouche.svg'
+
+
+@pytest.fixture(scope='module')
+def renderer():
+    return gen.Renderer(cartouche=CARTOUCHE_FIXTURE)
+
+
+def run_stream(renderer, lines, **options):
+    out = io.StringIO()
+    counts = gen.stream(lines, out, renderer=renderer, **options)
+    return counts, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_phrases_and_records_inline(renderer):
+    lines = [
+        'jan pona\n',
+        '\n',
+        json.dumps({'qid': 'Q1', 'label': 'jan Ma'}) + '\n',
+        '   \n',
+        json.dumps({'label': 'tomo sewi', 'extra': 1}) + '\n',
+    ]
+    counts, results = run_stream(renderer, lines, inline=True, minify=2)
+    assert counts == (3, 0)
+    assert [r['label'] for r in results] == ['jan pona', 'jan Ma', 'tomo sewi']
+    assert results[1]['qid'] == 'Q1'
+    assert 'qid' not in results[0] and 'extra' not in results[2]
+    for r in results:
+        result = renderer.layout(r['label'])
+        assert r['svg'] == renderer.to_svg(result, minify=2)
+        assert r['width'] == round(result.width)
+        assert 'output' not in r
+
+
+def test_errors_do_not_stop_the_stream(renderer):
+    lines = ['{"label":', '{"qid": "Q2"}', '{"label": 5}', 'jan pona']
+    counts, results = run_stream(renderer, lines, inline=True)
+    assert counts == (1, 3)
+    assert [r.get('input') for r in results] == lines[:3] + [None]
+    assert all('error' in r for r in results[:3])
+    assert 'error' not in results[3] and results[3]['svg']
+
+
+def test_writes_files(renderer, tmp_path):
+    counts, results = run_stream(renderer, ['jan Ma', 'pona'], output_dir=tmp_path, flatten=True)
+    assert counts == (2, 0)
+    for r in results:
+        output = tmp_path / gen.output_filename(r['label'])
+        assert r['output'] == str(output)
+        assert output.read_text(encoding='utf-8') == renderer.to_svg(
+            renderer.layout(r['label']), flatten=True)
+        assert output.with_name(output.name + '.wiki.txt').exists()
+        assert 'svg' not in r
+
+
+def test_stdin_command():
+    # stdout carries only the results; the summary goes to stderr
+    result = subprocess.run(
+        [sys.executable, str(ROOT_DIR / 'scripts' / 'generate_sitelen_kalama_pona.py'),
+         '--stdin', '--inline'],
+        input='jan pona\n{"qid": "Q7", "label": "tomo"}\nnot json {\n{bad\n'.encode('utf-8'),
+        capture_output=True, check=False)
+    assert result.returncode == 1
+    results = [json.loads(line) for line in result.stdout.decode('utf-8').splitlines()]
+    assert [r.get('label') for r in results] == ['jan pona', 'tomo', 'not json {', None]
+    assert results[1]['qid'] == 'Q7'
+    assert '<svg' in results[0]['svg']
+    assert results[3]['input'] == '{bad'
+    assert b'3 rendered, 1 failed' in result.stderr
@@ -0,0 +1,142 @@
+"""
+Tests for scripts/subset_font.py against a Latin font built from ..sfdir/:
+the text of a page picks the codepoints and glyphs it needs, each subset
+maps exactly its group's codepoints, and it still shapes the page's text to
+the same glyphs as the full font.
+"""
+
+import io
+import sys
+
+import pytest
+from fontTools.ttLib import TTFont
+
+import subset_font
+from build_font import (
+    LATIN_FAMILY, PUA_BASE, SFDIR, SYLLABLES, build_font, compile_glyph, font_bytes,
+    text_glyphs,
+)
+
+pytestmark = pytest.mark.skipif(not SFDIR.is_dir(), reason='..sfdir/ not checked out')
+
+PUA = {syllable: chr(PUA_BASE + i) for i, syllable in enumerate(SYLLABLES)}
+HTML = """<html><head><style>.sitelen { font-family: x }</style>
+<script>var s = "wile";</script></head>
+<body><p>kepeken</p><p class="big sitelen">jan <b>[Sinpo]</b><br>pona</p>
+<span class="sitelen">""" + PUA['ma'] + PUA['ka'] + """</span></body></html>
+"""
+
+
+@pytest.fixture(scope='module')
+def latin_font_file(tmp_path_factory):
+    glyphs = {}
+    cmap = {}
+    for i, syllable in enumerate(SYLLABLES):
+        entry, _ = compile_glyph(syllable)
+        if entry is not None:
+            glyphs[f'skp.{syllable}'] = entry
+            cmap[PUA_BASE + i] = f'skp.{syllable}'
+    text, text_cmap = text_glyphs(entry['width'] for entry in glyphs.values())
+    font = build_font({**glyphs, **text}, {**cmap, **text_cmap}, family=LATIN_FAMILY)
+    path = tmp_path_factory.mktemp('fonts') / 'latin.otf'
+    path.write_bytes(font_bytes(font))
+    return path
+
+
+@pytest.fixture(scope='module')
+def latin_font(latin_font_file):
+    font = TTFont(latin_font_file)
+    widths = {name: advance for name, (advance, _) in font['hmtx'].metrics.items()}
+    return font, font.getBestCmap(), widths
+
+
+def test_page_text_class_filter(tmp_path):
+    page = tmp_path / 'page.html'
+    page.write_text(HTML, encoding='utf-8')
+    text = page_words(subset_font.page_text(page, 'sitelen'))
+    assert text == ['jan', '[Sinpo]', 'pona', PUA['ma'] + PUA['ka']]
+    everything = page_words(subset_font.page_text(page))
+    assert 'kepeken' in everything
+    assert 'wile' not in ' '.join(everything)
+    assert '.sitelen' not in ' '.join(everything)
+
+
+def page_words(text):
+    return ' '.join(text.split()).replace('[ ', '[').replace(' ]', ']').split()
+
+
+def test_page_glyphs(latin_font):
+    font, cmap, widths = latin_font
+    groups = subset_font.page_glyphs('jan [Sinpo] ' + PUA['ma'], cmap, widths)
+    codepoints, glyphs = groups['latin']
+    assert codepoints == {ord(ch) for ch in 'janSinpo[] '}
+    assert {'skp.jan', 'skp.sin', 'skp.po', 'cartouche.left', 'cartouche.right'} <= glyphs
+    bars = {name for name in glyphs if name.startswith('cartouche.bar.')}
+    assert bars == {subset_font.cartouche_bar(widths[name]) for name in ('skp.sin', 'skp.po')}
+    # Syllables the letters could form but the words do not spell
+    assert not {'skp.ja', 'skp.an', 'skp.si', 'skp.a'} & glyphs
+    assert groups['pua'] == ({ord(PUA['ma'])}, {'skp.ma'})
+
+    _, glyphs = subset_font.page_glyphs('suna', cmap, widths)['latin']
+    assert {'skp.su', 'skp.na', 'n.onset'} <= glyphs
+    assert 'cartouche.left' not in glyphs
+
+
+def test_page_glyphs_without_font_characters(latin_font):
+    _, cmap, widths = latin_font
+    assert subset_font.page_glyphs('  \n', cmap, widths) == {}
+    assert subset_font.page_glyphs('123 ???', cmap, widths) == {}
+    assert set(subset_font.page_glyphs(PUA['ka'] + ' ', cmap, widths)) == {'pua'}
+
+
+def test_unicode_ranges():
+    assert subset_font.unicode_ranges({0x61, 0x62, 0x63, 0x65, 0xE100}) == \
+        'U+61-63, U+65, U+E100'
+
+
+@pytest.mark.parametrize('text', ['jan [Sinpo] li pona', 'toki [Anten] ' + PUA['mu']])
+def test_subset_cmap_and_shaping(latin_font_file, latin_font, text):
+    font, cmap, widths = latin_font
+    data = latin_font_file.read_bytes()
+    for group, (codepoints, glyphs) in subset_font.page_glyphs(text, cmap, widths).items():
+        subset = TTFont(io.BytesIO(subset_font.subset_bytes(data, codepoints, glyphs, 'woff')))
+        assert subset.getBestCmap() == {cp: cmap[cp] for cp in codepoints}
+        assert glyphs <= set(subset.getGlyphOrder())
+        if group == 'latin':
+            words = [w for w in text.split() if all(ord(ch) in codepoints for ch in w)]
+            assert shape(subset, words) == shape(font, words)
+
+
+def shape(font, words):
+    """Glyph names for each word with the liga feature."""
+    hb = pytest.importorskip('uharfbuzz')
+    font.flavor = None
+    buf = io.BytesIO()
+    font.save(buf)
+    hb_font = hb.Font(hb.Face(buf.getvalue()))
+    shaped = []
+    for word in words:
+        buffer = hb.Buffer()
+        buffer.add_str(word)
+        buffer.guess_segment_properties()
+        hb.shape(hb_font, buffer, {'liga': True})
+        order = font.getGlyphOrder()
+        shaped.append([order[info.codepoint] for info in buffer.glyph_infos])
+    return shaped
+
+
+def test_main_writes_subsets_and_css(latin_font_file, tmp_path, monkeypatch, capsys):
+    out = tmp_path / 'subsets'
+    monkeypatch.setattr(sys, 'argv', [
+        'subset_font.py', '--font', str(latin_font_file), '--flavor', 'woff',
+        '--output-dir', str(out), '--url-prefix', 'fonts/',
+        '--text', 'jan [Sinpo]', '--name', 'sinpo', '--text', PUA['pa'], '--text', '123',
+    ])
+    subset_font.main()
+    assert sorted(p.name for p in out.iterdir()) == [
+        'sinpo.css', 'sinpo.latin.woff', 'text.css', 'text.pua.woff']
+    css = (out / 'sinpo.css').read_text(encoding='utf-8')
+    assert f"font-family: '{LATIN_FAMILY}'" in css
+    assert "url('fonts/sinpo.latin.woff') format('woff')" in css
+    assert 'unicode-range: U+20, U+53, U+5B, U+5D, U+61, U+69-6A, U+6E-70;' in css
+    assert 'text-2: uses no characters from the font' in capsys.readouterr().out